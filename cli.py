@@ -0,0 +1,250 @@
+"""
+cli.py
+命令行入口 —— 日报各阶段可单独运行，阶段之间通过数据快照（JSON）衔接
+
+  python main.py                                  完整日报（同 run）
+  python main.py run [--refresh news] [--profile all]
+  python main.py watch                            盘中盯盘
+  python main.py news    [--in S] [--out S]       抓取 + 翻译新闻，写入快照
+  python main.py quotes  [--in S] [--out S]       指数 / 北向 / 板块 / 热门股 / 休市状态
+  python main.py select  [--in S] [--out S] [--weights W] [--offline]
+  python main.py render  [--in S] [--out-dir D]   快照 → HTML / Markdown / 纯文本（不联网）
+  python main.py send    [--in S]                 渲染并发送快照对应的日报
+  python main.py backtest [--weights W] [--market CN] [--top 10] [--horizon 5] [--step 5]
+  python main.py bench   [--weights W] [--repeat 5]
+
+  · 快照路径默认是本期日报的快照（CACHE_DIR/snapshots/<期次>.json），--in 缺省时从空快照开始，
+    --out 缺省时写回 --in；每个阶段只更新自己那部分，其余原样保留
+  · --weights：「因子=权重」逗号分隔（只覆盖给出的因子），或 JSON 文件路径
+  · select --offline 只读本地缓存的 K 线 / 基本面 / 北向 / 情绪数据，不联网、不发邮件，
+    改权重后重算一次通常不到一秒
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from config import CACHE_DIR, FACTOR_WEIGHTS, MAX_PICKS_PER_INDUSTRY, STOCK_POOL, TOP_STOCKS_COUNT
+from stock_selectors.factors import FACTORS
+from stock_selectors.universe import MARKETS
+from utils.snapshot import edition_id, empty_snapshot, load_snapshot, save_snapshot, snapshot_parts, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+
+def _weights(spec: str) -> Dict[str, float]:
+    """--weights 解析：JSON 文件或「因子=权重,…」，与 FACTOR_WEIGHTS 合并"""
+    try:
+        if spec.endswith(".json"):
+            with open(spec, "r", encoding="utf-8") as f:
+                override = {k: float(v) for k, v in json.load(f).items()}
+        else:
+            override = {k.strip(): float(v) for k, v in (p.split("=", 1) for p in spec.split(",") if p.strip())}
+    except (OSError, ValueError) as e:
+        raise argparse.ArgumentTypeError(f"无法解析权重 {spec!r}: {e}")
+    unknown = sorted(set(override) - set(FACTORS))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知因子: {', '.join(unknown)}（可选: {', '.join(FACTORS)}）")
+    return {**FACTOR_WEIGHTS, **override}
+
+
+def _stages(spec: str) -> List[str]:
+    return [s.strip() for s in spec.split(",") if s.strip()]
+
+
+# ──────────────────────────────────────────────────────────────
+# 快照读写
+# ──────────────────────────────────────────────────────────────
+
+def _snap_in(args) -> str:
+    return args.snap_in or snapshot_path(CACHE_DIR, edition_id())
+
+
+def _open_snapshot(args) -> dict:
+    path = _snap_in(args)
+    if os.path.exists(path):
+        return load_snapshot(path)
+    if args.snap_in:
+        raise SystemExit(f"快照不存在: {path}")
+    return empty_snapshot()
+
+
+def _update_snapshot(args, **parts) -> str:
+    snap = _open_snapshot(args)
+    snap.update(snapshot_parts(**parts))
+    return save_snapshot(snap, args.snap_out or _snap_in(args))
+
+
+# ──────────────────────────────────────────────────────────────
+# 子命令
+# ──────────────────────────────────────────────────────────────
+
+def cmd_run(args) -> int:
+    from runner import DailyRunner
+    kwargs = {}
+    if args.refresh is not None:
+        kwargs["force"] = args.refresh
+    if args.profile is not None:
+        kwargs["profile"] = args.profile
+    DailyRunner(**kwargs).run()
+    return 0
+
+
+def cmd_watch(args) -> int:
+    from watcher import WatchRunner
+    WatchRunner().run()
+    return 0
+
+
+def cmd_news(args) -> int:
+    from config import RSS_SOURCES
+    from news.aggregator import fetch_all_news
+    from news.sentiment import record_news
+    from runner import DailyRunner
+    raw = fetch_all_news(RSS_SOURCES)
+    try:
+        record_news(raw)
+    except Exception as e:
+        logger.warning(f"新闻情绪入库失败: {e}")
+    news = raw if args.no_translate else DailyRunner._translate(raw)
+    print(_update_snapshot(args, news_by_category=news))
+    return 0
+
+
+def cmd_quotes(args) -> int:
+    from config import MARKET_TOP_N, SECTOR_TOP_N
+    from news.market_hot import fetch_hot_sectors, fetch_hot_stocks, fetch_market_overview, fetch_north_fund_flow
+    from utils.trading_calendar import market_status
+    print(_update_snapshot(
+        args,
+        market_status=market_status(),
+        indices=fetch_market_overview(),
+        north_flow=fetch_north_fund_flow(),
+        hot_sectors=fetch_hot_sectors(top_n=SECTOR_TOP_N),
+        hot_stocks=fetch_hot_stocks(stock_pool=STOCK_POOL, top_n=MARKET_TOP_N),
+    ))
+    return 0
+
+
+def cmd_select(args) -> int:
+    from runner import DailyRunner
+    t0 = time.perf_counter()
+    picks = DailyRunner.select(args.weights, offline=args.offline)
+    elapsed = time.perf_counter() - t0
+    for m, table in picks.items():
+        print(f"{MARKETS[m].flag} {MARKETS[m].name} Top {len(table)}")
+        for i, s in enumerate(table, 1):
+            print(f"  {i:>2}. {s.name}({s.code}) 评分 {s.total_score * 100:.0f}")
+    path = _update_snapshot(args, top_picks=picks.get("CN", []),
+                            market_picks={m: t for m, t in picks.items() if m != "CN"})
+    print(f"选股耗时 {elapsed:.3f}s → {path}")
+    return 0
+
+
+def cmd_render(args) -> int:
+    from runner import DailyRunner
+    print(DailyRunner().render(_snap_in(args), out_dir=args.out_dir or CACHE_DIR))
+    return 0
+
+
+def cmd_send(args) -> int:
+    from runner import DailyRunner
+    DailyRunner().resend(_snap_in(args))
+    return 0
+
+
+def cmd_backtest(args) -> int:
+    from stock_selectors.backtest import run_backtest
+    from stock_selectors.multi_factor import candidate_pool
+    pool = candidate_pool(args.market, STOCK_POOL if args.market == "CN" and STOCK_POOL else None)
+    res = run_backtest(args.weights or FACTOR_WEIGHTS, pool, market=args.market, top_n=args.top,
+                       horizon=args.horizon, step=args.step, max_per_industry=MAX_PICKS_PER_INDUSTRY,
+                       offline=not args.online)
+    for p in res.periods:
+        print(f"  {p.date}  组合 {p.pick_return:+7.2f}%  全池 {p.universe_return:+7.2f}%  超额 {p.excess:+7.2f}%")
+    print(json.dumps(res.summary(), ensure_ascii=False))
+    return 0 if res.periods else 1
+
+
+def cmd_bench(args) -> int:
+    """离线打分快路径计时：从缓存 K 线重算全部市场的选股（不联网、不写快照）"""
+    from runner import DailyRunner
+    weights = args.weights or FACTOR_WEIGHTS
+    DailyRunner.select(weights, offline=True)          # 预热（导入 / 首次读缓存）
+    times = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        DailyRunner.select(weights, offline=True)
+        times.append(time.perf_counter() - t0)
+    print(f"离线选股 ×{args.repeat}：最快 {min(times) * 1000:.0f} ms，中位数 {statistics.median(times) * 1000:.0f} ms")
+    return 0
+
+
+# ──────────────────────────────────────────────────────────────
+# 参数
+# ──────────────────────────────────────────────────────────────
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="main.py", description="USTCB 财经日报")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("run", help="完整日报（默认）")
+    p.add_argument("--refresh", type=_stages, default=None, help="强制重跑的阶段，逗号分隔或 all（同 USTCB_REFRESH）")
+    p.add_argument("--profile", type=_stages, default=None, help="剖析的阶段，逗号分隔或 all（同 USTCB_PROFILE）")
+    p.set_defaults(func=cmd_run)
+
+    sub.add_parser("watch", help="盘中盯盘").set_defaults(func=cmd_watch)
+
+    def snap_args(p, out=True):
+        p.add_argument("--in", dest="snap_in", default=None, help="输入快照（默认本期快照）")
+        if out:
+            p.add_argument("--out", dest="snap_out", default=None, help="输出快照（默认写回输入）")
+
+    p = sub.add_parser("news", help="抓取 + 翻译新闻")
+    snap_args(p)
+    p.add_argument("--no-translate", action="store_true", help="不翻译英文新闻")
+    p.set_defaults(func=cmd_news)
+
+    p = sub.add_parser("quotes", help="指数 / 北向 / 板块 / 热门股")
+    snap_args(p)
+    p.set_defaults(func=cmd_quotes)
+
+    p = sub.add_parser("select", help="多因子选股")
+    snap_args(p)
+    p.add_argument("--weights", type=_weights, default=None, help="因子=权重,… 或 JSON 文件")
+    p.add_argument("--offline", action="store_true", help="只用本地缓存数据，不联网")
+    p.set_defaults(func=cmd_select)
+
+    p = sub.add_parser("render", help="快照 → HTML / Markdown / 纯文本")
+    snap_args(p, out=False)
+    p.add_argument("--out-dir", default=None, help=f"输出目录（默认 {CACHE_DIR}）")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("send", help="渲染并发送快照对应的日报")
+    snap_args(p, out=False)
+    p.set_defaults(func=cmd_send)
+
+    p = sub.add_parser("backtest", help="用缓存 K 线滚动回测")
+    p.add_argument("--weights", type=_weights, default=None, help="因子=权重,… 或 JSON 文件")
+    p.add_argument("--market", choices=list(MARKETS), default="CN")
+    p.add_argument("--top", type=int, default=TOP_STOCKS_COUNT, help="每期持有只数")
+    p.add_argument("--horizon", type=int, default=5, help="持有交易日数")
+    p.add_argument("--step", type=int, default=5, help="调仓间隔（交易日）")
+    p.add_argument("--online", action="store_true", help="K 线缓存过期时重新下载")
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser("bench", help="离线选股快路径计时")
+    p.add_argument("--weights", type=_weights, default=None, help="因子=权重,… 或 JSON 文件")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        return cmd_run(argparse.Namespace(refresh=None, profile=None))
+    return args.func(args)
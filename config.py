@@ -14,23 +14,58 @@ SMTP_PORT        = 465
 # ══ 运行模式 ════════════════════════════════════════════════════
 DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"  # true=只生成HTML不发邮件
 
+# 同一期日报重跑时默认从断点续跑；列出的阶段强制刷新，如 "news,picks_by_market" 或 "all"
+# 阶段：news / translations / indices / north_flow / sectors / hot_stocks / picks_by_market / send
+# send 只在点名时重发，"all" 或上游阶段重算都不会再次发信
+REFRESH_STAGES = [s.strip() for s in os.getenv("USTCB_REFRESH", "").split(",") if s.strip()]
+
+# 性能剖析（utils/profiler.py）：列出的阶段写 .pstats + .collapsed 到 CACHE_DIR/profiles/，如 "picks_by_market,render" 或 "all"
+# 除上面的阶段外还可剖析 render（渲染三种格式）
+PROFILE_STAGES   = [s.strip() for s in os.getenv("USTCB_PROFILE", "").split(",") if s.strip()]
+PROFILE_TOP_N    = 25       # 日志中打印的最热函数数
+PROFILE_INTERVAL = 0.005    # 栈采样间隔（秒）
+
 # ══ 选股参数 ════════════════════════════════════════════════════
 TOP_STOCKS_COUNT = 10    # 推荐 A股数量
 SECTOR_TOP_N     = 6     # 热门板块数量
 MARKET_TOP_N     = 8     # 热门股票数量
+HOT_MIN_CHANGE   = 2.0   # 热门股最低涨幅 %
 
 # ══ 多因子权重（合计 = 1.0） ════════════════════════════════════
 FACTOR_WEIGHTS = {
-    "momentum_5d":    0.12,
+    "momentum_5d":    0.11,
     "momentum_20d":   0.10,
-    "volume_ratio":   0.10,
-    "macd_signal":    0.12,
-    "rsi_score":      0.10,
-    "kdj_signal":     0.08,
-    "boll_position":  0.08,
+    "volume_ratio":   0.09,
+    "macd_signal":    0.11,
+    "rsi_score":      0.09,
+    "kdj_signal":     0.07,
+    "boll_position":  0.07,
     "turnover_rate":  0.08,
-    "pe_score":       0.12,
-    "north_flow":     0.10,
+    "pe_score":       0.11,
+    "north_flow":     0.09,
+    "news_sentiment": 0.08,
+}
+
+# 扩展因子模块（导入时用 @factor 注册，见 stock_selectors/factors.py）；只有在 FACTOR_WEIGHTS 中权重非零的因子才会计算
+# stock_selectors.extra_factors 提供 atr_score / obv_trend，需要时在上面加权重即可启用
+FACTOR_MODULES = ["stock_selectors.extra_factors"]
+
+# ══ 行业中性化 ══════════════════════════════════════════════════
+INDUSTRY_NEUTRAL       = "rank"   # "rank" / "zscore" / None（不做中性化）
+MAX_PICKS_PER_INDUSTRY = 3        # 同一行业最多入选几支（0 = 不限）
+
+# ══ 入选约束（stock_selectors/selection.py）═══════════════════════
+SELECT_MIN_TURNOVER = {"CN": 5e7, "HK": 2e7, "US": 2e7}    # 近 20 日日均成交额下限（当地货币）
+SELECT_PRICE_BAND   = {"CN": (2.0, 5000.0), "HK": (1.0, 5000.0), "US": (5.0, 10000.0)}
+SELECT_EXCLUDE_ST   = True     # 剔除 ST / *ST（仅 A 股）
+SELECT_MIN_LISTED_BARS = 40    # 面板内首根有效 K 线至今不足该数视为次新股，中途停牌不算（BARS_PERIOD=3mo 约 60 根）
+
+# ══ 基本面缓存有效期（小时），过期字段才会重新拉取 ══════════════
+FUNDAMENTAL_TTL_HOURS = {
+    "pe":             24,
+    "pb":             24,
+    "market_cap":     6,
+    "dividend_yield": 24 * 7,
 }
 
 # ══ RSS / 数据源（全部可被 GitHub Actions 访问的国际源）════════
@@ -63,13 +98,82 @@ RSS_SOURCES = {
     ],
 }
 
+# ══ 非 RSS 新闻源（声明式，新增源只需在此追加一项）══════════════
+# kind: html（CSS 选择器抓取）/ json（接口字段映射）；字段含义见 news/aggregator.py 的 Source
+NEWS_SOURCES = [
+    {
+        "name": "财联社电报", "kind": "html", "category": "A股财经",
+        "url": "https://www.cls.cn/telegraph",
+        "selector": ".telegraph-content-box",
+        "priority": 10, "max_items": 10,
+    },
+    {
+        "name": "雪球热帖", "kind": "json", "category": "A股财经",
+        "url": "https://xueqiu.com/v4/statuses/public_timeline_by_category.json?since_id=-1&max_id=-1&count=10&category=-1",
+        "items_path": "list",
+        "fields": {"title": "text", "link": "target", "summary": "text"},
+        "link_prefix": "https://xueqiu.com",
+        "headers": {"Referer": "https://xueqiu.com/"},
+        "priority": -10, "max_items": 10, "refresh_minutes": 30,
+    },
+]
+
+# 每个分类去重后保留的条数
+NEWS_CATEGORY_LIMIT = {"default": 15, "A股财经": 20}
+
+# ══ 新闻相关度排序（news/ranking.py）══════════════════════════
+# 得分 = recency·时效衰减 + source·来源权重 + cluster·ln(报道家数) + mention·个股/行业提及
+NEWS_RANK_WEIGHTS = {"recency": 1.0, "source": 0.5, "cluster": 0.6, "mention": 1.2}
+NEWS_HALF_LIFE_HOURS = 6        # 时效半衰期（小时）
+NEWS_SOURCE_WEIGHTS = {         # 未列出的来源按 1.0
+    "财联社电报": 1.2,
+    "雪球热帖": 0.7,
+}
+
+# ══ 新闻情绪因子（news/sentiment.py）══════════════════════════
+NEWS_SENTIMENT_WINDOW_DAYS     = 3     # 滚动窗口
+NEWS_SENTIMENT_HALF_LIFE_HOURS = 24    # 窗口内按半衰期加权
+
+# ══ 新闻源超时 & 熔断 ══════════════════════════════════════════
+SOURCE_TIMEOUT_DEFAULT   = 10    # 秒，无历史耗时时使用
+SOURCE_TIMEOUT_MIN       = 3     # 自适应超时（p95 × 1.5）的上下限
+SOURCE_TIMEOUT_MAX       = 15
+SOURCE_CB_FAILURES       = 3     # 连续失败几次后熔断
+SOURCE_CB_COOLDOWN_HOURS = 12    # 熔断冷却期（每次再熔断翻倍，最长 72h）
+
 # ══ 定时（scheduler.py 本地运行用，GitHub Actions 忽略此项）═══
 SCHEDULE_HOUR   = 7
 SCHEDULE_MINUTE = 30
 
+# ══ 盘中盯盘模式（python main.py watch）═══════════════════════════
+WATCH_INTERVAL_SEC = 30                                   # 行情轮询间隔
+WATCH_TOP_N        = 10                                   # 进入 Top-N 时提醒
+WATCH_SESSIONS     = [("09:30", "11:30"), ("13:00", "15:00")]  # 北京时间交易时段
+
 # ══ 缓存目录 ════════════════════════════════════════════════════
 CACHE_DIR = ".cache"
 
+# ══ 出站 HTTP 缓存（utils/http_cache.py）═══════════════════════
+HTTP_CACHE_BACKEND     = os.getenv("USTCB_HTTP_CACHE", "sqlite")   # sqlite / memory / off
+HTTP_CACHE_MAX_ENTRIES = 5000      # LRU 上限（条）
+HTTP_CACHE_TTL = {                 # 秒，按主机名后缀匹配（最长优先）；0 = 不缓存
+    "default":             600,
+    "fanyi-api.baidu.com": 30 * 86400,   # 同一句原文的译文不会变
+    "finance.yahoo.com":   300,
+    "cls.cn":              120,          # 电报更新快
+}
+
+# ══ K线面板缓存 ════════════════════════════════════════════════
+BARS_PERIOD      = "3mo"   # 批量下载的历史长度
+BARS_TTL_MINUTES = 30      # 面板缓存有效期
+
+# ══ 板块热度引擎（成分股聚合）══════════════════════════════════
+SECTOR_WEIGHTING   = "cap"  # "cap" = 市值加权 / "equal" = 等权
+SECTOR_MIN_MEMBERS = 2      # 成分股少于该数的行业不参与排名
+
+# ══ 北向资金持股数据（离线投放目录：CSV / Parquet，每行 日期,代码,持股数量,收盘价）══
+NORTH_FLOW_DROP_DIR = os.getenv("USTCB_NORTH_FLOW_DIR", "data/north_flow")
+
 # ══ 股票池（A股代码，Yahoo Finance 格式：.SS=上交所 .SZ=深交所）═══
 STOCK_POOL = [
     "600519.SS",  # 贵州茅台
@@ -84,5 +188,41 @@ STOCK_POOL = [
     "002475.SZ",  # 立讯精密
 ]
 
+# ══ 港股 / 美股选股池（代码 → (名称, 行业)，与 A 股走同一套打分引擎）══
+SELECT_MARKETS  = ["CN", "HK", "US"]   # 日报中分市场展示的选股列表
+MARKET_PICKS_N  = 5                    # 港股 / 美股各推荐几支（A 股见 TOP_STOCKS_COUNT）
+STOCK_POOL_HK = {
+    "0700.HK": ("腾讯控股", "互联网"),
+    "9988.HK": ("阿里巴巴", "互联网"),
+    "3690.HK": ("美团", "互联网"),
+    "1810.HK": ("小米集团", "消费电子"),
+    "9618.HK": ("京东集团", "互联网"),
+    "1211.HK": ("比亚迪股份", "汽车"),
+    "0941.HK": ("中国移动", "通信"),
+    "0005.HK": ("汇丰控股", "银行"),
+    "1299.HK": ("友邦保险", "金融"),
+    "2318.HK": ("中国平安", "金融"),
+    "0388.HK": ("香港交易所", "金融"),
+    "0883.HK": ("中国海洋石油", "能源"),
+}
+STOCK_POOL_US = {
+    "AAPL":  ("苹果", "消费电子"),
+    "MSFT":  ("微软", "软件"),
+    "NVDA":  ("英伟达", "半导体"),
+    "GOOGL": ("谷歌", "互联网"),
+    "AMZN":  ("亚马逊", "互联网"),
+    "META":  ("Meta", "互联网"),
+    "TSLA":  ("特斯拉", "汽车"),
+    "AVGO":  ("博通", "半导体"),
+    "AMD":   ("超威半导体", "半导体"),
+    "BABA":  ("阿里巴巴", "互联网"),
+    "PDD":   ("拼多多", "互联网"),
+    "JPM":   ("摩根大通", "银行"),
+}
+
 # ══ 并发工作线程数 ═════════════════════════════════════════════
 CONCURRENT_WORKERS = 5
+
+# ══ 多进程打分（stock_selectors/engine.py）══════════════════════
+PARALLEL_WORKERS    = int(os.getenv("USTCB_WORKERS", os.cpu_count() or 1))
+PARALLEL_MIN_STOCKS = 2000   # 股票数少于该值时单进程计算（进程启动开销不划算）
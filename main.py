@@ -14,7 +14,8 @@ logging.basicConfig(
     ],
 )
 
-from runner import DailyRunner
+from cli import main
 
 if __name__ == "__main__":
-    DailyRunner().run()
+    # 无参数 = 完整日报；子命令见 cli.py（python main.py -h）
+    sys.exit(main())
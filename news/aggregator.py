@@ -2,19 +2,29 @@
 news/aggregator.py
 抓取 RSS 新闻 + 财联社电报 + 雪球热帖
 v2.0：并发抓取，大幅提升速度
+v3.0：声明式新闻源注册表 —— RSS / HTML(CSS 选择器) / JSON 接口统一声明，
+      按 kind 分派到抓取插件，由同一个线程池 + 共享连接池并发执行
 """
 
+import json
 import logging
+import os
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import Any, Callable, Dict, List, Optional, Set
 
 import feedparser
 import requests
 from bs4 import BeautifulSoup
 
+from config import CACHE_DIR, NEWS_SOURCES, NEWS_CATEGORY_LIMIT
+from news.models import NewsItem
+from news.ranking import cluster_key, rank_news
+from news.source_health import SourceHealth
+from utils.http_cache import CachedResponse, get_http_cache
+
 logger = logging.getLogger(__name__)
 
 HEADERS = {
@@ -25,146 +35,268 @@ HEADERS = {
     )
 }
 
+NEWS_CACHE_PATH = os.path.join(CACHE_DIR, "news_cache.json")
+MAX_WORKERS = 32
+
 
 @dataclass
-class NewsItem:
-    title: str
-    link: str
-    summary: str = ""
-    source: str = ""
-    published: str = ""
-    category: str = ""
+class Source:
+    """
+    一个新闻源的声明
+    kind:            rss / html / json（对应 FETCHERS 中的抓取插件）
+    priority:        同一分类内的排列顺序，越大越靠前
+    max_items:       每次最多取几条
+    refresh_minutes: 该时间内重复运行直接复用上次结果（0 = 每次都抓）
+    selector:        html —— 每条新闻对应元素的 CSS 选择器
+    items_path:      json —— 新闻列表在响应中的路径，如 "data.list"
+    fields:          json —— {"title"/"link"/"summary"/"published": 响应字段名}
+    link_prefix:     json —— 相对链接前缀
+    """
+    name: str
+    kind: str
+    url: str
+    category: str
+    priority: int = 0
+    max_items: int = 7
+    refresh_minutes: int = 0
+    selector: str = ""
+    items_path: str = ""
+    fields: Dict[str, str] = field(default_factory=dict)
+    link_prefix: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+# ──────────────────────────────────────────────────────────────
+# 抓取插件：kind → fetcher(source, response) -> List[NewsItem]
+# ──────────────────────────────────────────────────────────────
+FETCHERS: Dict[str, Callable[[Source, CachedResponse], List[NewsItem]]] = {}
 
 
-def _fetch_rss(url: str, category: str, source_name: str, max_items: int = 8) -> List[NewsItem]:
-    """抓取单个 RSS 源"""
+def register_fetcher(kind: str):
+    def deco(fn):
+        FETCHERS[kind] = fn
+        return fn
+    return deco
+
+
+def _clean(text: str) -> str:
+    if "<" in text:
+        text = BeautifulSoup(text, "html.parser").get_text(separator=" ")
+    return " ".join(text.split())
+
+
+@register_fetcher("rss")
+def _parse_rss(src: Source, resp: CachedResponse) -> List[NewsItem]:
+    feed = feedparser.parse(resp.content)
+    if not feed.entries:
+        raise ValueError("空 feed")
     items: List[NewsItem] = []
-    try:
-        feed = feedparser.parse(url, request_headers=HEADERS)
-        for entry in feed.entries[:max_items]:
-            summary = entry.get("summary", "")
-            # 清理 HTML 标签
-            if "<" in summary:
-                summary = BeautifulSoup(summary, "html.parser").get_text(separator=" ")
-            summary = summary[:200].strip()
-
-            published = ""
-            if hasattr(entry, "published_parsed") and entry.published_parsed:
-                try:
-                    published = datetime(*entry.published_parsed[:6]).strftime("%m-%d %H:%M")
-                except Exception:
-                    pass
-
-            items.append(NewsItem(
-                title=entry.get("title", "（无标题）").strip(),
-                link=entry.get("link", url),
-                summary=summary,
-                source=source_name,
-                published=published,
-                category=category,
-            ))
-    except Exception as e:
-        logger.warning(f"RSS抓取失败 [{source_name}]: {e}")
+    for entry in feed.entries[:src.max_items]:
+        # 清理 HTML 标签
+        summary = _clean(entry.get("summary", ""))[:200].strip()
+
+        published = ""
+        if hasattr(entry, "published_parsed") and entry.published_parsed:
+            try:
+                # feedparser 的 published_parsed 已归一化为 UTC；published 统一存 UTC
+                published = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc).strftime("%m-%d %H:%M")
+            except Exception:
+                pass
+
+        items.append(NewsItem(
+            title=entry.get("title", "（无标题）").strip(),
+            link=entry.get("link", src.url),
+            summary=summary,
+            source=src.name,
+            published=published,
+            category=src.category,
+        ))
     return items
 
 
-def _fetch_cls_telegraph() -> List[NewsItem]:
-    """财联社电报最新快讯（非RSS）"""
+@register_fetcher("html")
+def _parse_html(src: Source, resp: CachedResponse) -> List[NewsItem]:
+    soup = BeautifulSoup(resp.text, "html.parser")
     items: List[NewsItem] = []
-    try:
-        url = "https://www.cls.cn/telegraph"
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for tag in soup.select(".telegraph-content-box")[:10]:
-            text = tag.get_text(separator=" ", strip=True)[:200]
-            if text:
-                items.append(NewsItem(
-                    title=text[:60],
-                    link=url,
-                    summary=text,
-                    source="财联社电报",
-                    category="A股财经",
-                ))
-    except Exception as e:
-        logger.warning(f"财联社电报抓取失败: {e}")
+    for tag in soup.select(src.selector)[:src.max_items]:
+        text = tag.get_text(separator=" ", strip=True)[:200]
+        if not text:
+            continue
+        a = tag if tag.name == "a" else tag.find("a")
+        href = a.get("href", "") if a else ""
+        items.append(NewsItem(
+            title=text[:60],
+            link=requests.compat.urljoin(src.url, href) if href else src.url,
+            summary=text,
+            source=src.name,
+            category=src.category,
+        ))
     return items
 
 
-def _fetch_xueqiu_hot() -> List[NewsItem]:
-    """雪球热帖（话题热度最高的讨论）"""
+@register_fetcher("json")
+def _parse_json(src: Source, resp: CachedResponse) -> List[NewsItem]:
+    data: Any = resp.json()
+    for key in filter(None, src.items_path.split(".")):
+        data = data.get(key, []) if isinstance(data, dict) else []
+    f = {"title": "title", "link": "link", "summary": "summary", "published": "", **src.fields}
     items: List[NewsItem] = []
+    for row in data[:src.max_items]:
+        title = _clean(str(row.get(f["title"], "")))
+        if not title:
+            continue
+        link = str(row.get(f["link"], "")) if f["link"] else ""
+        items.append(NewsItem(
+            title=title[:60].strip(),
+            link=(src.link_prefix + link) if link else src.url,
+            summary=_clean(str(row.get(f["summary"], "")))[:200],
+            source=src.name,
+            published=str(row.get(f["published"], "")) if f["published"] else "",
+            category=src.category,
+        ))
+    return items
+
+
+# ──────────────────────────────────────────────────────────────
+# 注册表 & 调度
+# ──────────────────────────────────────────────────────────────
+
+def load_sources(rss_sources: Dict[str, List[str]], extra: Optional[List[Dict[str, Any]]] = None) -> List[Source]:
+    """RSS_SOURCES（{分类: [url]}）+ NEWS_SOURCES（声明式字典列表）→ Source 列表"""
+    sources = [
+        Source(name=url.split("/")[2], kind="rss", url=url, category=cat)
+        for cat, urls in rss_sources.items() for url in urls
+    ]
+    for d in extra or []:
+        sources.append(Source(**d))
+    unknown = {s.kind for s in sources} - set(FETCHERS)
+    if unknown:
+        raise ValueError(f"未注册的新闻源类型: {sorted(unknown)}")
+    return sources
+
+
+def _fetch_source(src: Source, session: requests.Session, health: SourceHealth) -> List[NewsItem]:
+    """抓取单个源（超时按该源历史 p95 自适应；经 HTTP 缓存，命中时不计入耗时统计）"""
+    t0 = time.time()
+    parsed: Dict[str, List[NewsItem]] = {}
+
+    def validate(r: CachedResponse) -> bool:
+        # 只有解析出条目的响应才进缓存：200 但内容为空 / 非法的 feed 不能占住整个 TTL
+        parsed["items"] = FETCHERS[src.kind](src, r)
+        return bool(parsed["items"])
+
     try:
-        url = "https://xueqiu.com/v4/statuses/public_timeline_by_category.json?since_id=-1&max_id=-1&count=10&category=-1"
-        resp = requests.get(url, headers={**HEADERS, "Referer": "https://xueqiu.com/"}, timeout=10)
-        data = resp.json()
-        for s in data.get("list", []):
-            text = BeautifulSoup(s.get("text", ""), "html.parser").get_text()[:200]
-            items.append(NewsItem(
-                title=text[:60].strip(),
-                link=f"https://xueqiu.com{s.get('target', '')}",
-                summary=text,
-                source="雪球热帖",
-                category="A股财经",
-            ))
+        resp = get_http_cache().get(src.url, session=session, headers={**HEADERS, **src.headers},
+                                    timeout=health.timeout(src.url), validate=validate)
+        resp.raise_for_status()
+        # 命中缓存 / 合并到其他线程的请求时 validate 未在本线程执行，需要自己解析
+        items = parsed["items"] if "items" in parsed else FETCHERS[src.kind](src, resp)
+        if not resp.from_cache:
+            health.record(src.url, True, time.time() - t0)
+        return items
     except Exception as e:
-        logger.warning(f"雪球热帖抓取失败: {e}")
-    return items
+        health.record(src.url, False)
+        logger.warning(f"新闻源抓取失败 [{src.name}]: {e}")
+        return []
+
+
+def _load_news_cache() -> Dict[str, Any]:
+    try:
+        with open(NEWS_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
 
 
-def fetch_all_news(rss_sources: Dict[str, List[str]]) -> Dict[str, List[NewsItem]]:
+def _save_news_cache(cache: Dict[str, Any]):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = NEWS_CACHE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, NEWS_CACHE_PATH)
+
+
+def fetch_sources(sources: List[Source]) -> Dict[str, List[NewsItem]]:
     """
-    并发抓取所有新闻，返回按分类整理的字典  (v2.0 并发版)
-    rss_sources: {分类名: [url, ...]}
+    并发抓取全部新闻源，返回 {源 url: 新闻列表}
+    共享一个 Session（连接池按并发数放大）；熔断中的源跳过；
+    refresh_minutes 内抓过的源直接复用缓存结果
     """
-    result: Dict[str, List[NewsItem]] = {cat: [] for cat in rss_sources}
-
-    # 构建所有抓取任务
-    tasks = []
-    for category, urls in rss_sources.items():
-        for url in urls:
-            source_name = url.split("/")[2]
-            tasks.append((category, url, source_name))
-
-    # 并发抓取（最多12个线程）
-    logger.info(f"并发抓取 {len(tasks)} 个RSS源...")
-    with ThreadPoolExecutor(max_workers=12) as executor:
-        future_map = {
-            executor.submit(_fetch_rss, url, category, source_name, 7): (category, url)
-            for category, url, source_name in tasks
-        }
-        for future in as_completed(future_map):
-            category, url = future_map[future]
-            try:
-                items = future.result(timeout=15)
-                result[category].extend(items)
-            except Exception as e:
-                logger.debug(f"RSS任务失败 [{url[:40]}]: {e}")
+    health = SourceHealth()
+    cache = _load_news_cache()
+    now = time.time()
+    results: Dict[str, List[NewsItem]] = {}
+
+    todo, skipped = [], 0
+    for src in sources:
+        hit = cache.get(src.url)
+        if src.refresh_minutes and hit and now - hit["ts"] < src.refresh_minutes * 60:
+            results[src.url] = [NewsItem(**d) for d in hit["items"]]
+        elif health.allow(src.url):
+            todo.append(src)
+        else:
+            skipped += 1
+
+    logger.info(f"并发抓取 {len(todo)} 个新闻源（缓存命中 {len(results)}，熔断跳过 {skipped}）...")
+    workers = max(1, min(MAX_WORKERS, len(todo)))
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_map = {executor.submit(_fetch_source, src, session, health): src for src in todo}
+            for future in as_completed(future_map):
+                src = future_map[future]
+                try:
+                    items = future.result()
+                except Exception as e:
+                    logger.debug(f"新闻源任务失败 [{src.name}]: {e}")
+                    continue
+                results[src.url] = items
+                if src.refresh_minutes and items:
+                    cache[src.url] = {"ts": now, "items": [asdict(i) for i in items]}
 
-    # 去重 & 截断
+    for saver in (health.save, lambda: _save_news_cache(cache)):
+        try:
+            saver()
+        except Exception as e:
+            logger.debug(f"新闻源状态保存失败: {e}")
+    return results
+
+
+def fetch_all_news(rss_sources: Dict[str, List[str]], extra_sources: Optional[List[Dict[str, Any]]] = None) -> Dict[str, List[NewsItem]]:
+    """
+    并发抓取所有新闻，返回按分类整理的字典  (v3.0 注册表版)
+    rss_sources:   {分类名: [url, ...]}
+    extra_sources: 声明式新闻源（默认 config.NEWS_SOURCES）
+    """
+    sources = load_sources(rss_sources, NEWS_SOURCES if extra_sources is None else extra_sources)
+    fetched = fetch_sources(sources)
+
+    # 同分类内按 priority 降序、声明顺序拼接
+    result: Dict[str, List[NewsItem]] = {}
+    ordered = sorted(enumerate(sources), key=lambda p: (-p[1].priority, p[0]))
+    for _, src in ordered:
+        result.setdefault(src.category, []).extend(fetched.get(src.url, []))
+
+    # 重复簇大小：同一事件被几家来源报道（跨分类统计）
+    cluster_sources: Dict[str, Set[str]] = {}
+    for items in result.values():
+        for item in items:
+            cluster_sources.setdefault(cluster_key(item), set()).add(item.source)
+    cluster_sizes = {key: len(srcs) for key, srcs in cluster_sources.items()}
+
+    # 去重 → 相关度排序 → 截断
     for category in result:
         seen = set()
         deduped = []
         for item in result[category]:
-            key = item.title[:30]
+            key = cluster_key(item)
             if key not in seen:
                 seen.add(key)
                 deduped.append(item)
-        result[category] = deduped[:15]
+        ranked = rank_news(deduped, cluster_sizes)
+        result[category] = ranked[:NEWS_CATEGORY_LIMIT.get(category, NEWS_CATEGORY_LIMIT["default"])]
         logger.info(f"  → {category}: 获取 {len(result[category])} 条新闻")
 
-    # 并发补充财联社电报 & 雪球热帖
-    with ThreadPoolExecutor(max_workers=2) as ex:
-        f_cls = ex.submit(_fetch_cls_telegraph)
-        f_xq  = ex.submit(_fetch_xueqiu_hot)
-        try:
-            cls_news = f_cls.result(timeout=15)
-        except Exception:
-            cls_news = []
-        try:
-            xq_news = f_xq.result(timeout=15)
-        except Exception:
-            xq_news = []
-
-    result["A股财经"] = (cls_news + result.get("A股财经", []) + xq_news)[:20]
-
     return result
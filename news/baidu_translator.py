@@ -3,11 +3,12 @@
 """
 import hashlib
 import random
-import requests
 import logging
 import os
+from dataclasses import replace
 from typing import List
-from news.aggregator import NewsItem
+from news.models import NewsItem
+from utils.http_cache import get_http_cache
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +32,10 @@ def translate_news(items: List[NewsItem]) -> List[NewsItem]:
             if item.summary and len(item.summary) < 500:
                 summary_cn = translate_text(item.summary)
             
-            translated.append(NewsItem(
+            translated.append(replace(
+                item,
                 title=title_cn if title_cn else item.title,
-                link=item.link,
                 summary=summary_cn if summary_cn else item.summary,
-                source=item.source,
-                published=item.published,
-                category=item.category,
             ))
         except Exception as e:
             logger.debug(f"翻译失败，保持原文: {e}")
@@ -75,7 +73,9 @@ def translate_text(text: str) -> str:
             'sign': sign
         }
         
-        response = requests.get(url, params=params, timeout=5)
+        # 盐和签名每次随机，按原文缓存；接口以 200 返回的错误不缓存
+        response = get_http_cache().get(url, params=params, timeout=5, key=f"baidu-translate|{text}",
+                                        validate=lambda r: "trans_result" in r.json())
         result = response.json()
         
         if 'trans_result' in result and len(result['trans_result']) > 0:
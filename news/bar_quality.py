@@ -0,0 +1,188 @@
+"""
+news/bar_quality.py
+K 线数据质量 & 复权层 —— 对整张「日期 × 股票」面板一次向量化处理
+
+  1. 价格 ≤ 0、最高 < 最低 的 K 线置空（bad_price / bad_ohlc）
+  2. 停牌日（成交量为 0 或缺失，yfinance 会用昨收填充）置空（suspended），
+     动量 / 量比只在真实交易日上计算
+  3. 前复权：yfinance（auto_adjust=False）的 Close / Volume 已按拆股调整，只有 Adj Close 含分红，
+     因此按分红记录把除息日之前的价格整体缩放，最新价保持真实价格；
+     拆股记录一般不再重复调整，只有当天的原始缺口确实对上记录的比例（数据源漏做拆股调整）时才补做
+  4. 残余缺口：当天没有分红 / 拆股记录、单日涨跌超出涨跌幅限制（A 股，新股上市前 5 日除外）
+     或超过 45%（港美股）、且昨收 / 今收接近常见拆合股比例的，按该比例补做复权（split_gap）；
+     新股以原始数据中首根 K 线晚于面板起点 IPO_MARGIN 根以上判定，面板开头停牌（成交量为 0）的不算
+     A 股超限又对不上任何比例的视为脏数据，整只剔除（abnormal_jump）
+  5. 最后一根有效 K 线落后同市场最新 K 线超过 STALE_BARS 根的整只剔除（stale）
+
+剔除的股票整列置空，下游打分自然跳过；全部标记以 reason code 记录在 QualityReport 中
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_selectors.stock_names import get_stock_name
+from stock_selectors.universe import market_of, price_limit
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ("Open", "High", "Low", "Close")
+STALE_BARS = 3                                   # 最新有效 K 线最多落后面板几根
+FOREIGN_JUMP = 0.45                              # 无涨跌幅限制市场的可疑单日涨跌幅
+SPLIT_RATIOS = np.array([1.25, 1.5, 2, 2.5, 3, 4, 5, 10, 20])
+SPLIT_TOLERANCE = 0.06                           # 与拆合股比例的相对误差
+IPO_MARGIN = 5                                   # 首根 K 线晚于面板起点超过该根数才可能是新股
+
+# reason code
+BAD_PRICE, BAD_OHLC, SUSPENDED = "bad_price", "bad_ohlc", "suspended"
+ACTION_ADJUSTED, SPLIT_GAP, ABNORMAL_JUMP, STALE = "action_adjusted", "split_gap", "abnormal_jump", "stale"
+
+
+@dataclass
+class QualityReport:
+    flags: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["symbol", "date", "reason"]))
+    excluded: Dict[str, str] = field(default_factory=dict)      # symbol → reason
+
+    def counts(self) -> Dict[str, int]:
+        return self.flags["reason"].value_counts().to_dict()
+
+    def summary(self) -> str:
+        c = self.counts()
+        return "、".join(f"{k} {v}" for k, v in c.items()) or "无异常"
+
+
+def _flag(frames: list, mask: np.ndarray, reason: str, index: pd.Index, columns: pd.Index):
+    t, n = np.nonzero(mask)
+    if t.size:
+        frames.append(pd.DataFrame({"symbol": columns[n], "date": index[t], "reason": reason}))
+
+
+def _reverse_cumprod_after(f: np.ndarray) -> np.ndarray:
+    """out[t] = ∏_{u>t} f[u]：除权日之前的每一天都要乘上之后全部事件的因子"""
+    after = np.ones_like(f)
+    after[:-1] = np.cumprod(f[::-1], axis=0)[::-1][1:]
+    return after
+
+
+def _prev_valid(c: np.ndarray) -> np.ndarray:
+    """每个位置的前一个有效收盘价"""
+    return pd.DataFrame(c).ffill().shift(1).to_numpy()
+
+
+def clean_bars(bars: Dict[str, pd.DataFrame], exclude: bool = True) -> Tuple[Dict[str, pd.DataFrame], QualityReport]:
+    """
+    bars: news/bars.py 的原始面板（可含 Dividends / Stock Splits）→ (复权 + 清洗后的面板, 报告)
+    exclude=False 时只置空坏 K 线并复权，不整列剔除（stale / abnormal_jump 依赖整个面板，回测算收益时会引入未来信息）
+    """
+    if "Close" not in bars or bars["Close"].empty:
+        return bars, QualityReport()
+    index, columns = bars["Close"].index, bars["Close"].columns
+    px = {f: bars[f].to_numpy(dtype=float, copy=True) for f in PRICE_FIELDS if f in bars}
+    vol = bars["Volume"].to_numpy(dtype=float, copy=True) if "Volume" in bars else np.ones_like(px["Close"])
+    div = bars["Dividends"].to_numpy(dtype=float) if "Dividends" in bars else None
+    split = bars["Stock Splits"].to_numpy(dtype=float) if "Stock Splits" in bars else None
+    c = px["Close"]
+    frames: list = []
+    # 置空停牌 / 坏 K 线之前的原始有效性：停牌日 yfinance 仍给出收盘价，据此区分「停牌」与「尚未上市」
+    listed = np.isfinite(c)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # ── 1. 非法价格 ─────────────────────────────
+        bad = np.zeros(c.shape, dtype=bool)
+        for a in px.values():
+            bad |= a <= 0
+        _flag(frames, bad, BAD_PRICE, index, columns)
+        bad_hl = np.zeros_like(bad)
+        if "High" in px and "Low" in px:
+            bad_hl = ~bad & (px["High"] < px["Low"])
+        _flag(frames, bad_hl, BAD_OHLC, index, columns)
+
+        # ── 2. 停牌日 ───────────────────────────────
+        suspended = np.isfinite(c) & ~(vol > 0)
+        _flag(frames, suspended & ~bad & ~bad_hl, SUSPENDED, index, columns)
+        drop = bad | bad_hl | suspended | ~np.isfinite(c)
+        for a in px.values():
+            a[drop] = np.nan
+        vol[drop] = np.nan
+
+        # ── 3. 分红前复权（价格已按拆股调整，拆股记录只用于第 4 步）──
+        prev = _prev_valid(c)
+        f_px = np.ones_like(c)
+        f_vol = np.ones_like(c)
+        action = np.zeros(c.shape, dtype=bool)
+        if split is not None:
+            s = np.where(np.isfinite(split) & (split > 0), split, 1.0)
+            action |= s != 1
+            # 拆股日的原始缺口与记录比例一致 → 数据源没做拆股调整，按记录比例补做
+            unadjusted = (s != 1) & (np.abs(prev / c / s - 1) < SPLIT_TOLERANCE)
+            f_px /= np.where(unadjusted, s, 1.0)
+            f_vol *= np.where(unadjusted, s, 1.0)
+        if div is not None:
+            d = np.where(np.isfinite(div) & (div > 0) & (prev > 0), div / prev, 0.0)
+            f_px *= 1 - np.clip(d, 0, 0.9)
+            action |= d > 0
+        _flag(frames, (f_px != 1) & np.isfinite(c), ACTION_ADJUSTED, index, columns)
+
+        # ── 4. 残余缺口 ─────────────────────────────
+        ret = np.where(action, 0.0, c / prev - 1)         # 已有公司行为记录的当天不再判断
+        names = [get_stock_name(str(s).split(".")[0]) for s in columns]
+        market = [market_of(str(s)) for s in columns]
+        a_share = np.array([m == "CN" for m in market])
+        limit = np.array([price_limit(str(s), n) for s, n in zip(columns, names)])
+        threshold = np.where(a_share, limit + 0.02, FOREIGN_JUMP)
+        # 新股上市前 5 个交易日不设涨跌幅限制
+        first = np.where(listed.any(axis=0), np.argmax(listed, axis=0), 0)
+        ipo = (first > IPO_MARGIN) & (np.cumsum(listed, axis=0) <= 5)
+        jump = np.isfinite(ret) & (np.abs(ret) > threshold) & ~(ipo & a_share)
+
+        ratio = prev / c                                   # 拆股：昨收 / 今收 ≈ r；合股：≈ 1/r
+        cand = np.concatenate([SPLIT_RATIOS, 1 / SPLIT_RATIOS])
+        err = np.abs(ratio[..., None] / cand - 1)
+        best = np.argmin(np.nan_to_num(err, nan=np.inf), axis=-1)
+        matched = jump & (np.take_along_axis(err, best[..., None], axis=-1)[..., 0] < SPLIT_TOLERANCE)
+        gap_r = np.where(matched, cand[best], 1.0)
+        f_px /= gap_r
+        f_vol *= gap_r
+        _flag(frames, matched, SPLIT_GAP, index, columns)
+        abnormal = jump & ~matched & a_share
+        _flag(frames, abnormal, ABNORMAL_JUMP, index, columns)
+
+        adj_px = _reverse_cumprod_after(f_px)
+        adj_vol = _reverse_cumprod_after(f_vol)
+        for a in px.values():
+            a *= adj_px
+        vol *= adj_vol
+
+        # ── 5. 最新 K 线过旧 ─────────────────────────
+        # 按市场比较，避免 A 股长假期间被港美股的新 K 线判为过旧
+        valid = np.isfinite(c)
+        last = np.where(valid.any(axis=0), len(c) - 1 - np.argmax(valid[::-1], axis=0), -1)
+        market_last = pd.Series(last).groupby(pd.Series(market)).transform("max").to_numpy()
+        stale = (last >= 0) & (last < market_last - STALE_BARS)
+
+    excluded: Dict[str, str] = {}
+    if not exclude:
+        stale = np.zeros_like(stale)
+        abnormal = np.zeros_like(abnormal)
+    for j in np.flatnonzero(stale):
+        excluded[columns[j]] = STALE
+    for j in np.flatnonzero(abnormal.any(axis=0)):
+        excluded[columns[j]] = ABNORMAL_JUMP
+    if stale.any():
+        frames.append(pd.DataFrame({"symbol": columns[stale], "date": index[np.maximum(last[stale], 0)], "reason": STALE}))
+    ex = np.array([s in excluded for s in columns])
+    for a in px.values():
+        a[:, ex] = np.nan
+    vol[:, ex] = np.nan
+
+    out = {f: pd.DataFrame(a, index=index, columns=columns) for f, a in px.items()}
+    out["Volume"] = pd.DataFrame(vol, index=index, columns=columns)
+    report = QualityReport(
+        flags=pd.concat(frames, ignore_index=True) if frames else QualityReport().flags,
+        excluded=excluded,
+    )
+    if frames:
+        logger.info(f"K线质量：{report.summary()}；剔除 {len(excluded)}/{len(columns)} 支")
+    return out, report
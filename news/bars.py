@@ -0,0 +1,128 @@
+"""
+news/bars.py
+日线 K 线面板缓存 —— 全市场一次批量下载，按「日期 × 股票」宽表存放
+
+  · load_bars(symbols) 返回 {"Open"/"High"/"Low"/"Close"/"Volume": DataFrame}
+  · 缓存在 CACHE_DIR/bars_panel.pkl，BARS_TTL_MINUTES 内复用；
+    新增股票只补下载缺的那部分，再合并回面板
+  · 缓存的是未复权行情 + 分红 / 拆股记录；load_bars 返回前经 news/bar_quality.py
+    统一做前复权、停牌屏蔽和异常剔除
+  · 线程安全：多个市场并发选股时，缓存的读 / 合并 / 写在锁内完成（写入先落临时文件再替换），
+    yfinance 的批量下载内部共享全局状态，同一时刻只允许一个 download
+  · 面板混有 A 股 / 港股 / 美股时交易日不同，返回前去掉所请求股票全部无数据的日期
+  · offline=True 时只读缓存（忽略有效期、不补下载），供 CLI 离线重算 / 回测使用
+"""
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from config import CACHE_DIR, BARS_PERIOD, BARS_TTL_MINUTES
+from news.bar_quality import QualityReport, clean_bars
+
+logger = logging.getLogger(__name__)
+
+try:
+    import yfinance as yf
+    YF_OK = True
+except ImportError:
+    YF_OK = False
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits")
+CACHE_PATH = os.path.join(CACHE_DIR, "bars_panel.pkl")
+CACHE_VERSION = 2       # 2：改存未复权行情 + 公司行为
+
+_cache_lock = threading.Lock()
+_download_lock = threading.Lock()
+
+
+def _download(symbols: List[str], period: str) -> Optional[Dict[str, pd.DataFrame]]:
+    if not YF_OK or not symbols:
+        return None
+    try:
+        with _download_lock:
+            raw = yf.download(
+                symbols, period=period, interval="1d",
+                auto_adjust=False, actions=True, progress=False, threads=True,
+            )
+    except Exception as e:
+        logger.warning(f"K线批量下载失败: {e}")
+        return None
+    if raw is None or raw.empty:
+        return None
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # 单只股票时 yfinance 返回单层列
+        raw.columns = pd.MultiIndex.from_product([raw.columns, symbols[:1]])
+    return {f: raw[f] for f in FIELDS if f in raw.columns.get_level_values(0)}
+
+
+def _read_cache(period: str, ttl_minutes: float) -> Optional[dict]:
+    try:
+        cache = pd.read_pickle(CACHE_PATH)
+    except Exception:
+        return None
+    if cache.get("version") != CACHE_VERSION or cache.get("period") != period \
+            or time.time() - cache.get("ts", 0) > ttl_minutes * 60:
+        return None
+    return cache
+
+
+def _write_cache(cache: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{CACHE_PATH}.{threading.get_ident()}.tmp"
+    pd.to_pickle(cache, tmp)
+    os.replace(tmp, CACHE_PATH)
+
+
+def _new_cache(period: str) -> dict:
+    return {"version": CACHE_VERSION, "period": period, "ts": time.time(), "panel": {}}
+
+
+def load_raw_bars(symbols: List[str], period: str = BARS_PERIOD, ttl_minutes: float = BARS_TTL_MINUTES,
+                  offline: bool = False) -> Dict[str, pd.DataFrame]:
+    """未复权宽表（含 Dividends / Stock Splits），按 symbols 顺序排列；取不到数据的股票整列为 NaN"""
+    if offline:
+        ttl_minutes = math.inf
+    with _cache_lock:
+        cache = _read_cache(period, ttl_minutes) or _new_cache(period)
+    panel = cache["panel"]
+    have = set(panel["Close"].columns) if "Close" in panel else set()
+    missing = [s for s in dict.fromkeys(symbols) if s not in have]
+
+    if missing and offline:
+        logger.info(f"K线缓存（离线）：{len(symbols) - len(missing)} 支命中，{len(missing)} 支无缓存")
+    elif missing:
+        logger.info(f"K线缓存：{len(symbols) - len(missing)} 支命中，批量下载 {len(missing)} 支...")
+        new = _download(missing, period)
+        if new:
+            with _cache_lock:
+                # 下载期间其他线程可能已写入缓存，重新读取后再合并
+                cache = _read_cache(period, ttl_minutes) or _new_cache(period)
+                panel = cache["panel"]
+                for f, df in new.items():
+                    if f in panel:
+                        df = df.drop(columns=[c for c in df.columns if c in panel[f].columns])
+                        df = pd.concat([panel[f], df], axis=1).sort_index()
+                    panel[f] = df
+                _write_cache(cache)
+
+    out = {f: panel[f].reindex(columns=symbols) for f in FIELDS if f in panel}
+    if "Close" in out:
+        rows = out["Close"].notna().any(axis=1).to_numpy()
+        out = {f: df[rows] for f, df in out.items()}
+    return out
+
+
+def load_checked_bars(symbols: List[str], period: str = BARS_PERIOD, ttl_minutes: float = BARS_TTL_MINUTES,
+                      offline: bool = False) -> Tuple[Dict[str, pd.DataFrame], QualityReport]:
+    """复权 + 清洗后的宽表（OHLCV），以及数据质量报告"""
+    return clean_bars(load_raw_bars(symbols, period, ttl_minutes, offline))
+
+
+def load_bars(symbols: List[str], period: str = BARS_PERIOD, ttl_minutes: float = BARS_TTL_MINUTES) -> Dict[str, pd.DataFrame]:
+    """复权 + 清洗后的宽表（OHLCV），按 symbols 顺序排列；取不到数据或被剔除的股票整列为 NaN"""
+    return load_checked_bars(symbols, period, ttl_minutes)[0]
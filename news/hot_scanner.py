@@ -0,0 +1,78 @@
+"""
+news/hot_scanner.py
+热门股扫描 —— 基于 K 线面板缓存，对全市场一次向量化计算：
+
+  · 当日涨跌幅、真实量比（当日量 / 前 5 日均量）
+  · 涨跌停判定：按板块区分涨跌幅限制（主板 10%、创业板/科创板 20%、北交所 30%、ST 5%）
+  · 跳空缺口：开盘相对昨收的缺口幅度，以及缺口是否当日回补
+  · Top-K 用 argpartition 选出，只对 K 个结果排序
+"""
+import logging
+from typing import List
+
+import numpy as np
+
+from config import HOT_MIN_CHANGE
+from news.bars import load_bars
+from news.models import StockHotInfo
+from stock_selectors.stock_names import get_stock_name
+from stock_selectors.universe import clean_code, price_limit
+
+logger = logging.getLogger(__name__)
+
+
+def scan_hot_stocks(symbols: List[str], top_n: int = 8, min_change: float = HOT_MIN_CHANGE) -> List[StockHotInfo]:
+    bars = load_bars(symbols)
+    if "Close" not in bars or len(bars["Close"]) < 2:
+        return []
+    syms = list(bars["Close"].columns)
+    c = bars["Close"].to_numpy(dtype=float)
+    o = bars["Open"].to_numpy(dtype=float)
+    h = bars["High"].to_numpy(dtype=float)
+    l = bars["Low"].to_numpy(dtype=float)
+    v = bars["Volume"].to_numpy(dtype=float)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        prev = c[-2]
+        chg = (c[-1] - prev) / prev * 100
+        avg5 = np.nanmean(v[-6:-1], axis=0) if len(v) >= 6 else np.full(len(syms), np.nan)
+        vr = np.where(avg5 > 0, v[-1] / avg5, np.nan)
+
+        names = [get_stock_name(s) for s in syms]
+        limit = np.array([price_limit(s, n) for s, n in zip(syms, names)])
+        # 交易所按昨收 × (1 ± 限幅) 四舍五入到分
+        up_px = np.round(prev * (1 + limit), 2)
+        dn_px = np.round(prev * (1 - limit), 2)
+        limit_up = c[-1] >= up_px - 0.005
+        limit_dn = c[-1] <= dn_px + 0.005
+
+        gap = (o[-1] - prev) / prev * 100
+        gap_up = o[-1] > h[-2]
+        gap_dn = o[-1] < l[-2]
+        gap_filled = np.where(gap_up, l[-1] <= h[-2], np.where(gap_dn, h[-1] >= l[-2], False))
+
+    valid = np.isfinite(chg) & (chg >= min_change) & ~limit_dn
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return []
+    # 涨停优先，其次涨幅、量比
+    key = chg[idx] + limit_up[idx] * 1000 + np.nan_to_num(vr[idx]) * 1e-3
+    k = min(top_n, idx.size)
+    part = np.argpartition(-key, k - 1)[:k]
+    top = idx[part[np.argsort(-key[part])]]
+
+    result = []
+    for i in top:
+        result.append(StockHotInfo(
+            code=clean_code(syms[i]),
+            name=names[i],
+            price=round(float(c[-1, i]), 2),
+            change_pct=round(float(chg[i]), 2),
+            volume_ratio=round(float(vr[i]), 2) if np.isfinite(vr[i]) else 1.0,
+            limit_status="涨停" if limit_up[i] else "",
+            gap_pct=round(float(gap[i]), 2) if np.isfinite(gap[i]) else 0.0,
+            gap_filled=bool(gap_filled[i]),
+        ))
+    n_up, n_dn = int(np.nansum(limit_up)), int(np.nansum(limit_dn))
+    logger.info(f"热股扫描：{len(syms)} 支，涨停 {n_up} / 跌停 {n_dn}，入选 {len(result)} 支")
+    return result
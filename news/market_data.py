@@ -10,10 +10,11 @@ news/market_data.py
 """
 
 import logging
-from dataclasses import dataclass
 from datetime import date, timedelta
 from typing import Dict, List, Optional, Any
 
+from news.models import IndexSnapshot, SectorInfo, StockHotInfo
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -24,36 +25,6 @@ except ImportError:
     logger.error("yfinance 未安装！请 pip install yfinance")
 
 
-# ──────────────────────────────────────────────────────────────
-
-@dataclass
-class IndexSnapshot:
-    name: str
-    price: float
-    change_pct: float
-    prev_close: float = 0.0
-
-
-@dataclass
-class SectorInfo:
-    name: str
-    change_pct: float
-    etf_code: str = ""
-    hot_reason: str = ""
-    leading_stock: str = ""
-
-
-@dataclass
-class StockHotInfo:
-    code: str
-    name: str
-    price: float
-    change_pct: float
-    volume_ratio: float = 1.0
-    turnover: float = 0.0
-    pe: float = 0.0
-
-
 # ──────────────────────────────────────────────────────────────
 # 指数代码映射
 # ──────────────────────────────────────────────────────────────
@@ -4,8 +4,14 @@ news/market_hot.py
 """
 
 import logging
-from dataclasses import dataclass
-from typing import Dict, List, Any
+from typing import Any, Dict, List, Optional, Tuple
+
+from news.hot_scanner import scan_hot_stocks
+from news.models import IndexSnapshot, SectorInfo, StockHotInfo
+from news.north_flow import ingest_drops, market_flow_summary
+from news.sector_engine import sector_board
+from stock_selectors.universe import default_universe, to_yf_code
+from utils.http_cache import get_http_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,45 +23,6 @@ except ImportError:
     logger.error("yfinance 未安装！")
 
 
-@dataclass
-class IndexSnapshot:
-    name: str
-    price: float
-    change_pct: float
-    prev_close: float = 0.0
-
-
-@dataclass
-class SectorInfo:
-    name: str
-    change_pct: float
-    etf_code: str = ""
-    hot_reason: str = ""
-
-
-@dataclass
-class StockHotInfo:
-    code: str
-    name: str
-    price: float
-    change_pct: float
-    volume_ratio: float = 1.0
-
-
-# 股票代码到名称的映射
-STOCK_NAME_MAP = {
-    "600519": "贵州茅台", "000858": "五粮液", "300750": "宁德时代",
-    "601318": "中国平安", "600036": "招商银行", "000001": "平安银行",
-    "600276": "恒瑞医药", "000333": "美的集团", "002594": "比亚迪",
-    "688981": "中芯国际", "002475": "立讯精密", "601012": "隆基绿能",
-    "600900": "长江电力", "688111": "金山办公", "601888": "中国中免",
-    "300015": "爱尔眼科", "603288": "海天味业", "002460": "赣锋锂业",
-    "000651": "格力电器", "601166": "兴业银行", "300760": "迈瑞医疗",
-    "600031": "三一重工", "002714": "牧原股份", "600309": "万华化学",
-    "002049": "紫光股份", "600887": "伊利股份", "002858": "路畅科技",
-    "300144": "宋城演艺", "601939": "建设银行", "000002": "万科A",
-}
-
 INDEX_MAP = {
     "上证指数": "000001.SS", "深证成指": "399001.SZ", "创业板指": "399006.SZ",
     "沪深300": "000300.SS", "科创50": "000688.SS", "恒生指数": "^HSI",
@@ -70,6 +37,16 @@ SECTOR_ETF_MAP = {
 }
 
 
+def _quote(code: str, ticker=None) -> Optional[Tuple[float, float]]:
+    """(最新价, 昨收)，经 HTTP 缓存（yfinance 按调用缓存）；没有最新价时返回 None，不缓存"""
+    def fetch():
+        fi = (ticker or yf.Ticker(code)).fast_info
+        if not fi.last_price:
+            return None
+        return float(fi.last_price), float(fi.previous_close or 0)
+    return get_http_cache().call(f"yf-quote|{code}", fetch)
+
+
 def fetch_market_overview() -> Dict[str, IndexSnapshot]:
     """拉取全球主要指数快照"""
     result: Dict[str, IndexSnapshot] = {}
@@ -80,10 +57,13 @@ def fetch_market_overview() -> Dict[str, IndexSnapshot]:
         tickers_obj = yf.Tickers(" ".join(tickers))
         for name, code in INDEX_MAP.items():
             try:
-                t = tickers_obj.tickers[code]
-                fi = t.fast_info
-                price = round(fi.last_price or 0, 2)
-                prev = round(fi.previous_close or price, 2)
+                q = _quote(code, tickers_obj.tickers[code])
+                if q is None:
+                    logger.debug(f"指数 {name}({code}) 无行情")
+                    continue
+                last, prev_close = q
+                price = round(last, 2)
+                prev = round(prev_close or price, 2)
                 chg = round((price - prev) / prev * 100, 2) if prev else 0.0
                 result[name] = IndexSnapshot(
                     name=name, price=price, change_pct=chg, prev_close=prev
@@ -98,16 +78,32 @@ def fetch_market_overview() -> Dict[str, IndexSnapshot]:
 
 
 def fetch_hot_sectors(top_n: int = 6) -> List[SectorInfo]:
+    """热门板块：优先用成分股聚合（板块引擎），失败时退回行业 ETF 代理"""
+    try:
+        board = sector_board()
+    except Exception as e:
+        logger.warning(f"板块引擎失败，改用 ETF 代理: {e}")
+        board = []
+    if board:
+        top = board[:top_n]
+        logger.info(f"热门板块: {[f'{s.name}({s.change_pct:+.2f}%)' for s in top]}")
+        return top
+    return _fetch_etf_sectors(top_n)
+
+
+def _fetch_etf_sectors(top_n: int = 6) -> List[SectorInfo]:
     """用行业 ETF 涨跌幅代理热门板块"""
     sectors: List[SectorInfo] = []
     logger.info(f"拉取行业 ETF 涨跌幅（{len(SECTOR_ETF_MAP)} 个）...")
     
     for sector_name, etf_code in SECTOR_ETF_MAP.items():
         try:
-            t = yf.Ticker(etf_code)
-            fi = t.fast_info
-            price = fi.last_price or 0
-            prev = fi.previous_close or price
+            q = _quote(etf_code)
+            if q is None:
+                logger.debug(f"ETF {etf_code} 无行情")
+                continue
+            price, prev = q
+            prev = prev or price
             chg = round((price - prev) / prev * 100, 2) if prev else 0.0
             sectors.append(SectorInfo(
                 name=sector_name,
@@ -125,65 +121,28 @@ def fetch_hot_sectors(top_n: int = 6) -> List[SectorInfo]:
 
 
 def fetch_hot_stocks(stock_pool: List[str], top_n: int = 8) -> List[StockHotInfo]:
-    """从监控池中筛选今日涨幅最高的股票"""
-    def to_yf(code: str) -> str:
-        if "." in code:
-            return code
-        return f"{code}.SS" if code.startswith("6") or code.startswith("9") else f"{code}.SZ"
-    
-    def get_stock_name(code: str) -> str:
-        """获取股票名称"""
-        clean_code = code.split(".")[0]
-        return STOCK_NAME_MAP.get(clean_code, clean_code)
-    
-    yf_codes = [to_yf(c) for c in stock_pool[:80]]
-    hot: List[StockHotInfo] = []
-    
-    logger.info(f"拉取股票池行情（{len(yf_codes)} 支）...")
+    """全市场（行业映射覆盖的股票 + 监控池）热门股扫描，见 news/hot_scanner.py"""
+    symbols = list(dict.fromkeys(default_universe() + [to_yf_code(c) for c in stock_pool]))
+    logger.info(f"拉取股票池行情（{len(symbols)} 支）...")
     try:
-        raw = yf.download(
-            yf_codes, period="2d", interval="1d",
-            auto_adjust=True, progress=False, threads=True,
-        )
-        close_df = raw["Close"] if "Close" in raw else None
-        if close_df is None:
-            raise ValueError("无法获取收盘价数据")
-        
-        for yf_code, cn_code in zip(yf_codes, stock_pool[:80]):
-            try:
-                series = close_df[yf_code].dropna()
-                if len(series) < 2:
-                    continue
-                prev_close = float(series.iloc[-2])
-                today_close = float(series.iloc[-1])
-                if prev_close == 0:
-                    continue
-                chg = round((today_close - prev_close) / prev_close * 100, 2)
-                
-                clean_code = cn_code.split(".")[0]
-                name = get_stock_name(clean_code)
-                
-                hot.append(StockHotInfo(
-                    code=clean_code,
-                    name=name,
-                    price=round(today_close, 2),
-                    change_pct=chg,
-                    volume_ratio=1.0,
-                ))
-            except Exception:
-                continue
-    
+        result = scan_hot_stocks(symbols, top_n=top_n)
     except Exception as e:
-        logger.warning(f"股票批量获取失败: {e}")
-    
-    hot.sort(key=lambda x: x.change_pct, reverse=True)
-    result = [s for s in hot if 2 <= s.change_pct <= 19.9][:top_n]
+        logger.warning(f"热门股扫描失败: {e}")
+        result = []
     logger.info(f"热门股票 Top-{len(result)}: {[f'{s.name}({s.change_pct:+.2f}%)' for s in result]}")
     return result
 
 
 def fetch_north_fund_flow() -> Dict[str, Any]:
-    """获取北向资金流向数据（模拟）"""
+    """获取北向资金流向数据（来自本地北向持股库，无数据时返回 0）"""
+    try:
+        ingest_drops()
+        summary = market_flow_summary()
+        if summary:
+            logger.info(f"北向资金: 当日 {summary['today_net']:+.2f} 亿，近5日 {summary['week_net']:+.2f} 亿")
+            return summary
+    except Exception as e:
+        logger.warning(f"北向资金本地库读取失败: {e}")
     logger.warning("北向资金数据暂不可用,返回模拟数据")
     return {
         "today_net": 0.0,
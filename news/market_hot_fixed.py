@@ -4,9 +4,10 @@ news/market_hot.py
 """
 
 import logging
-from dataclasses import dataclass
 from typing import Dict, List, Any
 
+from news.models import IndexSnapshot, SectorInfo, StockHotInfo
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -17,31 +18,6 @@ except ImportError:
     logger.error("yfinance 未安装！")
 
 
-@dataclass
-class IndexSnapshot:
-    name: str
-    price: float
-    change_pct: float
-    prev_close: float = 0.0
-
-
-@dataclass
-class SectorInfo:
-    name: str
-    change_pct: float
-    etf_code: str = ""
-    hot_reason: str = ""
-
-
-@dataclass
-class StockHotInfo:
-    code: str
-    name: str
-    price: float
-    change_pct: float
-    volume_ratio: float = 1.0
-
-
 # 股票代码到名称的映射
 STOCK_NAME_MAP = {
     "600519": "贵州茅台", "000858": "五粮液", "300750": "宁德时代",
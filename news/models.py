@@ -0,0 +1,51 @@
+"""
+news/models.py
+新闻 / 行情数据结构（全项目唯一定义，其余模块从这里导入）
+
+均为 slots dataclass：不带 __dict__，全市场上千条记录时内存和 GC 开销更小
+"""
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass(slots=True)
+class NewsItem:
+    title: str
+    link: str
+    summary: str = ""
+    source: str = ""
+    published: str = ""                                 # "%m-%d %H:%M"（UTC）
+    category: str = ""
+    tickers: List[str] = field(default_factory=list)   # 提及的股票代码（news/ranking.py 写入）
+    score: float = 0.0                                  # 相关度得分
+
+
+@dataclass(slots=True)
+class IndexSnapshot:
+    name: str
+    price: float
+    change_pct: float
+    prev_close: float = 0.0
+
+
+@dataclass(slots=True)
+class SectorInfo:
+    name: str
+    change_pct: float
+    etf_code: str = ""
+    hot_reason: str = ""
+    leading_stock: str = ""
+    advancers: int = 0
+    decliners: int = 0
+
+
+@dataclass(slots=True)
+class StockHotInfo:
+    code: str
+    name: str
+    price: float
+    change_pct: float
+    volume_ratio: float = 1.0
+    limit_status: str = ""      # "涨停" / ""
+    gap_pct: float = 0.0        # 开盘跳空幅度 %
+    gap_filled: bool = False    # 缺口当日是否回补
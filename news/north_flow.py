@@ -0,0 +1,159 @@
+"""
+news/north_flow.py
+北向资金（沪深港通）持股数据 —— 完全离线
+
+  · 导入：扫描投放目录中的 CSV / Parquet 文件（每行：日期、代码、持股数量、收盘价），
+    增量写入 CACHE_DIR 下的 SQLite 本地库（(code, date) 主键索引）
+  · 计算：按「日期 × 股票」透视后整体向量化计算净流入，
+    生成全市场北向资金汇总 & 每只股票的 north_flow 因子
+"""
+
+import glob
+import logging
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR, NORTH_FLOW_DROP_DIR
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(CACHE_DIR, "north_flow.db")
+
+# 投放文件表头 → 标准列名（兼容港交所/东财导出的中文表头）
+COLUMN_ALIASES = {
+    "date": "date", "日期": "date", "持股日期": "date", "trade_date": "date",
+    "code": "code", "代码": "code", "股票代码": "code", "symbol": "code",
+    "shares": "shares", "持股数量": "shares", "持股数": "shares", "hold_shares": "shares",
+    "close": "close", "收盘价": "close", "当日收盘价": "close",
+}
+
+FLOW_WINDOW = 5       # 个股因子：近 5 日净流入
+
+
+def _connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS holdings (
+            code   TEXT NOT NULL,
+            date   TEXT NOT NULL,
+            shares REAL NOT NULL,
+            close  REAL,
+            PRIMARY KEY (code, date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_holdings_date ON holdings(date);
+        CREATE TABLE IF NOT EXISTS ingested (
+            path  TEXT PRIMARY KEY,
+            mtime REAL NOT NULL
+        );
+    """)
+    return conn
+
+
+def _read_drop(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, dtype=str)
+    df = df.rename(columns={c: COLUMN_ALIASES[c] for c in df.columns if c in COLUMN_ALIASES})
+    missing = {"date", "code", "shares"} - set(df.columns)
+    if missing:
+        raise ValueError(f"缺少列 {sorted(missing)}")
+    if "close" not in df.columns:
+        df["close"] = np.nan
+    df = df[["code", "date", "shares", "close"]].copy()
+    # 代码统一为 6 位纯数字（去掉 .SS/.SZ 后缀、补零）
+    df["code"] = df["code"].astype(str).str.split(".").str[0].str.zfill(6)
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    df["shares"] = pd.to_numeric(df["shares"], errors="coerce")
+    df["close"] = pd.to_numeric(df["close"], errors="coerce")
+    return df.dropna(subset=["shares"])
+
+
+def ingest_drops(drop_dir: str = NORTH_FLOW_DROP_DIR, db_path: str = DB_PATH) -> int:
+    """把投放目录里新增 / 更新过的文件导入本地库，返回导入行数"""
+    files = sorted(glob.glob(os.path.join(drop_dir, "*.csv")) + glob.glob(os.path.join(drop_dir, "*.parquet")))
+    if not files:
+        return 0
+    rows = 0
+    with _connect(db_path) as conn:
+        done = dict(conn.execute("SELECT path, mtime FROM ingested"))
+        for path in files:
+            mtime = os.path.getmtime(path)
+            if done.get(path) == mtime:
+                continue
+            try:
+                df = _read_drop(path)
+            except Exception as e:
+                logger.warning(f"北向持股文件导入失败 [{path}]: {e}")
+                continue
+            conn.executemany(
+                "INSERT OR REPLACE INTO holdings(code, date, shares, close) VALUES (?, ?, ?, ?)",
+                df.itertuples(index=False, name=None),
+            )
+            conn.execute("INSERT OR REPLACE INTO ingested(path, mtime) VALUES (?, ?)", (path, mtime))
+            rows += len(df)
+    if rows:
+        logger.info(f"北向持股导入 {rows} 行")
+    return rows
+
+
+def _load_panel(days: int, codes: Optional[List[str]] = None, db_path: str = DB_PATH):
+    """读取最近 days+1 个交易日的持股 & 收盘价，透视为 日期 × 代码 两张表"""
+    if not os.path.exists(db_path):
+        return None, None
+    with _connect(db_path) as conn:
+        dates = [r[0] for r in conn.execute(
+            "SELECT DISTINCT date FROM holdings ORDER BY date DESC LIMIT ?", (days + 1,))]
+        if len(dates) < 2:
+            return None, None
+        df = pd.read_sql_query(
+            "SELECT code, date, shares, close FROM holdings WHERE date >= ?", conn, params=(dates[-1],))
+    if codes is not None:
+        df = df[df["code"].isin(codes)]
+    shares = df.pivot(index="date", columns="code", values="shares").sort_index()
+    close = df.pivot(index="date", columns="code", values="close").sort_index()
+    return shares, close
+
+
+def _net_flow(shares: pd.DataFrame, close: pd.DataFrame) -> pd.DataFrame:
+    """逐日净流入金额（元）= 持股变动 × 当日收盘价"""
+    px = close.ffill()
+    return shares.diff() * px
+
+
+def market_flow_summary(db_path: str = DB_PATH) -> Optional[Dict[str, float]]:
+    """全市场北向净流入（亿元）：当日 / 近 5 日 / 近 20 日"""
+    shares, close = _load_panel(20, db_path=db_path)
+    if shares is None:
+        return None
+    daily = _net_flow(shares, close).sum(axis=1, min_count=1).dropna() / 1e8
+    if daily.empty:
+        return None
+    return {
+        "today_net": round(float(daily.iloc[-1]), 2),
+        "week_net": round(float(daily.iloc[-5:].sum()), 2),
+        "month_net": round(float(daily.iloc[-20:].sum()), 2),
+        "as_of": str(daily.index[-1]),
+    }
+
+
+def north_flow_scores(codes: List[str], window: int = FLOW_WINDOW, db_path: str = DB_PATH) -> Dict[str, float]:
+    """
+    个股北向因子（0~1）：近 window 日净流入占持股市值的比例，在全池内做百分位排名
+    没有数据的股票不返回，调用方按中性 0.5 处理
+    """
+    clean = [c.split(".")[0] for c in codes]
+    shares, close = _load_panel(window, clean, db_path)
+    if shares is None or shares.empty:
+        return {}
+    flow = _net_flow(shares, close).iloc[-window:].sum(min_count=1)
+    hold_value = (shares.iloc[-1] * close.ffill().iloc[-1]).replace(0, np.nan)
+    ratio = (flow / hold_value).dropna()
+    if ratio.empty:
+        return {}
+    return ratio.rank(pct=True).round(4).to_dict()
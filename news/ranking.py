@@ -0,0 +1,163 @@
+"""
+news/ranking.py
+新闻相关度排序
+
+  · 股票 / 行业提及：用 stock_names.json 的名称 + 代码、行业名构建 Aho-Corasick 自动机，
+    一次扫描标题 + 摘要即可找出全部命中，耗时与文本长度线性相关、与词表大小无关
+  · 综合得分 = 时效衰减 + 来源权重 + 重复簇大小（多家报道）+ 个股 / 行业提及
+  · 命中的股票代码写回 NewsItem.tickers，可供选股使用
+"""
+import math
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import NEWS_RANK_WEIGHTS, NEWS_SOURCE_WEIGHTS, NEWS_HALF_LIFE_HOURS
+from news.models import NewsItem
+from stock_selectors.industry import STOCK_INDUSTRY
+from stock_selectors.stock_names import STOCK_NAMES
+
+
+class AhoCorasick:
+    """多模式串匹配自动机：patterns 为 {模式串: 载荷}"""
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[str, str]]] = [[]]
+        for pat, payload in patterns.items():
+            if pat:
+                self._add(pat.lower(), payload)
+        self._build()
+
+    def _add(self, pat: str, payload: str):
+        node = 0
+        for ch in pat:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((pat, payload))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text: str) -> Iterable[Tuple[int, str, str]]:
+        """产出 (结束位置, 模式串, 载荷)"""
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text.lower()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pat, payload in out[node]:
+                yield i, pat, payload
+
+
+class MentionMatcher:
+    """个股（名称 / 6 位代码）与行业名的提及识别"""
+
+    def __init__(self, names: Optional[Dict[str, str]] = None, industries: Optional[Dict[str, str]] = None):
+        names = STOCK_NAMES if names is None else names
+        industries = STOCK_INDUSTRY if industries is None else industries
+        patterns = {}
+        for code, name in names.items():
+            patterns[name] = "S:" + code
+            patterns[code] = "S:" + code
+        for ind in set(industries.values()):
+            patterns.setdefault(ind, "I:" + ind)
+        self.ac = AhoCorasick(patterns)
+
+    def find(self, text: str) -> Tuple[List[str], Set[str]]:
+        """返回 (股票代码列表（按首次出现顺序）, 行业集合)"""
+        tickers: Dict[str, None] = {}
+        sectors: Set[str] = set()
+        for end, pat, payload in self.ac.iter(text):
+            if pat.isdigit():
+                # 代码两侧不能紧挨数字，避免把 "2600519" 之类误判
+                start = end - len(pat) + 1
+                if (start > 0 and text[start - 1].isdigit()) or (end + 1 < len(text) and text[end + 1].isdigit()):
+                    continue
+            kind, key = payload.split(":", 1)
+            if kind == "S":
+                tickers.setdefault(key, None)
+            else:
+                sectors.add(key)
+        return list(tickers), sectors
+
+
+_matcher: Optional[MentionMatcher] = None
+
+
+def get_matcher() -> MentionMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = MentionMatcher()
+    return _matcher
+
+
+_PUNCT_RE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def cluster_key(item: NewsItem) -> str:
+    """去掉空白标点后的标题前 30 字，用于判定「同一事件」"""
+    return _PUNCT_RE.sub("", item.title.lower())[:30]
+
+
+def published_at(published: str, now: datetime) -> Optional[datetime]:
+    """
+    published 形如 "03-18 09:30"（UTC，无年份），补全为不晚于 now 的 UTC 时间；解析失败返回 None
+    now 为带时区的时间（naive 按本机时区解释）
+    """
+    if not published:
+        return None
+    now = now.astimezone(timezone.utc)
+    try:
+        t = datetime.strptime(f"{now.year}-{published}", "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    if t > now:
+        t = t.replace(year=now.year - 1)       # 跨年时回退一年
+    return t
+
+
+def _age_hours(published: str, now: datetime) -> Optional[float]:
+    t = published_at(published, now)
+    return None if t is None else (now.astimezone(timezone.utc) - t).total_seconds() / 3600
+
+
+def rank_news(items: List[NewsItem], cluster_sizes: Optional[Dict[str, int]] = None,
+              now: Optional[datetime] = None) -> List[NewsItem]:
+    """给每条新闻打分、写入 tickers，按得分降序返回"""
+    now = now or datetime.now(timezone.utc)
+    matcher = get_matcher()
+    w = NEWS_RANK_WEIGHTS
+    cluster_sizes = cluster_sizes or {}
+    for item in items:
+        tickers, sectors = matcher.find(f"{item.title} {item.summary}")
+        item.tickers = tickers
+        age = _age_hours(item.published, now)
+        recency = 0.5 if age is None else 0.5 ** (age / NEWS_HALF_LIFE_HOURS)
+        size = cluster_sizes.get(cluster_key(item), 1)
+        item.score = round(
+            w["recency"] * recency
+            + w["source"] * NEWS_SOURCE_WEIGHTS.get(item.source, 1.0)
+            + w["cluster"] * math.log1p(size - 1)
+            + w["mention"] * min(len(tickers) + 0.5 * len(sectors), 3) / 3,
+            4,
+        )
+    return sorted(items, key=lambda i: i.score, reverse=True)
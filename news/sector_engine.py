@@ -0,0 +1,88 @@
+"""
+news/sector_engine.py
+板块热度引擎 —— 由成分股聚合，而不是用少数行业 ETF 代理
+
+  · 全部成分股共用一次批量行情（news/bars.py 面板缓存）
+  · 按行业 groupby 一次算出：市值加权 / 等权涨跌幅、上涨 / 下跌家数、领涨股
+  · 市值加权前先刷新成分股过期的市值（板块阶段早于选股，不能指望选股阶段已拉过）；
+    仍缺市值的成分股用同行业均值补齐，整个行业都缺则退化为等权，并在日志中给出占比
+"""
+import logging
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import SECTOR_WEIGHTING, SECTOR_MIN_MEMBERS
+from news.bars import load_bars
+from news.models import SectorInfo
+from stock_selectors.fundamentals import FundamentalStore
+from stock_selectors.industry import UNKNOWN_INDUSTRY, get_industry
+from stock_selectors.stock_names import get_stock_name
+from stock_selectors.universe import default_universe
+
+logger = logging.getLogger(__name__)
+
+
+def sector_board(
+    symbols: Optional[List[str]] = None,
+    weighting: str = SECTOR_WEIGHTING,
+    min_members: int = SECTOR_MIN_MEMBERS,
+) -> List[SectorInfo]:
+    """返回全部行业的板块快照，按涨跌幅降序"""
+    symbols = symbols or default_universe()
+    bars = load_bars(symbols)
+    close = bars.get("Close")
+    if close is None or len(close) < 2:
+        return []
+
+    # 每只股票最近两个有效收盘价 → 当日涨跌幅
+    last = close.ffill().iloc[-1]
+    prev = close.ffill().iloc[-2]
+    chg = ((last - prev) / prev.replace(0, np.nan) * 100).dropna()
+    if chg.empty:
+        return []
+
+    df = pd.DataFrame({"chg": chg})
+    df["industry"] = [get_industry(s) for s in df.index]
+    df = df[df["industry"] != UNKNOWN_INDUSTRY]
+
+    if weighting == "cap":
+        store = FundamentalStore()
+        store.refresh(list(df.index), fields=["market_cap"])
+        cap = pd.Series({s: store.get(s, "market_cap") for s in df.index}, dtype=float)
+        missing = cap.isna()
+        # 缺市值的成分股用同行业均值补齐，整个行业都缺则退化为等权
+        cap = cap.fillna(cap.groupby(df["industry"]).transform("mean"))
+        equal = cap.isna()
+        if missing.any():
+            logger.info(f"板块引擎：{int(missing.sum())}/{len(cap)} 支成分股缺市值（行业均值补齐），"
+                        f"其中 {int(equal.sum())} 支所在行业整体缺失、按等权计")
+        df["w"] = cap.fillna(1.0)
+    else:
+        df["w"] = 1.0
+
+    df["wchg"] = df["chg"] * df["w"]
+    g = df.groupby("industry")
+    board = pd.DataFrame({
+        "change_pct": g["wchg"].sum() / g["w"].sum(),
+        "members": g.size(),
+        "advancers": (df["chg"] > 0).groupby(df["industry"]).sum(),
+        "decliners": (df["chg"] < 0).groupby(df["industry"]).sum(),
+        "leader": g["chg"].idxmax(),
+    })
+    board = board[board["members"] >= min_members].sort_values("change_pct", ascending=False)
+
+    sectors = []
+    for name, row in board.iterrows():
+        leader = row["leader"]
+        sectors.append(SectorInfo(
+            name=name,
+            change_pct=round(float(row["change_pct"]), 2),
+            hot_reason=f"成分股{int(row['members'])}支{'市值加权' if weighting == 'cap' else '等权'}",
+            leading_stock=f"{get_stock_name(leader)} {df.at[leader, 'chg']:+.2f}%",
+            advancers=int(row["advancers"]),
+            decliners=int(row["decliners"]),
+        ))
+    logger.info(f"板块引擎：{len(df)} 支成分股聚合为 {len(sectors)} 个行业")
+    return sectors
@@ -0,0 +1,211 @@
+"""
+news/sentiment.py
+新闻情绪因子 —— 完全离线（词典法，仅 CPU）
+
+  · 打分：中英文正 / 负面词典构建一个 Aho-Corasick 自动机，一次扫描得到全部命中，
+    重叠时取最长词（「不及预期」优先于「预期」），前置否定词（不 / 未 / not …）翻转极性；
+    单条得分 = (正 - 负) / (正 + 负 + 1)，范围 (-1, 1)
+  · 存储：每次运行把带 tickers 的新闻写入 CACHE_DIR 下的 SQLite 本地库，
+    已入库的新闻不重复打分；时间戳取新闻的发布时间（缺失时取入库时间）
+  · 因子：对滚动窗口内提及该股的新闻按时间衰减加权平均，
+    再按条数收缩向中性（新闻越少越接近 0.5），映射到 0~1
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR, NEWS_SENTIMENT_WINDOW_DAYS, NEWS_SENTIMENT_HALF_LIFE_HOURS
+from news.models import NewsItem
+from news.ranking import AhoCorasick, published_at
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(CACHE_DIR, "news_store.db")
+KEEP_DAYS = 30          # 本地库保留最近 30 天
+SHRINK = 2.0            # 收缩强度：n 条新闻的置信度 = n / (n + SHRINK)
+
+POSITIVE_CN = [
+    "上涨", "大涨", "涨停", "走强", "反弹", "创新高", "新高", "突破", "增长", "大增", "高增",
+    "扭亏", "盈利", "超预期", "好于预期", "利好", "增持", "回购", "中标", "签约", "获批",
+    "提价", "分红", "上调", "买入", "看好", "景气", "复苏", "放量", "领涨", "净流入", "加仓",
+    "订单", "突破性", "首发", "量产", "战略合作", "业绩预增", "稳健",
+]
+NEGATIVE_CN = [
+    "下跌", "大跌", "跌停", "走弱", "回落", "新低", "跳水", "暴跌", "下滑", "下降", "亏损",
+    "预亏", "不及预期", "低于预期", "利空", "减持", "质押", "违约", "处罚", "立案", "调查",
+    "问询", "警示", "退市", "暴雷", "爆雷", "下调", "卖出", "放缓", "承压", "净流出", "减仓",
+    "诉讼", "冻结", "召回", "停产", "业绩预减", "裁员",
+]
+POSITIVE_EN = [
+    "surge", "surges", "soar", "soars", "rally", "rallies", "jump", "jumps", "gain", "gains",
+    "beat", "beats", "record high", "upgrade", "upgraded", "outperform", "bullish", "growth",
+    "profit", "strong", "boost", "rebound", "buyback", "approval", "approved", "raises",
+]
+NEGATIVE_EN = [
+    "plunge", "plunges", "slump", "slumps", "tumble", "tumbles", "drop", "drops", "fall", "falls",
+    "miss", "misses", "downgrade", "downgraded", "underperform", "bearish", "loss", "losses",
+    "weak", "cut", "cuts", "probe", "lawsuit", "recall", "layoffs", "default", "fraud", "warning",
+]
+NEGATORS_CN = ("不", "未", "没", "无", "非", "难")
+_NEG_EN_RE = re.compile(r"\b(not|no|never|without|fails? to)\s+(\w+\s+)?$")
+_ASCII_WORD = re.compile(r"[a-z0-9]")
+
+
+def _build_lexicon() -> AhoCorasick:
+    patterns: Dict[str, str] = {}
+    for words, pol in ((POSITIVE_CN, "+"), (NEGATIVE_CN, "-"), (POSITIVE_EN, "+"), (NEGATIVE_EN, "-")):
+        for w in words:
+            patterns[w] = pol
+    return AhoCorasick(patterns)
+
+
+_lexicon = _build_lexicon()
+
+
+def _negated(text: str, start: int, english: bool) -> bool:
+    if english:
+        return bool(_NEG_EN_RE.search(text[max(0, start - 24):start]))
+    return any(c in NEGATORS_CN for c in text[max(0, start - 2):start])
+
+
+def score_text(text: str) -> float:
+    """单条文本情绪，范围 (-1, 1)；没有命中任何情绪词时为 0"""
+    text = text.lower()
+    hits = []
+    for end, pat, pol in _lexicon.iter(text):
+        start = end - len(pat) + 1
+        english = pat[0].isascii()
+        if english and ((start > 0 and _ASCII_WORD.match(text[start - 1]))
+                        or (end + 1 < len(text) and _ASCII_WORD.match(text[end + 1]))):
+            continue
+        hits.append((start, end, pol, english))
+    if not hits:
+        return 0.0
+
+    # 重叠命中只保留最长的词
+    hits.sort(key=lambda h: (h[0] - h[1], h[0]))
+    taken = set()
+    pos = neg = 0
+    for start, end, pol, english in hits:
+        span = range(start, end + 1)
+        if any(i in taken for i in span):
+            continue
+        taken.update(span)
+        positive = (pol == "+") != _negated(text, start, english)
+        if positive:
+            pos += 1
+        else:
+            neg += 1
+    return (pos - neg) / (pos + neg + 1)
+
+
+def score_texts(texts: Iterable[str]) -> np.ndarray:
+    """批量打分"""
+    return np.fromiter((score_text(t) for t in texts), dtype=float)
+
+
+# ──────────────────────────────────────────────────────────────
+# 本地新闻库
+# ──────────────────────────────────────────────────────────────
+
+def _connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS news (
+            key       TEXT PRIMARY KEY,
+            ts        REAL NOT NULL,
+            title     TEXT NOT NULL,
+            source    TEXT,
+            sentiment REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_news_ts ON news(ts);
+        CREATE TABLE IF NOT EXISTS mentions (
+            key  TEXT NOT NULL,
+            code TEXT NOT NULL,
+            PRIMARY KEY (key, code)
+        );
+        CREATE INDEX IF NOT EXISTS idx_mentions_code ON mentions(code);
+    """)
+    return conn
+
+
+def _key(item: NewsItem) -> str:
+    return hashlib.sha1(f"{item.title}|{item.link}".encode("utf-8")).hexdigest()
+
+
+def _published_ts(item: NewsItem, now: datetime) -> float:
+    t = published_at(item.published, now)
+    return t.timestamp() if t is not None else now.timestamp()
+
+
+def record_news(news_by_category: Dict[str, List[NewsItem]], db_path: str = DB_PATH) -> int:
+    """把提及个股的新闻写入本地库（只给新入库的打分），返回新增条数"""
+    now = datetime.now(timezone.utc)
+    cutoff = now.timestamp() - KEEP_DAYS * 86400
+    # 按发布时间入库，情绪窗口与新闻日期一致；超出保留期的旧闻不入库（否则入库即被清理，每次重复打分）
+    items: Dict[str, NewsItem] = {}
+    ts: Dict[str, float] = {}
+    for item in (i for cat in news_by_category.values() for i in cat if i.tickers):
+        t = _published_ts(item, now)
+        if t >= cutoff:
+            k = _key(item)
+            items[k], ts[k] = item, t
+    if not items:
+        return 0
+    with _connect(db_path) as conn:
+        keys = list(items)
+        known = set()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            known.update(r[0] for r in conn.execute(
+                f"SELECT key FROM news WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+        new = [k for k in keys if k not in known]
+        scores = score_texts(f"{items[k].title} {items[k].summary}" for k in new)
+        conn.executemany(
+            "INSERT INTO news(key, ts, title, source, sentiment) VALUES (?, ?, ?, ?, ?)",
+            [(k, ts[k], items[k].title, items[k].source, float(s)) for k, s in zip(new, scores)],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO mentions(key, code) VALUES (?, ?)",
+            [(k, code) for k in new for code in items[k].tickers],
+        )
+        conn.execute("DELETE FROM mentions WHERE key IN (SELECT key FROM news WHERE ts < ?)", (cutoff,))
+        conn.execute("DELETE FROM news WHERE ts < ?", (cutoff,))
+    if new:
+        logger.info(f"新闻情绪入库 {len(new)} 条")
+    return len(new)
+
+
+def news_sentiment_scores(codes: List[str], window_days: float = NEWS_SENTIMENT_WINDOW_DAYS,
+                          db_path: str = DB_PATH) -> Dict[str, float]:
+    """
+    个股新闻情绪因子（0~1）：窗口内提及该股的新闻情绪按半衰期加权平均，
+    再乘以置信度 n/(n+SHRINK) 收缩向中性；没有新闻的股票不返回，调用方按 0.5 处理
+    """
+    if not os.path.exists(db_path):
+        return {}
+    clean = sorted({c.split(".")[0] for c in codes})
+    now = time.time()
+    with _connect(db_path) as conn:
+        df = pd.read_sql_query(
+            "SELECT m.code, n.ts, n.sentiment FROM mentions m JOIN news n ON n.key = m.key WHERE n.ts >= ?",
+            conn, params=(now - window_days * 86400,))
+    df = df[df["code"].isin(clean)].copy()
+    if df.empty:
+        return {}
+    df["w"] = 0.5 ** ((now - df["ts"]) / 3600 / NEWS_SENTIMENT_HALF_LIFE_HOURS)
+    df["ws"] = df["w"] * df["sentiment"]
+    g = df.groupby("code").agg(ws=("ws", "sum"), w=("w", "sum"), n=("ts", "size"))
+    mean = g["ws"] / g["w"]
+    score = 0.5 + 0.5 * mean * g["n"] / (g["n"] + SHRINK)
+    return score.clip(0, 1).round(4).to_dict()
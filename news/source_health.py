@@ -0,0 +1,111 @@
+"""
+news/source_health.py
+新闻源健康度 & 熔断器（跨运行持久化到 CACHE_DIR/source_health.json）
+
+  · 记录每个源最近若干次的耗时，超时时间按该源 p95 自适应
+  · 连续失败达到阈值 → 熔断（open），冷却期内直接跳过；
+    冷却期满后放行一次试探（half_open），成功则恢复，失败则冷却期翻倍
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import (
+    CACHE_DIR,
+    SOURCE_TIMEOUT_DEFAULT, SOURCE_TIMEOUT_MIN, SOURCE_TIMEOUT_MAX,
+    SOURCE_CB_FAILURES, SOURCE_CB_COOLDOWN_HOURS,
+)
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PATH = os.path.join(CACHE_DIR, "source_health.json")
+LATENCY_WINDOW = 50          # 每个源保留最近 50 次耗时
+MAX_COOLDOWN_HOURS = 72
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _percentile(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+class SourceHealth:
+
+    def __init__(self, path: str = HEALTH_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Dict[str, dict] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"新闻源健康记录读取失败，重新统计: {e}")
+
+    def _rec(self, key: str) -> dict:
+        return self._data.setdefault(key, {
+            "lat": [], "fails": 0, "ok": 0, "err": 0,
+            "state": CLOSED, "opened_at": 0.0, "trips": 0,
+        })
+
+    def allow(self, key: str) -> bool:
+        """是否放行本次请求；熔断冷却期满时转为半开，放行一次试探"""
+        with self._lock:
+            r = self._rec(key)
+            if r["state"] != OPEN:
+                return True
+            cooldown = min(SOURCE_CB_COOLDOWN_HOURS * 2 ** (r["trips"] - 1), MAX_COOLDOWN_HOURS) * 3600
+            if time.time() - r["opened_at"] >= cooldown:
+                r["state"] = HALF_OPEN
+                logger.info(f"熔断试探 [{key[:50]}]")
+                return True
+            return False
+
+    def timeout(self, key: str) -> float:
+        """p95 × 1.5，限制在 [MIN, MAX]；样本不足时用默认值"""
+        lat = self._data.get(key, {}).get("lat", [])
+        if len(lat) < 3:
+            return SOURCE_TIMEOUT_DEFAULT
+        return max(SOURCE_TIMEOUT_MIN, min(SOURCE_TIMEOUT_MAX, _percentile(lat, 0.95) * 1.5))
+
+    def record(self, key: str, ok: bool, latency: Optional[float] = None):
+        with self._lock:
+            r = self._rec(key)
+            if latency is not None and ok:
+                r["lat"] = (r["lat"] + [round(latency, 3)])[-LATENCY_WINDOW:]
+            if ok:
+                r["ok"] += 1
+                r["fails"] = 0
+                if r["state"] != CLOSED:
+                    logger.info(f"新闻源恢复 [{key[:50]}]")
+                r["state"], r["trips"] = CLOSED, 0
+                return
+            r["err"] += 1
+            r["fails"] += 1
+            if r["state"] == HALF_OPEN or r["fails"] >= SOURCE_CB_FAILURES:
+                r["trips"] += 1
+                r["state"], r["opened_at"] = OPEN, time.time()
+                logger.warning(f"新闻源熔断 [{key[:50]}]：连续失败 {r['fails']} 次")
+
+    def stats(self, key: str) -> dict:
+        r = self._data.get(key, {})
+        lat = r.get("lat", [])
+        return {
+            "state": r.get("state", CLOSED),
+            "p50": _percentile(lat, 0.5) if lat else None,
+            "p95": _percentile(lat, 0.95) if lat else None,
+            "fails": r.get("fails", 0),
+        }
+
+    def save(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
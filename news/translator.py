@@ -3,9 +3,10 @@
 """
 import logging
 import os
-import requests
+from dataclasses import replace
 from typing import List
-from news.aggregator import NewsItem
+from news.models import NewsItem
+from utils.http_cache import get_http_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +30,10 @@ def translate_news(items: List[NewsItem]) -> List[NewsItem]:
             # 翻译摘要（如果有）
             summary_cn = _translate_text(item.summary) if item.summary else ""
             
-            translated.append(NewsItem(
+            translated.append(replace(
+                item,
                 title=title_cn or item.title,
-                link=item.link,
                 summary=summary_cn or item.summary,
-                source=item.source,
-                published=item.published,
-                category=item.category,
             ))
         except Exception as e:
             logger.debug(f"翻译失败，保持原文: {e}")
@@ -54,9 +52,9 @@ def _translate_text(text: str) -> str:
     
     try:
         # 简单的翻译API调用（可以替换为其他翻译服务）
-        response = requests.post(
+        response = get_http_cache().post(
             TRANSLATE_API_URL,
-            json={"text": text, "target": "zh"},
+            json_body={"text": text, "target": "zh"},
             timeout=5
         )
         if response.status_code == 200:
@@ -13,6 +13,9 @@ from config import (
     RSS_SOURCES, FACTOR_WEIGHTS,
     TOP_STOCKS_COUNT, SECTOR_TOP_N, MARKET_TOP_N,
     STOCK_POOL, CACHE_DIR,
+    INDUSTRY_NEUTRAL, MAX_PICKS_PER_INDUSTRY,
+    SELECT_MARKETS, MARKET_PICKS_N,
+    REFRESH_STAGES, PROFILE_STAGES,
 )
 from news.aggregator import fetch_all_news
 from news.market_hot import (
@@ -20,46 +23,69 @@ from news.market_hot import (
     fetch_north_fund_flow, fetch_market_overview,
 )
 from news.baidu_translator import translate_news
-from stock_selectors.multi_factor import run_selector
-from templates.email_builder import build_html_email
+from news.sentiment import record_news
+from stock_selectors.multi_factor import run_markets
+from templates.text_builder import render_report
+from utils.checkpoint import StageCheckpoint
+from utils.edition_diff import diff_with_previous
+from utils.http_cache import get_http_cache
 from utils.mailer import send_html_email
+from utils.profiler import StageProfiler
+from utils.trading_calendar import closed_session, market_status
+from utils.snapshot import build_snapshot, edition_id, load_report, load_snapshot, save_snapshot, snapshot_path
 
 logger = logging.getLogger(__name__)
 
 
 class DailyRunner:
 
+    def __init__(self, force=REFRESH_STAGES, profile=PROFILE_STAGES):
+        """
+        force:   需要强制重跑的阶段名（或 "all"），其余已完成阶段从断点恢复
+        profile: 需要剖析的阶段名（或 "all"），见 utils/profiler.py
+        """
+        self.force = set(force)
+        self.profiler = StageProfiler(profile)
+
     def run(self):
         today = datetime.now().strftime("%Y-%m-%d")
         os.makedirs(CACHE_DIR, exist_ok=True)
+        edition = edition_id()
+        ckpt = StageCheckpoint(CACHE_DIR, edition, self.force, profiler=self.profiler)
+        # 各市场今日是否交易：休市市场的行情停在最近交易日收盘，相关阶段跨期次复用
+        status = market_status()
+        for st in status.values():
+            if not st.is_open:
+                logger.info(f"{st.market} 今日休市（{st.reason}），最近交易日 {st.last_session}")
 
         # ── 1. 拉取数据 ───────────────────────────────
         logger.info("步骤 1/6：抓取新闻资讯...")
-        news = fetch_all_news(RSS_SOURCES)
+        raw_news = ckpt.run("news", lambda: fetch_all_news(RSS_SOURCES))
+        try:
+            record_news(raw_news)       # 入库供情绪因子使用（已入库的自动跳过）
+        except Exception as e:
+            logger.warning(f"新闻情绪入库失败: {e}")
 
         logger.info("步骤 2/6：翻译英文新闻...")
-        # 翻译美股和AI新闻
-        if "美股要闻" in news:
-            news["美股要闻"] = translate_news(news["美股要闻"])
-        if "AI大模型" in news:
-            news["AI大模型"] = translate_news(news["AI大模型"])
+        news = ckpt.run("translations", lambda: self._translate(raw_news), depends=("news",))
 
         logger.info("步骤 3/6：获取市场行情...")
-        indices = fetch_market_overview()
-        north_flow = fetch_north_fund_flow()
-        hot_sectors = fetch_hot_sectors(top_n=SECTOR_TOP_N)
-        hot_stocks = fetch_hot_stocks(stock_pool=STOCK_POOL, top_n=MARKET_TOP_N)
-
-        logger.info("步骤 4/6：运行多因子量化选股...")
-        top_picks = run_selector(
-            weights=FACTOR_WEIGHTS,
-            top_n=TOP_STOCKS_COUNT,
-            stock_pool=STOCK_POOL if STOCK_POOL else None,
-        )
+        indices = ckpt.run("indices", fetch_market_overview, session=closed_session(status, "CN", "HK", "US"))
+        north_flow = ckpt.run("north_flow", fetch_north_fund_flow, session=closed_session(status, "CN", "HK"))
+        hot_sectors = ckpt.run("sectors", lambda: fetch_hot_sectors(top_n=SECTOR_TOP_N),
+                               session=closed_session(status, "CN"))
+        hot_stocks = ckpt.run("hot_stocks", lambda: fetch_hot_stocks(stock_pool=STOCK_POOL, top_n=MARKET_TOP_N),
+                              session=closed_session(status, "CN"))
+
+        logger.info("步骤 4/6：运行多因子量化选股（A股 / 港股 / 美股并发）...")
+        picks = ckpt.run("picks_by_market", self.select, session=closed_session(status, *SELECT_MARKETS))
+        top_picks = picks.get("CN", [])
+        market_picks = {m: t for m, t in picks.items() if m != "CN"}
 
-        # ── 2. 生成 HTML ──────────────────────────────
+        # ── 2. 保存数据快照 & 生成 HTML ──────────────
         logger.info("步骤 5/6：生成 HTML 日报...")
-        html = build_html_email(
+        snap = build_snapshot(
+            edition=edition,
             date_str=today,
             indices=indices,
             news_by_category=news,
@@ -67,29 +93,84 @@ class DailyRunner:
             hot_stocks=hot_stocks,
             top_picks=top_picks,
             north_flow=north_flow,
+            market_picks=market_picks,
+            market_status=status,
         )
-
-        # 保存 HTML 到本地
-        html_path = os.path.join(CACHE_DIR, f"report_{today}.html")
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html)
-        logger.info(f"HTML 报告已保存: {html_path}")
+        snap_path = save_snapshot(snap, snapshot_path(CACHE_DIR, edition))
+        html_path = self.render(snap_path)
 
         # ── 3. 发送邮件 ───────────────────────────────
         logger.info("步骤 6/6：发送邮件...")
-        now = datetime.now()
-        time_label = "早报" if now.hour < 12 else "晚报"
-        subject = f"📈 财经{time_label} {today} | A股/美股/港股要闻 + AI动态 + 量化选股"
-        
-        ok = send_html_email(
-            sender=EMAIL_SENDER,
-            password=EMAIL_PASSWORD,
-            recipients=EMAIL_RECIPIENTS,
-            subject=subject,
-            html_body=html,
-            smtp_host=SMTP_HOST,
-            smtp_port=SMTP_PORT,
+        # 本地重跑 / 重渲染（--refresh news、all 等）不应重复发信，只有点名 send 才重发
+        if ckpt.done("send", explicit=True):
+            logger.info("本期日报已发送过，跳过（USTCB_REFRESH=send 可强制重发）")
+        elif self._send(html_path, today, edition, cn_closed=not status["CN"].is_open):
+            ckpt.save("send", True)
+        get_http_cache().log_stats()
+        return html_path
+
+    @staticmethod
+    def select(weights=None, offline=False):
+        """各市场选股 {市场键: ScoreTable}；weights 默认 FACTOR_WEIGHTS，offline 只读本地缓存（CLI 离线重算）"""
+        return run_markets(
+            weights=weights or FACTOR_WEIGHTS,
+            markets=SELECT_MARKETS,
+            top_n=TOP_STOCKS_COUNT,
+            market_top_n=MARKET_PICKS_N,
+            stock_pool=STOCK_POOL if STOCK_POOL else None,
+            industry_neutral=INDUSTRY_NEUTRAL,
+            max_per_industry=MAX_PICKS_PER_INDUSTRY,
+            offline=offline,
         )
+
+    @staticmethod
+    def _translate(news):
+        # 翻译美股和AI新闻（在副本上进行，保留原始新闻断点）
+        news = dict(news)
+        if "美股要闻" in news:
+            news["美股要闻"] = translate_news(news["美股要闻"])
+        if "AI大模型" in news:
+            news["AI大模型"] = translate_news(news["AI大模型"])
+        return news
+
+    def render(self, snap_path: str, out_dir: str = CACHE_DIR) -> str:
+        """从数据快照渲染 HTML / Markdown / 纯文本三种格式，返回 HTML 路径（不联网）"""
+        with self.profiler.stage("render"):
+            report = load_report(snap_path)
+            report["changes"] = diff_with_previous(CACHE_DIR, load_snapshot(snap_path)["edition"], report)
+            os.makedirs(out_dir, exist_ok=True)
+            base = os.path.join(out_dir, f"report_{report['date_str']}")
+            for fmt in ("html", "md", "txt"):
+                with open(f"{base}.{fmt}", "w", encoding="utf-8") as f:
+                    f.write(render_report(report, fmt))
+        logger.info(f"HTML 报告已保存: {base}.html")
+        return f"{base}.html"
+
+    def resend(self, snap_path: str) -> str:
+        """重新渲染并发送历史日报，全程只读快照"""
+        snap = load_snapshot(snap_path)
+        html_path = self.render(snap_path)
+        cn_closed = any(st.market == "CN" and not st.is_open for st in load_report(snap_path)["market_status"].values())
+        self._send(html_path, snap["date_str"], snap["edition"], cn_closed=cn_closed)
+        return html_path
+
+    def _send(self, html_path: str, today: str, edition: str, cn_closed: bool = False) -> bool:
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+        time_label = "早报" if edition.endswith("-am") else "晚报"
+        holiday = "（A股休市）" if cn_closed else ""
+        subject = f"📈 财经{time_label} {today}{holiday} | A股/美股/港股要闻 + AI动态 + 量化选股"
+        
+        with self.profiler.stage("send"):
+            ok = send_html_email(
+                sender=EMAIL_SENDER,
+                password=EMAIL_PASSWORD,
+                recipients=EMAIL_RECIPIENTS,
+                subject=subject,
+                html_body=html,
+                smtp_host=SMTP_HOST,
+                smtp_port=SMTP_PORT,
+            )
         if not ok:
             logger.warning("邮件发送失败，但 HTML 报告已保存到本地")
-        return html_path
+        return ok
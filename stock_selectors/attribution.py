@@ -0,0 +1,103 @@
+"""
+stock_selectors/attribution.py
+评分归因 —— 每个因子对总分的加权贡献 + 因子值在当日全体有效股票中的分位
+
+  · 贡献 = 因子值 × 权重 / 权重和，各因子贡献相加即总分（做了行业中性化时按中性化后的因子值计）；
+    权重里没有注册的因子在总分中按中性 0.5 计，这部分合成一项「其他」，对所有股票相同
+  · 分位 = 当日有效股票中低于该值的比例（并列各算一半），0~1，越大越靠前；
+    整张「股票 × 因子」矩阵一次排名，不逐只计算
+  · 全市场几千支股票时「81 分」本身没有参照，分位才说明它在当天处于什么位置
+"""
+import math
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from stock_selectors.factors import factor_label
+from stock_selectors.score_table import OTHER
+
+# 贡献条配色（按因子固定，不同股票之间可直接对比；因子简称见 factors.py 注册表）
+FACTOR_COLORS: Dict[str, str] = {
+    "momentum_5d": "#e84040", "momentum_20d": "#f08080", "volume_ratio": "#f5a623",
+    "macd_signal": "#4a90d9", "rsi_score": "#7fb3e6", "kdj_signal": "#9b59b6", "boll_position": "#c39bd3",
+    "turnover_rate": "#f7c46c", "pe_score": "#00b050", "north_flow": "#16a085", "news_sentiment": "#95a5a6",
+    "atr_score": "#34495e", "obv_trend": "#d35400", OTHER: "#cccccc",
+}
+
+
+def contrib_label(name: str) -> str:
+    return "其他" if name == OTHER else factor_label(name)
+
+
+def contributions(factors: np.ndarray, names: Sequence[str], weights: Mapping[str, float]) -> np.ndarray:
+    """N × F 因子矩阵 → N × F 加权贡献（与 factors.weighted_total 同口径，缺失因子按中性 0.5）"""
+    w = np.array([weights.get(k, 0.0) for k in names], dtype=float)
+    s = sum(weights.values())
+    if not s:
+        return np.zeros_like(factors, dtype=float)
+    return np.nan_to_num(np.asarray(factors, dtype=float), nan=0.5) * (w / s)
+
+
+def other_contribution(names: Sequence[str], weights: Mapping[str, float]) -> float:
+    """weights 中不在 names 里的因子按中性 0.5 计入总分的部分；加上 contributions 各列即 weighted_total"""
+    s = sum(weights.values())
+    if not s:
+        return 0.0
+    scored = set(names)
+    return 0.5 * sum(w for k, w in weights.items() if k not in scored) / s
+
+
+def percentiles(x: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    x: N × F 矩阵或长度 N 的向量；在 mask 选出的股票中逐列排名，返回同形状的 0~1 分位
+    mask 之外的行（无效 / 停牌股票）为 NaN
+    """
+    x = np.asarray(x, dtype=float)
+    flat = x.reshape(len(x), -1)
+    out = np.full(flat.shape, np.nan)
+    mask = np.asarray(mask, dtype=bool)
+    m = int(mask.sum())
+    if m:
+        r = pd.DataFrame(flat[mask]).rank(axis=0, method="average").to_numpy()
+        out[mask] = (r - 0.5) / m
+    return out.reshape(x.shape)
+
+
+def attribute(table, weights: Mapping[str, float], mask: np.ndarray):
+    """
+    给整张 ScoreTable 写入 contrib / pct / score_pct 三列及 contrib_other（原地修改）
+    必须在截取 Top-N 之前调用，分位的参照系才是当日全体有效股票
+    """
+    table.contrib = contributions(table.factors, table.factor_names, weights)
+    table.contrib_other = other_contribution(table.factor_names, weights)
+    table.pct = percentiles(table.factors, mask)
+    table.score_pct = percentiles(table.total_score, mask)
+    return table
+
+
+# ──────────────────────────────────────────────────────────────
+# 渲染辅助（邮件 / Markdown / 纯文本共用）
+# ──────────────────────────────────────────────────────────────
+
+def rank_text(pct: Optional[float]) -> str:
+    """分位 → 「前 5%」"""
+    if pct is None or math.isnan(pct):
+        return ""
+    return f"前 {max(1, math.ceil((1 - pct) * 100))}%"
+
+
+def top_drivers(contrib: Mapping[str, float], pct: Mapping[str, float],
+                n: int = 3) -> List[Tuple[str, float, Optional[float]]]:
+    """贡献最大的 n 个因子 [(因子名, 贡献分, 分位)]，贡献分 = 贡献 × 100（与总分同刻度）；「其他」不算"""
+    items = sorted(((k, v) for k, v in contrib.items() if v > 0 and k != OTHER), key=lambda kv: -kv[1])[:n]
+    return [(k, v * 100, pct.get(k)) for k, v in items]
+
+
+def drivers_text(contrib: Mapping[str, float], pct: Mapping[str, float], n: int = 3) -> str:
+    """「MACD +12(前 5%) · 估值 +10(前 20%)」"""
+    parts = []
+    for k, pts, p in top_drivers(contrib, pct, n):
+        rt = rank_text(p)
+        parts.append(f"{factor_label(k)} +{pts:.0f}" + (f"({rt})" if rt else ""))
+    return " · ".join(parts)
@@ -0,0 +1,108 @@
+"""
+stock_selectors/backtest.py
+滚动回测 —— 用本地 K 线面板检验一组因子权重的选股效果
+
+  · 每隔 step 个交易日，用截至当日的 K 线给全池打分、按入选约束取 Top-N（与日报同一引擎 / 同一规则），
+    持有 horizon 个交易日后计算等权收益，与全池有效股票的等权收益对比
+  · PE / 北向 / 新闻情绪没有逐日的历史数据，回测中一律按中性 0.5 处理，只检验量价因子；
+    也不做行业中性化（中性化依赖的 PE 同样没有历史值）
+  · 数据质量检查（news/bar_quality.py）按每期建仓日之前的窗口单独进行，剔除名单只用当时已有的数据；
+    持有期收益用整段面板复权后的收盘价，不做整只剔除，避免用未来数据筛掉股票（幸存者偏差）
+  · 默认离线：只读 news/bars.py 的面板缓存，缓存长度（BARS_PERIOD）决定可回测的区间
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from news.bar_quality import clean_bars
+from news.bars import load_raw_bars
+from stock_selectors.engine import score_universe
+from stock_selectors.factors import MIN_BARS
+from stock_selectors.industry import get_industry
+from stock_selectors.selection import SelectionRules, code_ranks, is_st
+from stock_selectors.universe import clean_code
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class BacktestPeriod:
+    date: str                   # 建仓日（该日收盘价买入）
+    picks: List[str]
+    pick_return: float          # 持有期等权收益（%）
+    universe_return: float      # 同期全池有效股票等权收益（%）
+
+    @property
+    def excess(self) -> float:
+        return self.pick_return - self.universe_return
+
+
+@dataclass
+class BacktestResult:
+    horizon: int
+    step: int
+    periods: List[BacktestPeriod] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.periods:
+            return {"periods": 0}
+        pick = np.array([p.pick_return for p in self.periods])
+        uni = np.array([p.universe_return for p in self.periods])
+        out = {
+            "periods": len(self.periods),
+            "avg_pick_return": round(float(pick.mean()), 3),
+            "avg_universe_return": round(float(uni.mean()), 3),
+            "avg_excess": round(float((pick - uni).mean()), 3),
+            "hit_rate": round(float((pick > uni).mean()), 3),
+        }
+        if self.step >= self.horizon:
+            # 持有期不重叠时才能连乘成累计收益
+            out["cum_pick_return"] = round(float((np.prod(1 + pick / 100) - 1) * 100), 3)
+            out["cum_universe_return"] = round(float((np.prod(1 + uni / 100) - 1) * 100), 3)
+        return out
+
+
+def run_backtest(weights: Dict[str, float], pool: List[tuple], market: str = "CN", top_n: int = 10,
+                 horizon: int = 5, step: int = 5, max_per_industry: int = 0,
+                 offline: bool = True, rules: Optional[SelectionRules] = None) -> BacktestResult:
+    """pool: [(Yahoo 代码, 名称, 行业)]，与 run_selector 的候选池同格式"""
+    syms = [sym for sym, *_ in pool]
+    raw = load_raw_bars(syms, offline=offline)
+    result = BacktestResult(horizon=horizon, step=step)
+    if "Close" not in raw or raw["Close"].dropna(how="all").empty:
+        logger.warning("回测：没有可用的 K 线缓存（先运行一次 select / 日报）")
+        return result
+
+    codes = [clean_code(s) for s in syms]
+    names = [nm for _, nm, *_ in pool]
+    industry = [rest[0] if rest and rest[0] else get_industry(c) for c, (_, _, *rest) in zip(codes, pool)]
+    ind_ids = np.unique(industry, return_inverse=True)[1]
+    ranks, st = code_ranks(codes), is_st(names)
+    rules = rules or SelectionRules.for_market(market, top_n, max_per_industry)
+    n = len(syms)
+    pe, neutral = np.full(n, np.nan), np.full(n, 0.5)
+
+    full, _ = clean_bars(raw, exclude=False)
+    close = full["Close"].to_numpy(dtype=float)
+    dates = full["Close"].index
+    T = len(dates)
+    for t in range(MIN_BARS, T - horizon + 1, step):
+        window, _ = clean_bars({f: df.iloc[:t] for f, df in raw.items()})
+        ps = score_universe(window, pe, neutral, neutral, weights, rules=rules, industry=ind_ids,
+                            code_rank=ranks, st=st, workers=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ret = (close[t - 1 + horizon] / close[t - 1] - 1) * 100
+        held = [i for i in ps.ranked if np.isfinite(ret[i])]
+        uni = ps.valid & np.isfinite(ret)
+        if not held or not uni.any():
+            continue
+        result.periods.append(BacktestPeriod(
+            date=f"{dates[t - 1]:%Y-%m-%d}",
+            picks=[codes[i] for i in held],
+            pick_return=round(float(ret[held].mean()), 3),
+            universe_return=round(float(ret[uni].mean()), 3),
+        ))
+    logger.info(f"回测完成：{len(result.periods)} 期，持有 {horizon} 日，每 {step} 日调仓")
+    return result
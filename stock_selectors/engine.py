@@ -0,0 +1,167 @@
+"""
+stock_selectors/engine.py
+全市场打分引擎 —— 多进程 + 共享内存
+
+  · 高 / 低 / 收 / 量四张「日期 × 股票」矩阵和 PE / 北向 / 情绪向量一次性写入
+    multiprocessing.shared_memory，子进程按列切片直接读共享内存，不复制、不 pickle 行情
+  · 每个分片在子进程内完成因子（只算权重非零的，见 factors.py 注册表）、总分、入选约束和分片内 Top-K（有界堆，见 selection.py），
+    只把「股票 × 因子」小矩阵和本分片的候选回传；父进程再用同一个有界堆合并各分片候选
+  · 股票数少于 PARALLEL_MIN_STOCKS 或只有 1 个进程时在本进程内计算，结果完全一致
+  · 进程池用 forkserver（不支持时 spawn）启动：run_markets 在线程池里并发调用本函数，
+    在多线程进程里 fork 可能把其他线程持有的锁一并复制进子进程而死锁
+"""
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import PARALLEL_WORKERS, PARALLEL_MIN_STOCKS
+from stock_selectors.factors import FACTORS, FactorPanel, active_factors, evaluate, panel_quote_stats, weighted_total
+from stock_selectors.selection import SelectionRules, TopK, eligible, select_top
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ("High", "Low", "Close", "Volume")
+AUX_ROWS = 6               # pe / north / sentiment / 行业编号 / 代码序 / ST 标记
+SHARDS_PER_WORKER = 4      # 分片数 = 进程数 × 4，平衡各进程负载
+
+
+@dataclass
+class PanelScores:
+    """全部股票的打分结果（按 symbols 顺序的列式数组）"""
+    symbols: List[str]
+    factor_names: List[str]
+    factors: np.ndarray        # N × F
+    total: np.ndarray
+    valid: np.ndarray          # 有效 K 线足够、因子有意义
+    eligible: np.ndarray       # valid 且满足入选约束
+    price: np.ndarray
+    change_pct: np.ndarray
+    volume_ratio: np.ndarray
+    ranked: List[int]          # 入选结果（按排名），rank=False 时为空
+    filtered: Dict[str, int]   # 各约束过滤掉的支数
+
+
+# ──────────────────────────────────────────────────────────────
+# 分片打分（父进程 / 子进程共用）
+# ──────────────────────────────────────────────────────────────
+
+def _score_block(panel: np.ndarray, aux: np.ndarray, lo: int, hi: int, weights: Dict[str, float],
+                 rules: Optional[SelectionRules], rank: bool) -> dict:
+    high, low, close, volume = (panel[i, :, lo:hi] for i in range(4))
+    fp = FactorPanel(close, high, low, volume, aux[0, lo:hi], aux[1, lo:hi], aux[2, lo:hi])
+    names = active_factors(weights)
+    f, valid = evaluate(fp, names)
+    total = weighted_total(f, weights, hi - lo)
+    stats = panel_quote_stats(fp)
+    ok, filtered = (valid, {}) if rules is None else eligible(close, volume, aux[5, lo:hi] > 0, rules)
+    ok = ok & valid
+    return {
+        "lo": lo,
+        "factors": np.column_stack([f[k] for k in names]) if names else np.empty((hi - lo, 0)),
+        "total": total, "valid": valid, "eligible": ok, "filtered": filtered, **stats,
+        "top": select_top(total, ok, aux[4, lo:hi], aux[3, lo:hi], rules, offset=lo) if rank else [],
+    }
+
+
+_shm: Optional[shared_memory.SharedMemory] = None
+_panel: Optional[np.ndarray] = None
+_aux: Optional[np.ndarray] = None
+
+
+def _attach(name: str, T: int, N: int):
+    """子进程初始化：挂载共享内存（子进程与父进程共用 resource_tracker，由父进程 unlink 释放）"""
+    global _shm, _panel, _aux
+    _shm = shared_memory.SharedMemory(name=name)
+    buf = np.ndarray((4 * T * N + AUX_ROWS * N,), dtype=np.float64, buffer=_shm.buf)
+    _panel = buf[:4 * T * N].reshape(4, T, N)
+    _aux = buf[4 * T * N:].reshape(AUX_ROWS, N)
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _score_shard(lo: int, hi: int, weights: Dict[str, float], rules: Optional[SelectionRules], rank: bool) -> dict:
+    return _score_block(_panel, _aux, lo, hi, weights, rules, rank)
+
+
+# ──────────────────────────────────────────────────────────────
+# 入口
+# ──────────────────────────────────────────────────────────────
+
+def score_universe(bars: Dict[str, pd.DataFrame], pe: np.ndarray, north: np.ndarray, sentiment: np.ndarray,
+                   weights: Dict[str, float], rules: Optional[SelectionRules] = None,
+                   industry: Optional[np.ndarray] = None, code_rank: Optional[np.ndarray] = None,
+                   st: Optional[np.ndarray] = None, rank: bool = True,
+                   workers: int = PARALLEL_WORKERS) -> PanelScores:
+    """
+    bars: load_bars 的结果（列顺序即股票顺序）；pe/north/sentiment 与列对齐（pe 缺失为 NaN）
+    rules: 入选约束和 Top-K（None = 不过滤、排名全部有效股票）
+    industry / code_rank / st: 行业编号、代码字典序名次（同分决胜）、ST 标记，默认全 0 / 列顺序 / 否
+    rank: False 时只打分不选股（调用方重算总分后再调 selection.select_top）
+    """
+    symbols = list(bars["Close"].columns)
+    T, N = bars["Close"].shape
+    unknown = [k for k, w in weights.items() if w and k not in FACTORS]
+    if unknown:
+        logger.warning(f"权重中有未注册的因子，按中性 0.5 计: {', '.join(unknown)}")
+    zeros = np.zeros(N)
+    aux_rows = [pe, north, sentiment,
+                zeros if industry is None else industry,
+                np.arange(N) if code_rank is None else code_rank,
+                zeros if st is None else st]
+    shards = max(1, min(N, workers * SHARDS_PER_WORKER))
+    step = math.ceil(N / shards) if N else 1
+    bounds = [(lo, min(lo + step, N)) for lo in range(0, N, step)]
+
+    if workers <= 1 or N < PARALLEL_MIN_STOCKS:
+        panel = np.stack([bars[f].to_numpy(dtype=float) for f in PANEL_FIELDS])
+        aux = np.vstack(aux_rows).astype(float)
+        parts = [_score_block(panel, aux, lo, hi, weights, rules, rank) for lo, hi in bounds]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=(4 * T * N + AUX_ROWS * N) * 8)
+        try:
+            buf = np.ndarray((4 * T * N + AUX_ROWS * N,), dtype=np.float64, buffer=shm.buf)
+            panel = buf[:4 * T * N].reshape(4, T, N)
+            for i, f in enumerate(PANEL_FIELDS):
+                panel[i] = bars[f].to_numpy(dtype=float)
+            buf[4 * T * N:].reshape(AUX_ROWS, N)[:] = np.vstack(aux_rows)
+            logger.info(f"并行打分：{N} 支 × {T} 日，{workers} 进程 / {len(bounds)} 分片")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context(),
+                                     initializer=_attach, initargs=(shm.name, T, N)) as ex:
+                futures = [ex.submit(_score_shard, lo, hi, weights, rules, rank) for lo, hi in bounds]
+                parts = [fu.result() for fu in futures]
+            del buf, panel
+        finally:
+            shm.close()
+            shm.unlink()
+
+    names = active_factors(weights)
+    ranked: List[int] = []
+    if rank:
+        # 各分片候选已按同一规则预选，再合并选一次即为全局结果
+        top = TopK(rules.top_n, rules.max_per_industry) if rules else TopK(sum(len(p["top"]) for p in parts))
+        for p in parts:
+            top.extend(p["top"])
+        ranked = [idx for _, _, idx, _ in top.result()]
+    filtered: Dict[str, int] = {}
+    for p in parts:
+        for k, v in p["filtered"].items():
+            filtered[k] = filtered.get(k, 0) + v
+    cat = lambda key: np.concatenate([p[key] for p in parts]) if parts else np.empty(0)
+    return PanelScores(
+        symbols=symbols,
+        factor_names=names,
+        factors=np.vstack([p["factors"] for p in parts]) if parts else np.empty((0, len(names))),
+        total=cat("total"), valid=cat("valid").astype(bool), eligible=cat("eligible").astype(bool),
+        price=cat("price"), change_pct=cat("change_pct"), volume_ratio=cat("volume_ratio"),
+        ranked=ranked, filtered=filtered,
+    )
@@ -0,0 +1,29 @@
+"""
+stock_selectors/extra_factors.py
+扩展因子示例 —— ATR 波动率、OBV 能量潮
+
+  · 默认已在 config.FACTOR_MODULES 中注册，但不在 FACTOR_WEIGHTS 里（权重为 0），不会被计算；
+    在 FACTOR_WEIGHTS 中给出权重即可启用
+  · 新因子照此写法：@factor 声明名称、输入列、回看根数，函数接收 FactorPanel、返回长度 N 的 0~1 向量
+"""
+import numpy as np
+
+from stock_selectors.factors import FactorPanel, factor
+
+
+@factor("atr_score", inputs=("close", "high", "low"), lookback=15, label="波动")
+def _atr_score(p: FactorPanel) -> np.ndarray:
+    """14 日 ATR 占收盘价的比例，波动越小得分越高（1% 以下满分，6% 以上 0 分）"""
+    c, h, l = p.c[-15:], p.h[-14:], p.l[-14:]
+    prev = c[:-1]
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev)))
+    atr_pct = np.nanmean(tr, axis=0) / c[-1]
+    return np.clip(1 - (atr_pct - 0.01) / 0.05, 0, 1)
+
+
+@factor("obv_trend", inputs=("close", "volume"), lookback=11, label="OBV")
+def _obv_trend(p: FactorPanel) -> np.ndarray:
+    """近 10 日 OBV 净变化占同期成交量的比例，-1~1 映射到 0~1（量价同向上涨得分高）"""
+    d = np.sign(np.diff(p.c[-11:], axis=0))
+    v = p.v[-10:]
+    return np.clip(((d * v).sum(axis=0) / (v.sum(axis=0) + 1) + 1) / 2, 0, 1)
@@ -0,0 +1,302 @@
+"""
+stock_selectors/factors.py
+向量化因子计算 —— 输入「日期 × 股票」矩阵，一次算出全部股票的因子
+
+  · 各股票上市 / 停牌天数不同，先按收盘价是否有效把每列「右对齐」：
+    第 -1 行是每只股票最近一根有效 K 线，第 -6 行是它往前第 5 根，依此类推
+  · 逐日递推的指标（EMA / MACD）沿时间轴循环、在股票维度上向量化，
+    面板只有几十行，循环次数与股票数无关
+  · 因子注册表：每个因子声明输入列、回看根数和一个作用于整张面板的计算函数（@factor 注册）；
+    只计算权重非零的因子，EMA / MACD、RSI 涨跌幅、均量等中间量由 FactorPanel 按需计算并在因子间共享
+  · 新因子写成一个小模块，用 @factor 注册后加进 config.FACTOR_MODULES 和 FACTOR_WEIGHTS 即可（示例见 extra_factors.py）
+  · 计算口径与原 _score_one 逐只计算完全一致，_score_one 现在也只是单列调用本模块
+"""
+import importlib
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import FACTOR_MODULES
+
+logger = logging.getLogger(__name__)
+
+MIN_BARS = 30          # 有效 K 线少于 30 根不参与打分
+
+# 因子可声明的输入列
+INPUTS = ("close", "high", "low", "volume", "pe", "north", "sentiment")
+
+
+def right_align(close: np.ndarray, *others: np.ndarray) -> Tuple[List[np.ndarray], np.ndarray]:
+    """按 close 的有效性把每列有效值挪到底部（保持时间顺序），返回 (对齐后的矩阵列表, 每列有效根数)"""
+    valid = np.isfinite(close)
+    order = np.argsort(valid, axis=0, kind="stable")
+    aligned = [np.take_along_axis(a, order, axis=0) for a in (close,) + others]
+    return aligned, valid.sum(axis=0)
+
+
+def ema_path(x: np.ndarray, n: int) -> np.ndarray:
+    """逐列 EMA，以每列第一个有效值为初值；前导 NaN 保持 NaN"""
+    k = 2 / (n + 1)
+    out = np.empty_like(x)
+    e = np.full(x.shape[1], np.nan)
+    for t in range(len(x)):
+        xt = x[t]
+        e = np.where(np.isnan(e), xt, xt * k + e * (1 - k))
+        out[t] = e
+    return out
+
+
+# ──────────────────────────────────────────────────────────────
+# 面板 + 共享中间量
+# ──────────────────────────────────────────────────────────────
+
+class FactorPanel:
+    """
+    一个分片的右对齐面板；c / h / l / v 在第一次用到时才对齐，
+    ema / macd / gains_losses / avg_volume 等中间量在同一面板上只算一次，供多个因子共享
+    """
+
+    def __init__(self, close: np.ndarray, high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                 volume: Optional[np.ndarray] = None, pe=None, north=None, sentiment=None):
+        valid = np.isfinite(close)
+        self.size = close.shape[1]
+        self.n = valid.sum(axis=0)
+        self._order = np.argsort(valid, axis=0, kind="stable")
+        self._raw = {"close": close, "high": high, "low": low,
+                     "volume": None if volume is None else np.nan_to_num(volume)}
+        neutral = np.full(self.size, 0.5)
+        self.pe = np.full(self.size, np.nan) if pe is None else np.asarray(pe, dtype=float)
+        self.north = neutral if north is None else np.asarray(north, dtype=float)
+        self.sentiment = neutral if sentiment is None else np.asarray(sentiment, dtype=float)
+        self._memo: Dict[tuple, object] = {}
+
+    def memo(self, key: tuple, fn: Callable[[], object]):
+        if key not in self._memo:
+            self._memo[key] = fn()
+        return self._memo[key]
+
+    def _aligned(self, col: str) -> np.ndarray:
+        def align():
+            raw = self._raw[col]
+            if raw is None:
+                raise ValueError(f"面板缺少输入列 {col}")
+            return np.take_along_axis(raw, self._order, axis=0)
+        return self.memo(("col", col), align)
+
+    c = property(lambda self: self._aligned("close"))
+    h = property(lambda self: self._aligned("high"))
+    l = property(lambda self: self._aligned("low"))
+    v = property(lambda self: self._aligned("volume"))
+
+    def ema(self, n: int) -> np.ndarray:
+        return self.memo(("ema", n), lambda: ema_path(self.c, n))
+
+    def macd(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(DIF, DEA) 全路径"""
+        def calc():
+            dif = self.ema(12) - self.ema(26)
+            return dif, ema_path(dif, 9)
+        return self.memo(("macd",), calc)
+
+    def gains_losses(self, window: int = 14) -> Tuple[np.ndarray, np.ndarray]:
+        """近 window 日平均涨幅 / 平均跌幅（RSI 的分子分母）"""
+        def calc():
+            d = np.diff(self.c[-(window + 1):], axis=0)
+            return np.maximum(d, 0).mean(axis=0), np.maximum(-d, 0).mean(axis=0)
+        return self.memo(("gl", window), calc)
+
+    def avg_volume(self, days: int) -> np.ndarray:
+        """最新一根之前 days 根的平均成交量"""
+        return self.memo(("avg_v", days), lambda: self.v[-(days + 1):-1].mean(axis=0))
+
+
+# ──────────────────────────────────────────────────────────────
+# 注册表
+# ──────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Factor:
+    name: str
+    compute: Callable[[FactorPanel], np.ndarray]    # 面板 → 长度 N 的 0~1 向量
+    inputs: Tuple[str, ...]
+    lookback: int                                   # 需要的最少有效 K 线根数
+    label: str                                      # 报告中的简称
+
+
+FACTORS: Dict[str, Factor] = {}
+
+
+def factor(name: str, inputs: Sequence[str] = ("close",), lookback: int = 1, label: str = ""):
+    """注册因子的装饰器；同名重复注册时后者覆盖前者"""
+    bad = [i for i in inputs if i not in INPUTS]
+    if bad:
+        raise ValueError(f"因子 {name} 声明了未知输入 {bad}（可选 {', '.join(INPUTS)}）")
+
+    def deco(fn: Callable[[FactorPanel], np.ndarray]):
+        FACTORS[name] = Factor(name, fn, tuple(inputs), lookback, label or name)
+        return fn
+    return deco
+
+
+def factor_label(name: str) -> str:
+    f = FACTORS.get(name)
+    return f.label if f else name
+
+
+def active_factors(weights: Mapping[str, float]) -> List[str]:
+    """权重非零的已注册因子（按注册顺序）"""
+    return [k for k in FACTORS if weights.get(k, 0)]
+
+
+def required_inputs(names: Iterable[str]) -> set:
+    return {i for k in names for i in FACTORS[k].inputs}
+
+
+# ──────────────────────────────────────────────────────────────
+# 内置因子
+# ──────────────────────────────────────────────────────────────
+
+@factor("momentum_5d", lookback=6, label="5日动量")
+def _momentum_5d(p: FactorPanel) -> np.ndarray:
+    c = p.c
+    # 分母价格必须为正（脏数据已在 news/bar_quality.py 置空，这里兜底），否则按中性
+    return np.where(c[-6] > 0, np.clip(((c[-1] - c[-6]) / c[-6] + 0.08) / 0.16, 0, 1), 0.5)
+
+
+@factor("momentum_20d", lookback=21, label="20日动量")
+def _momentum_20d(p: FactorPanel) -> np.ndarray:
+    c = p.c
+    return np.where(c[-21] > 0, np.clip(((c[-1] - c[-21]) / c[-21] + 0.12) / 0.24, 0, 1), 0.5)
+
+
+@factor("volume_ratio", inputs=("volume",), lookback=21, label="量比")
+def _volume_ratio(p: FactorPanel) -> np.ndarray:
+    return np.clip((p.v[-1] / (p.avg_volume(20) + 1) - 0.5) / 3.5, 0, 1)
+
+
+@factor("macd_signal", lookback=MIN_BARS, label="MACD")
+def _macd_signal(p: FactorPanel) -> np.ndarray:
+    dif, dea = p.macd()
+    above = dif[-1] > dea[-1]
+    cross = (dif[-2] < dea[-2]) & above
+    return np.where(cross, 1.0, np.where(above, 0.5, 0.0))
+
+
+@factor("rsi_score", lookback=15, label="RSI")
+def _rsi_score(p: FactorPanel) -> np.ndarray:
+    ag, al = p.gains_losses(14)
+    rsi = np.where(al == 0, 100.0, 100 - 100 / (1 + ag / al))
+    return np.select([(rsi >= 40) & (rsi <= 65), (rsi >= 30) & (rsi <= 75), rsi < 30], [1.0, 0.6, 0.3], default=0.1)
+
+
+@factor("kdj_signal", inputs=("close", "high", "low"), lookback=9, label="KDJ")
+def _kdj_signal(p: FactorPanel) -> np.ndarray:
+    ln, hn = np.nanmin(p.l[-9:], axis=0), np.nanmax(p.h[-9:], axis=0)
+    rsv = (p.c[-1] - ln) / (hn - ln + 1e-9) * 100
+    K = rsv * (2 / 3) + 50 * (1 / 3)
+    D = K * (2 / 3) + 50 * (1 / 3)
+    return np.where((K > D) & (K < 80), 1.0, 0.3)
+
+
+@factor("boll_position", lookback=20, label="布林")
+def _boll_position(p: FactorPanel) -> np.ndarray:
+    win = p.c[-20:]
+    mid, std = win.mean(axis=0), win.std(axis=0)
+    return np.clip((p.c[-1] - (mid - 2 * std)) / (4 * std + 1e-9), 0, 1)
+
+
+@factor("turnover_rate", inputs=("volume",), lookback=6, label="换手")
+def _turnover_rate(p: FactorPanel) -> np.ndarray:
+    rv5 = p.v[-1] / (p.avg_volume(5) + 1)
+    return np.clip((rv5 - 0.8) / 2.0, 0, 1)
+
+
+@factor("pe_score", inputs=("pe",), lookback=0, label="估值")
+def _pe_score(p: FactorPanel) -> np.ndarray:
+    pe = p.pe
+    # NaN = 基本面缺失 → 中性
+    return np.select(
+        [np.isnan(pe), (pe > 0) & (pe <= 20), (pe > 20) & (pe <= 40), (pe > 40) & (pe <= 70), pe > 70],
+        [0.5, 1.0, 0.7, 0.4, 0.1],
+        default=0.5,
+    )
+
+
+@factor("north_flow", inputs=("north",), lookback=0, label="北向")
+def _north_flow(p: FactorPanel) -> np.ndarray:
+    return p.north
+
+
+@factor("news_sentiment", inputs=("sentiment",), lookback=0, label="情绪")
+def _news_sentiment(p: FactorPanel) -> np.ndarray:
+    return p.sentiment
+
+
+# ──────────────────────────────────────────────────────────────
+# 计算入口
+# ──────────────────────────────────────────────────────────────
+
+def evaluate(panel: FactorPanel, names: Optional[Sequence[str]] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    names: 要计算的因子（默认全部已注册因子）
+    返回 ({因子名: 长度 N 的 0~1 向量}, 有效掩码)；无效列的因子值无意义
+    """
+    names = list(FACTORS) if names is None else list(names)
+    need = max([MIN_BARS] + [FACTORS[k].lookback for k in names])
+    c = panel.c
+    f: Dict[str, np.ndarray] = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # 有效性只看回看长度与最新价；各因子自己的分母等兜底在因子函数内处理
+        valid = (panel.n >= need) & (c[-1] > 0)
+        for k in names:
+            f[k] = np.asarray(FACTORS[k].compute(panel), dtype=float)
+    return f, valid
+
+
+def compute_factors(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                    pe: np.ndarray, north: np.ndarray, sentiment: np.ndarray,
+                    names: Optional[Sequence[str]] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """close/high/low/volume: T × N（缺失为 NaN）；pe/north/sentiment: 长度 N；names 见 evaluate"""
+    return evaluate(FactorPanel(close, high, low, volume, pe, north, sentiment), names)
+
+
+def panel_quote_stats(p: FactorPanel) -> Dict[str, np.ndarray]:
+    """最新价、涨跌幅（%）、量比（当日量 / 前 20 日均量），与因子共用同一面板的均量"""
+    c, v = p.c, p.v
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_v = p.avg_volume(20)
+        return {
+            "price": np.round(c[-1], 2),
+            "change_pct": np.round(np.where(c[-2] > 0, (c[-1] - c[-2]) / c[-2] * 100, 0.0), 2),
+            "volume_ratio": np.round(np.where(avg_v > 0, v[-1] / avg_v, 1.0), 2),
+        }
+
+
+def quote_stats(close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+    return panel_quote_stats(FactorPanel(close, volume=volume))
+
+
+def weighted_total(factors: Dict[str, np.ndarray], weights: Dict[str, float], n: int) -> np.ndarray:
+    """加权平均总分；weights 中没有算出的因子按中性 0.5 计"""
+    w = sum(weights.values())
+    if not w:
+        return np.zeros(n)
+    total = np.zeros(n)
+    for k, wt in weights.items():
+        total += factors.get(k, np.full(n, 0.5)) * wt
+    return np.round(total / w, 4)
+
+
+def column(values: Sequence[float]) -> np.ndarray:
+    """单只股票的序列 → T × 1 矩阵"""
+    return np.asarray(values, dtype=float).reshape(-1, 1)
+
+
+# 扩展因子模块：导入即注册
+for _mod in FACTOR_MODULES:
+    try:
+        importlib.import_module(_mod)
+    except Exception as e:
+        logger.warning(f"因子模块 {_mod} 加载失败: {e}")
@@ -0,0 +1,111 @@
+"""
+stock_selectors/fundamentals.py
+基本面缓存（PE / PB / 总市值 / 股息率）
+
+  · 每个字段独立 TTL，过期才重新拉取；一次运行内只批量刷新过期的股票
+  · 取不到的字段记为 None（缺失），而不是 0.0，调用方据此显式处理
+  · 持久化为 CACHE_DIR/fundamentals.json，跨运行复用
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import CACHE_DIR, CONCURRENT_WORKERS, FUNDAMENTAL_TTL_HOURS
+from utils.http_cache import get_http_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import yfinance as yf
+    YF_OK = True
+except ImportError:
+    YF_OK = False
+
+STORE_PATH = os.path.join(CACHE_DIR, "fundamentals.json")
+
+# 字段 → yfinance info 中的键
+INFO_KEYS = {
+    "pe":             "trailingPE",
+    "pb":             "priceToBook",
+    "market_cap":     "marketCap",
+    "dividend_yield": "dividendYield",
+}
+
+
+def _num(v) -> Optional[float]:
+    try:
+        v = float(v)
+    except (TypeError, ValueError):
+        return None
+    return v if v == v else None        # NaN 视为缺失
+
+
+class FundamentalStore:
+    """
+    {symbol: {field: [value 或 None, 拉取时间戳]}}
+    字段不存在 = 从未拉取；value 为 None = 已拉取但数据源没有该字段
+    """
+
+    def __init__(self, path: str = STORE_PATH, ttl_hours: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.ttl = {f: h * 3600 for f, h in (ttl_hours or FUNDAMENTAL_TTL_HOURS).items()}
+        self._data: Dict[str, Dict[str, list]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"基本面缓存读取失败，将重新拉取: {e}")
+
+    def get(self, symbol: str, field: str) -> Optional[float]:
+        entry = self._data.get(symbol, {}).get(field)
+        return entry[0] if entry else None
+
+    def stale_fields(self, symbol: str, now: Optional[float] = None,
+                     fields: Optional[List[str]] = None) -> List[str]:
+        now = now or time.time()
+        rec = self._data.get(symbol, {})
+        return [f for f, ttl in self.ttl.items()
+                if (fields is None or f in fields) and (f not in rec or now - rec[f][1] > ttl)]
+
+    def refresh(self, symbols: List[str], fields: Optional[List[str]] = None) -> int:
+        """只刷新有过期字段的股票（fields 限定关心的字段，默认全部），返回实际拉取的股票数"""
+        now = time.time()
+        stale = {s: fs for s in symbols if (fs := self.stale_fields(s, now, fields))}
+        if not stale or not YF_OK:
+            return 0
+        logger.info(f"基本面缓存：{len(symbols) - len(stale)} 支命中，{len(stale)} 支需刷新")
+        with ThreadPoolExecutor(max_workers=CONCURRENT_WORKERS) as ex:
+            fetched = dict(zip(stale, ex.map(_fetch_info, stale)))
+        for sym, info in fetched.items():
+            if info is None:
+                continue            # 拉取失败：保持过期状态，下次运行重试
+            rec = self._data.setdefault(sym, {})
+            for f in stale[sym]:
+                rec[f] = [_num(info.get(INFO_KEYS[f])), now]
+        self.save()
+        return len(stale)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+
+def _fetch_info(symbol: str) -> Optional[dict]:
+    """失败或被限流（.info 返回空）时返回 None，refresh 不写入，下次运行重试"""
+    try:
+        info = get_http_cache().call(f"yf-info|{symbol}", lambda: yf.Ticker(symbol).info)
+    except Exception as e:
+        logger.debug(f"[{symbol}] 基本面拉取失败: {e}")
+        return None
+    if not info:
+        logger.debug(f"[{symbol}] 基本面返回为空（可能被限流）")
+        return None
+    return info
@@ -0,0 +1,34 @@
+"""
+股票行业映射模块
+"""
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_INDUSTRY = "其他"
+
+# 加载行业映射
+STOCK_INDUSTRY = {}
+try:
+    json_path = os.path.join(os.path.dirname(__file__), "..", "stock_industry.json")
+    with open(json_path, "r", encoding="utf-8") as f:
+        STOCK_INDUSTRY = json.load(f)
+    logger.info(f"✅ 加载了 {len(STOCK_INDUSTRY)} 个股票行业")
+except Exception as e:
+    logger.warning(f"⚠️ 无法加载股票行业文件: {e}")
+
+
+def get_industry(code: str) -> str:
+    """
+    获取股票所属行业
+
+    Args:
+        code: 股票代码，可以是 "600519" 或 "600519.SS"
+
+    Returns:
+        str: 行业名称，找不到时返回 "其他"
+    """
+    clean_code = code.split(".")[0]
+    return STOCK_INDUSTRY.get(clean_code, UNKNOWN_INDUSTRY)
@@ -1,15 +1,17 @@
 """
 selectors/multi_factor.py  — GitHub Actions 兼容版
 """
-import logging, time
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 import numpy as np
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 try:
-    import yfinance as yf
+    import yfinance  # noqa: F401  只检测是否安装，下载统一由 news/bars.py 负责
     YF_AVAILABLE = True
 except ImportError:
     YF_AVAILABLE = False
@@ -18,6 +20,18 @@ except ImportError:
 
 # 使用外部股票名称文件
 from stock_selectors.stock_names import get_stock_name as _get_stock_name
+from news.north_flow import ingest_drops, north_flow_scores
+from news.bars import load_checked_bars, load_raw_bars
+from news.sentiment import news_sentiment_scores
+from stock_selectors.attribution import attribute, drivers_text, rank_text
+from stock_selectors.engine import score_universe
+from stock_selectors.factors import MIN_BARS, active_factors, column, compute_factors, required_inputs
+from stock_selectors.fundamentals import FundamentalStore
+from stock_selectors.industry import get_industry
+from stock_selectors.neutralize import neutralize
+from stock_selectors.score_table import ScoreTable
+from stock_selectors.selection import SelectionRules, code_ranks, is_st, select_top
+from stock_selectors.universe import MARKETS, clean_code, market_pool, to_yf_code
 
 STOCK_NAME_MAP_OLD = {
     "600519": "贵州茅台", "000858": "五粮液", "300750": "宁德时代",
@@ -41,7 +55,7 @@ def get_stock_name_old(code: str) -> str:
     return STOCK_NAME_MAP.get(clean_code, clean_code)
 
 
-@dataclass
+@dataclass(slots=True)
 class StockScore:
     code: str
     name: str
@@ -51,8 +65,11 @@ class StockScore:
     factor_scores: Dict[str, float] = field(default_factory=dict)
     buy_reason: str = ""
     risk_tip: str = ""
-    pe: float = 0.0
+    pe: Optional[float] = None      # None = 基本面缺失
     volume_ratio: float = 0.0
+    score_pct: Optional[float] = None                                  # 总分在当日有效股票中的分位
+    contributions: Dict[str, float] = field(default_factory=dict)     # 各因子对总分的加权贡献
+    percentiles: Dict[str, float] = field(default_factory=dict)       # 各因子值的全市场分位
 
 
 CANDIDATE_STOCKS = [
@@ -74,58 +91,13 @@ CANDIDATE_STOCKS = [
 ]
 
 
-def _ema(data, n):
-    k, r = 2/(n+1), [data[0]]
-    for v in data[1:]: r.append(v*k + r[-1]*(1-k))
-    return r
-
-def _macd(close, fast=12, slow=26, sig=9):
-    dif = [f-s for f,s in zip(_ema(close,fast), _ema(close,slow))]
-    dea = _ema(dif, sig)
-    return dif, dea
-
-def _rsi(close, p=14):
-    g=[max(close[i]-close[i-1],0) for i in range(1,len(close))]
-    l=[max(close[i-1]-close[i],0) for i in range(1,len(close))]
-    if len(g)<p: return 50.0
-    ag,al = sum(g[-p:])/p, sum(l[-p:])/p
-    return 100 if al==0 else 100-100/(1+ag/al)
-
-def _boll_pos(close, p=20):
-    if len(close)<p: return 0.5
-    r=close[-p:]; mid=sum(r)/p; std=(sum((x-mid)**2 for x in r)/p)**.5
-    return (close[-1]-(mid-2*std))/((4*std)+1e-9)
-
-
-def _score_one(close,high,low,volume,pe,weights):
-    if len(close)<30: return None
-    s={}
-    s["momentum_5d"]  = float(np.clip((( close[-1]-close[-6])/close[-6]+0.08)/0.16,0,1))
-    s["momentum_20d"] = float(np.clip(((close[-1]-close[-21])/close[-21]+0.12)/0.24,0,1))
-    avg_v = sum(volume[-21:-1])/20 if len(volume)>=21 else sum(volume)/len(volume)
-    vr = volume[-1]/(avg_v+1)
-    s["volume_ratio"] = float(np.clip((vr-0.5)/3.5,0,1))
-    dif,dea = _macd(close)
-    cross = dif[-2]<dea[-2] and dif[-1]>dea[-1]
-    s["macd_signal"] = 1.0 if cross else (0.5 if dif[-1]>dea[-1] else 0.0)
-    rsi=_rsi(close)
-    s["rsi_score"] = 1.0 if 40<=rsi<=65 else (0.6 if 30<=rsi<=75 else (0.3 if rsi<30 else 0.1))
-    if len(close)>=9:
-        ln,hn=min(low[-9:]),max(high[-9:])
-        rsv=(close[-1]-ln)/(hn-ln+1e-9)*100
-        K=rsv*(2/3)+50*(1/3); D=K*(2/3)+50*(1/3)
-        s["kdj_signal"] = 1.0 if K>D and K<80 else 0.3
-    else: s["kdj_signal"]=0.5
-    s["boll_position"] = float(np.clip(_boll_pos(close),0,1))
-    rv5=volume[-1]/(sum(volume[-6:-1])/5+1) if len(volume)>=6 else 1
-    s["turnover_rate"] = float(np.clip((rv5-0.8)/2.0,0,1))
-    if   0<pe<=20:  s["pe_score"]=1.0
-    elif 20<pe<=40: s["pe_score"]=0.7
-    elif 40<pe<=70: s["pe_score"]=0.4
-    elif pe>70:     s["pe_score"]=0.1
-    else:           s["pe_score"]=0.5
-    s["north_flow"]=0.5
-    return s
+def _score_one(close,high,low,volume,pe,weights,north=0.5,sentiment=0.5):
+    """单只股票打分（向量化引擎的单列调用）"""
+    if len(close)<MIN_BARS: return None
+    f,_=compute_factors(column(close),column(high),column(low),column(volume),
+                        np.array([np.nan if pe is None else pe]),np.array([north]),np.array([sentiment]),
+                        names=active_factors(weights))
+    return {k:float(v[0]) for k,v in f.items()}
 
 
 def _total(fs,weights):
@@ -141,6 +113,7 @@ def _reason(s):
     if s.get("momentum_5d",0)>=0.7: t.append("短线强势")
     if s.get("momentum_20d",0)>=0.7:t.append("中期趋势向上")
     if s.get("pe_score",0)>=0.8:    t.append("低估值")
+    if s.get("news_sentiment",0.5)>=0.7: t.append("新闻面偏多")
     return "、".join(t) or "多因子综合评分较高"
 
 def _risk(s):
@@ -148,67 +121,147 @@ def _risk(s):
     if s.get("rsi_score",0)<=0.15:  t.append("RSI超买注意回调")
     if s.get("momentum_5d",0)>=0.88:t.append("短线涨幅较大")
     if s.get("volume_ratio",0)>=0.92:t.append("量能极度放大需警惕")
+    if s.get("news_sentiment",0.5)<=0.3: t.append("近期负面新闻较多")
     return "；".join(t) or "风险适中"
 
 
-def run_selector(weights, top_n=10, stock_pool=None):
-    if not YF_AVAILABLE:
-        return _demo(top_n)
+# 连续型因子做行业中性化；MACD/KDJ/RSI 为绝对信号，保持原值
+NEUTRAL_FACTORS=["momentum_5d","momentum_20d","volume_ratio","turnover_rate","boll_position","pe_score"]
 
-    pool = CANDIDATE_STOCKS
+
+def _apply_industry_neutral(F, industries, pe, weights, method):
+    """对全部候选的因子矩阵做行业内标准化，并向量化重算总分"""
+    ey=pd.Series(np.where(pe>0,1/pe,np.nan),index=F.index)   # 盈利收益率，越高越便宜
+    F=neutralize(F,industries,method=method,columns=NEUTRAL_FACTORS,overrides={"pe_score":ey})
+    w=pd.Series(weights,dtype=float)
+    tot=(F.reindex(columns=w.index).fillna(0.5)*w).sum(axis=1)/(w.sum() or 1)
+    return F,tot.round(4).to_numpy()
+
+
+def candidate_pool(market="CN", stock_pool=None):
+    """候选池 [(Yahoo 代码, 名称, 行业)]：给了 stock_pool 时用它，否则用该市场的默认池"""
     if stock_pool:
-        pool = []
-        for c in stock_pool:
-            if "." in c:
-                yf_code = c
-                clean_code = c.split(".")[0]
+        return [(to_yf_code(c), get_stock_name(clean_code(c)), "") for c in stock_pool]
+    return CANDIDATE_STOCKS if market=="CN" else market_pool(market)
+
+
+def run_selector(weights, top_n=10, stock_pool=None, industry_neutral=None, max_per_industry=0,
+                 market="CN", store=None, offline=False):
+    """
+    industry_neutral: None / "rank" / "zscore"，在行业内对因子做截面标准化
+    max_per_industry: 同一行业最多入选几支（0 = 不限）
+    market: "CN" / "HK" / "US"，stock_pool 为空时使用该市场的默认候选池
+    store: 共享的 FundamentalStore（多市场并发时由 run_markets 统一刷新），None = 本次新建
+    offline: 只用本地缓存的 K 线 / 基本面 / 北向 / 情绪数据，不联网（CLI 离线重算）
+    全池 K 线一次批量读取，因子由向量化引擎计算（大股票池自动多进程），
+    入选约束与有界堆 Top-K 见 stock_selectors/selection.py
+    """
+    tag=MARKETS[market].name
+    if not YF_AVAILABLE and not offline:       # 离线只读缓存，不需要 yfinance
+        return _demo(top_n) if market=="CN" else ScoreTable.from_rows([])
+
+    pool = candidate_pool(market, stock_pool)
+    syms=[sym for sym,*_ in pool]
+    if not syms:
+        return ScoreTable.from_rows([])
+
+    if store is None:
+        store=FundamentalStore()
+        if not offline: store.refresh(syms)
+    inputs=required_inputs(active_factors(weights))     # 权重为 0 的因子不算，它们的数据也不取
+    north={}
+    if market=="CN" and "north" in inputs:      # 北向资金只覆盖 A 股
+        ingest_drops()
+        north=north_flow_scores(syms)
+        if north: logger.info(f"北向因子覆盖 {len(north)}/{len(pool)} 支")
+    senti=news_sentiment_scores(syms) if "sentiment" in inputs else {}
+    if senti: logger.info(f"[{tag}] 新闻情绪因子覆盖 {len(senti)}/{len(pool)} 支")
+
+    logger.info(f"[{tag}] 选股开始，候选 {len(pool)} 支")
+    bars,quality=load_checked_bars(syms,offline=offline)
+    if quality.excluded:
+        logger.info(f"[{tag}] 数据质量剔除 {len(quality.excluded)} 支: "+"、".join(f"{s}({r})" for s,r in list(quality.excluded.items())[:10]))
+    if "Close" not in bars or bars["Close"].dropna(how="all").empty:
+        logger.warning(f"[{tag}] K线数据为空" + ("，使用演示数据" if market=="CN" else ""))
+        return _demo(top_n) if market=="CN" else ScoreTable.from_rows([])
+
+    codes=[clean_code(s) for s in syms]
+    pe=np.array([np.nan if store.get(s,"pe") is None else store.get(s,"pe") for s in syms],dtype=float)
+    nv=np.array([north.get(c,0.5) for c in codes]); sv=np.array([senti.get(c,0.5) for c in codes])
+    names=[nm if nm not in ("",sym,c) else get_stock_name(c) for c,(sym,nm,*_) in zip(codes,pool)]
+    industries={c:(rest[0] if rest and rest[0] else get_industry(c)) for c,(sym,name,*rest) in zip(codes,pool)}
+    ind_ids=pd.factorize(pd.Series([industries[c] for c in codes]))[0]
+    ranks=code_ranks(codes)
+    rules=SelectionRules.for_market(market,top_n,max_per_industry)
+    # 行业中性化要在全部有效股票上重算总分，之后再选股
+    ps=score_universe(bars,pe,nv,sv,weights,rules=rules,industry=ind_ids,code_rank=ranks,st=is_st(names),
+                      rank=not industry_neutral)
+    if any(ps.filtered.values()):
+        logger.info(f"[{tag}] 入选约束过滤: "+"、".join(f"{k} {v}" for k,v in ps.filtered.items() if v))
+
+    F=pd.DataFrame(ps.factors,index=codes,columns=ps.factor_names)
+    order=ps.ranked
+    if industry_neutral and ps.valid.any():
+        v=np.flatnonzero(ps.valid)
+        Fn,tot=_apply_industry_neutral(F.iloc[v],pd.Series(industries).reindex(F.index[v]),pe[v],weights,industry_neutral)
+        F.iloc[v]=Fn.reindex(columns=F.columns).to_numpy()
+        ps.total[v]=tot
+        order=[idx for _,_,idx,_ in select_top(ps.total,ps.eligible,ranks,ind_ids,rules)]
+
+    table=ScoreTable(
+        code=codes, name=names,
+        price=ps.price, change_pct=ps.change_pct, total_score=ps.total,
+        factors=F.to_numpy(), factor_names=ps.factor_names, pe=pe, volume_ratio=ps.volume_ratio,
+    )
+    attribute(table,weights,ps.valid)       # 分位以全部有效股票为参照，先算再截取 Top-N
+    top=table.take(order)
+    for i,row in enumerate(top):
+        fs=row.factor_scores
+        top.buy_reason[i]=_reason(fs); top.risk_tip[i]=_risk(fs)
+    logger.info(f"[{tag}] 选股完成：{int(ps.valid.sum())} 支有效，{int(ps.eligible.sum())} 支满足约束，推荐 Top-{len(top)}")
+    for i, s in enumerate(top[:5], 1):
+        logger.info(f"  {i}. {s.name}({s.code}) 评分:{s.total_score:.2f} {rank_text(s.score_pct)}  {drivers_text(s.contributions,s.percentiles)}")
+    return top or (_demo(top_n) if market=="CN" else top)
+
+
+def run_markets(weights, markets=("CN",), top_n=10, market_top_n=5, stock_pool=None,
+                industry_neutral=None, max_per_industry=0, offline=False):
+    """
+    各市场并发选股，返回 {市场键: ScoreTable}（按 markets 顺序）
+    K 线和基本面先对全部市场的候选合并成一次批量请求预热缓存，各市场线程随后只读缓存、各自打分，
+    总耗时取决于最慢的市场而不是各市场之和
+    stock_pool 只作用于 A 股；A 股取 top_n 支，港美股各取 market_top_n 支
+    offline=True 时跳过预热，各市场只读本地缓存
+    """
+    markets=[m for m in markets if m in MARKETS] or ["CN"]
+    store=None
+    if YF_AVAILABLE:
+        syms=[]
+        for m in markets:
+            if m=="CN":
+                syms+=[to_yf_code(c) for c in stock_pool] if stock_pool else [s for s,*_ in CANDIDATE_STOCKS]
             else:
-                clean_code = c
-                yf_code = f"{c}.SS" if c.startswith("6") or c.startswith("9") else f"{c}.SZ"
-            name = get_stock_name(clean_code)
-            pool.append((yf_code, name, ""))
-            logger.info(f"股票池: {yf_code} -> {name}")
-
-    results=[]
-    logger.info(f"选股开始，候选 {len(pool)} 支")
-    for sym,name,*_ in pool:
+                syms+=[s for s,*_ in market_pool(m)]
+        syms=list(dict.fromkeys(syms))
+        store=FundamentalStore()
+        if not offline:
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                warm=ex.submit(load_raw_bars,syms)
+                store.refresh(syms)
+                warm.result()
+
+    def one(m):
         try:
-            h=yf.Ticker(sym).history(period="3mo",interval="1d")
-            if h.empty or len(h)<30: continue
-            close=h["Close"].tolist(); high=h["High"].tolist()
-            low=h["Low"].tolist(); vol=h["Volume"].tolist()
-            pe=0.0
-            try: pe=float(getattr(yf.Ticker(sym).fast_info,"pe_ratio",0) or 0)
-            except: pass
-            fs=_score_one(close,high,low,vol,pe,weights)
-            if fs is None: continue
-            tot=_total(fs,weights)
-            price=round(close[-1],2)
-            chg=round((close[-1]-close[-2])/close[-2]*100,2) if len(close)>=2 else 0.0
-            avg_v=sum(vol[-21:-1])/20 if len(vol)>=21 else 1
-            vr=round(vol[-1]/avg_v,2) if avg_v else 1.0
-
-            clean_code = sym.split(".")[0]
-            stock_name = name if name and name != sym and name != clean_code else get_stock_name(clean_code)
-            
-            logger.info(f"处理股票: {sym} -> name={name} -> stock_name={stock_name}")
-
-            results.append(StockScore(
-                code=clean_code, name=stock_name, price=price,
-                change_pct=chg, total_score=tot, factor_scores=fs,
-                buy_reason=_reason(fs), risk_tip=_risk(fs),
-                pe=pe, volume_ratio=vr
-            ))
-            time.sleep(0.15)
+            return run_selector(weights,top_n=top_n if m=="CN" else market_top_n,
+                                stock_pool=stock_pool if m=="CN" else None,
+                                industry_neutral=industry_neutral,max_per_industry=max_per_industry,
+                                market=m,store=store,offline=offline)
         except Exception as e:
-            logger.debug(f"[{sym}] 失败: {e}")
+            logger.warning(f"[{MARKETS[m].name}] 选股失败: {e}")
+            return _demo(top_n) if m=="CN" else ScoreTable.from_rows([])
 
-    results.sort(key=lambda x:x.total_score, reverse=True)
-    top=results[:top_n]
-    logger.info(f"选股完成：{len(results)} 支有效，推荐 Top-{len(top)}")
-    for i, s in enumerate(top[:5], 1):
-        logger.info(f"  {i}. {s.name}({s.code}) 评分:{s.total_score:.2f}")
-    return top or _demo(top_n)
+    with ThreadPoolExecutor(max_workers=len(markets)) as ex:
+        return dict(zip(markets,ex.map(one,markets)))
 
 
 def _demo(n):
@@ -217,5 +270,5 @@ def _demo(n):
        ("002594","比亚迪",235.6,2.8,0.74,"短线强势、中期趋势向上"),
        ("600036","招商银行",35.8,1.9,0.72,"低估值、MACD金叉"),
        ("688981","中芯国际",58.2,4.2,0.70,"放量上涨、半导体强势")]
-    return [StockScore(code=c,name=nm,price=p,change_pct=ch,
-            total_score=sc,buy_reason=r,risk_tip="风险适中",pe=15.0,volume_ratio=1.2) for c,nm,p,ch,sc,r in d[:n]]
+    return ScoreTable.from_rows(StockScore(code=c,name=nm,price=p,change_pct=ch,
+            total_score=sc,buy_reason=r,risk_tip="风险适中",pe=15.0,volume_ratio=1.2) for c,nm,p,ch,sc,r in d[:n])
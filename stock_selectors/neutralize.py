@@ -0,0 +1,71 @@
+"""
+stock_selectors/neutralize.py
+截面标准化 —— 在行业内对因子做排名 / z-score，消除行业间的系统性差异
+（例如银行 PE 天然偏低、科技股天然偏高）
+
+全部基于 pandas groupby 对整张「股票 × 因子」矩阵一次完成，
+全市场几千支股票也只是几次向量运算
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("rank", "zscore")
+
+
+def _rank(df: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+    # 组内百分位排名，映射到 (0, 1]
+    return df.groupby(groups).rank(pct=True)
+
+
+def _zscore(df: pd.DataFrame, groups: pd.Series) -> pd.DataFrame:
+    g = df.groupby(groups)
+    z = (df - g.transform("mean")) / g.transform("std").replace(0, np.nan)
+    # logistic 近似正态 CDF，把 z 映射回 0~1 与其余因子同尺度
+    return 1.0 / (1.0 + np.exp(-1.702 * z.clip(-4, 4)))
+
+
+def neutralize(
+    factors: pd.DataFrame,
+    industries: pd.Series,
+    method: str = "rank",
+    columns: Optional[Iterable[str]] = None,
+    overrides: Optional[Dict[str, pd.Series]] = None,
+    min_group: int = 3,
+) -> pd.DataFrame:
+    """
+    factors:    index=股票代码，columns=因子名，值 0~1
+    industries: index=股票代码，值=行业
+    columns:    参与中性化的因子（默认全部）
+    overrides:  用更细的原始值代替某个因子参与组内排名（如 pe_score → 盈利收益率 1/PE）
+    min_group:  成员少于该数的行业改用全市场截面，避免单票行业恒为满分
+    """
+    if method not in METHODS:
+        raise ValueError(f"未知的中性化方法: {method}（可选 {', '.join(METHODS)}）")
+    cols = [c for c in (columns or factors.columns) if c in factors.columns]
+    if not cols or factors.empty:
+        return factors
+
+    raw = factors[cols].copy()
+    for name, series in (overrides or {}).items():
+        if name in raw.columns:
+            raw[name] = series.reindex(raw.index)
+
+    groups = industries.reindex(raw.index).fillna("其他")
+    small = groups.map(groups.value_counts()).to_numpy() < min_group
+
+    fn = _rank if method == "rank" else _zscore
+    res = fn(raw, groups)
+    if small.any():
+        # 小行业的股票与全市场全部股票比较，而不是彼此凑成一组
+        market = fn(raw, pd.Series(0, index=raw.index))
+        res.loc[small] = market.loc[small]
+    out = factors.copy()
+    out[cols] = res.fillna(0.5).round(4)
+    logger.info(f"行业中性化（{method}）：{len(cols)} 个因子，{groups[~small].nunique()} 个行业组，"
+                f"{int(small.sum())} 支小行业股票按全市场截面")
+    return out
@@ -0,0 +1,158 @@
+"""
+stock_selectors/score_table.py
+列式选股结果 —— 每个字段一列 numpy 数组，因子是一张 N × F 矩阵
+
+  · 全市场几千支股票只有十来个数组，不再是几千个对象 + 几千个 factor_scores 字典
+  · 迭代 / 下标得到 ScoreRow 行视图（只存表引用和行号），属性名与 StockScore 一致，
+    渲染、快照、版本对比等按行读取的代码无需改动
+  · take(idx) 取子表（如 Top-N），各列一次花式索引
+  · contrib / pct 两张 N × F 矩阵是因子贡献与全市场分位（见 attribution.py），score_pct 是总分分位；
+    contrib_other 是未注册因子的合计贡献（各行相同），行视图里以 "other" 出现在 contributions 中
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+COLUMNS = ("code", "name", "price", "change_pct", "total_score", "pe", "volume_ratio", "buy_reason", "risk_tip",
+           "score_pct")
+_TEXT = ("code", "name", "buy_reason", "risk_tip")
+OTHER = "other"          # contributions 中未注册因子合计贡献的键
+
+
+class ScoreRow:
+    """ScoreTable 的一行（只读视图）"""
+    __slots__ = ("_t", "_i")
+
+    def __init__(self, table: "ScoreTable", i: int):
+        self._t, self._i = table, i
+
+    code = property(lambda self: self._t.code[self._i])
+    name = property(lambda self: self._t.name[self._i])
+    price = property(lambda self: float(self._t.price[self._i]))
+    change_pct = property(lambda self: float(self._t.change_pct[self._i]))
+    total_score = property(lambda self: float(self._t.total_score[self._i]))
+    volume_ratio = property(lambda self: float(self._t.volume_ratio[self._i]))
+    buy_reason = property(lambda self: self._t.buy_reason[self._i])
+    risk_tip = property(lambda self: self._t.risk_tip[self._i])
+
+    @property
+    def pe(self) -> Optional[float]:
+        v = self._t.pe[self._i]
+        return None if np.isnan(v) else float(v)
+
+    @property
+    def score_pct(self) -> Optional[float]:
+        v = self._t.score_pct[self._i]
+        return None if np.isnan(v) else float(v)
+
+    @property
+    def factor_scores(self) -> Dict[str, float]:
+        return dict(zip(self._t.factor_names, self._t.factors[self._i].tolist()))
+
+    @property
+    def contributions(self) -> Dict[str, float]:
+        out = {k: round(v, 4) for k, v in zip(self._t.factor_names, self._t.contrib[self._i].tolist()) if v == v}
+        if out and self._t.contrib_other:
+            out[OTHER] = round(self._t.contrib_other, 4)
+        return out
+
+    @property
+    def percentiles(self) -> Dict[str, float]:
+        return {k: round(v, 4) for k, v in zip(self._t.factor_names, self._t.pct[self._i].tolist()) if v == v}
+
+    def __repr__(self) -> str:
+        return f"ScoreRow({self.code}, {self.name}, {self.total_score})"
+
+
+class ScoreTable:
+    __slots__ = COLUMNS + ("factor_names", "factors", "contrib", "pct", "contrib_other")
+
+    def __init__(self, code: Sequence[str], name: Sequence[str], price, change_pct, total_score,
+                 factors: np.ndarray, factor_names: Sequence[str], pe=None, volume_ratio=None,
+                 buy_reason: Optional[Sequence[str]] = None, risk_tip: Optional[Sequence[str]] = None,
+                 score_pct=None, contrib: Optional[np.ndarray] = None, pct: Optional[np.ndarray] = None,
+                 contrib_other: float = 0.0):
+        n = len(code)
+        self.code = np.asarray(code, dtype=object)
+        self.name = np.asarray(name, dtype=object)
+        self.price = np.asarray(price, dtype=float)
+        self.change_pct = np.asarray(change_pct, dtype=float)
+        self.total_score = np.asarray(total_score, dtype=float)
+        self.pe = np.full(n, np.nan) if pe is None else np.asarray(pe, dtype=float)
+        self.volume_ratio = np.ones(n) if volume_ratio is None else np.asarray(volume_ratio, dtype=float)
+        self.buy_reason = np.asarray([""] * n if buy_reason is None else buy_reason, dtype=object)
+        self.risk_tip = np.asarray([""] * n if risk_tip is None else risk_tip, dtype=object)
+        self.factor_names: List[str] = list(factor_names)
+        self.factors = np.asarray(factors, dtype=float).reshape(n, len(self.factor_names))
+        self.score_pct = np.full(n, np.nan) if score_pct is None else np.asarray(score_pct, dtype=float)
+        self.contrib = self._matrix(contrib, n)
+        self.pct = self._matrix(pct, n)
+        self.contrib_other = float(contrib_other)
+
+    def _matrix(self, m: Optional[np.ndarray], n: int) -> np.ndarray:
+        shape = (n, len(self.factor_names))
+        return np.full(shape, np.nan) if m is None else np.asarray(m, dtype=float).reshape(shape)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "ScoreTable":
+        """由 StockScore（或任何有同名属性的对象）列表构造，用于演示数据 / 旧快照"""
+        rows = list(rows)
+        names: Dict[str, None] = {}
+        for r in rows:
+            names.update(dict.fromkeys(r.factor_scores))
+        cols = {c: [getattr(r, c) for r in rows] for c in COLUMNS}
+        for c in ("pe", "score_pct"):
+            cols[c] = [np.nan if v is None else v for v in cols[c]]
+        factors = np.array([[r.factor_scores.get(k, 0.5) for k in names] for r in rows], dtype=float)
+        contrib = np.array([[r.contributions.get(k, np.nan) for k in names] for r in rows], dtype=float)
+        pct = np.array([[r.percentiles.get(k, np.nan) for k in names] for r in rows], dtype=float)
+        other = max((r.contributions.get(OTHER, 0.0) for r in rows), default=0.0)
+        return cls(factors=factors, factor_names=list(names), contrib=contrib, pct=pct, contrib_other=other, **cols)
+
+    def take(self, idx: Union[Sequence[int], np.ndarray]) -> "ScoreTable":
+        idx = np.asarray(idx, dtype=int)
+        t = object.__new__(ScoreTable)
+        for c in COLUMNS:
+            setattr(t, c, getattr(self, c)[idx])
+        t.factor_names = self.factor_names
+        t.factors = self.factors[idx]
+        t.contrib = self.contrib[idx]
+        t.pct = self.pct[idx]
+        t.contrib_other = self.contrib_other
+        return t
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    def __iter__(self) -> Iterator[ScoreRow]:
+        return (ScoreRow(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(np.arange(len(self))[i])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return ScoreRow(self, i)
+
+    def __repr__(self) -> str:
+        cols = {c: getattr(self, c).tolist() for c in COLUMNS}
+        mats = [m.round(6).tolist() for m in (self.factors, self.contrib, self.pct)]
+        return f"ScoreTable({cols!r}, {self.factor_names!r}, {mats!r})"
+
+    def __getstate__(self):
+        return {c: getattr(self, c) for c in self.__slots__}
+
+    def __setstate__(self, state):
+        for c, v in state.items():
+            setattr(self, c, v)
+        # 旧检查点没有归因列
+        n = len(self.code)
+        if "score_pct" not in state:
+            self.score_pct = np.full(n, np.nan)
+        for c in ("contrib", "pct"):
+            if c not in state:
+                setattr(self, c, self._matrix(None, n))
+        if "contrib_other" not in state:
+            self.contrib_other = 0.0
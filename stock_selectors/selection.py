@@ -0,0 +1,158 @@
+"""
+stock_selectors/selection.py
+选股阶段 —— 入选约束 + 有界堆 Top-K
+
+  · 约束（向量化）：近 20 日日均成交额下限、价格区间、剔除 ST（仅 A 股）、
+    剔除次新股（面板内首根有效 K 线至今不足 N 根，中途停牌不算）
+  · Top-K：按 (总分, 代码) 比较的最小堆，只保留 K 个候选，内存 O(K)；
+    设了行业上限时另按行业计数，行业已满的新候选只与本行业最小项比较替换，
+    结果与"按排名贪心、行业满了跳过"完全相同，内存仍为 O(K)
+  · 同分按代码字典序靠前者优先，与股票池顺序、分片方式无关，每次运行结果一致
+  · 分片内先各自按同一规则选出候选，父进程再对候选并集做一次选择，结果与全量选择完全相同
+"""
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import (
+    SELECT_MIN_TURNOVER, SELECT_PRICE_BAND, SELECT_EXCLUDE_ST, SELECT_MIN_LISTED_BARS,
+)
+from stock_selectors.factors import right_align
+
+TURNOVER_DAYS = 20
+
+# 被过滤原因
+LOW_TURNOVER, OUT_OF_BAND, ST, NEW_LISTING = "low_turnover", "out_of_band", "st", "new_listing"
+
+# 候选：(总分, -代码序, 下标, 行业编号)，元组越大越靠前
+Candidate = Tuple[float, int, int, int]
+
+
+@dataclass(frozen=True)
+class SelectionRules:
+    top_n: int = 10
+    max_per_industry: int = 0          # 0 = 不限
+    min_turnover: float = 0.0          # 近 20 日日均成交额下限（当地货币）
+    min_price: float = 0.0
+    max_price: float = math.inf
+    exclude_st: bool = True            # ST 是 A 股概念，for_market 只对 CN 开启
+    min_listed_bars: int = 0           # 面板内首根有效 K 线至今少于该数视为次新股
+
+    @classmethod
+    def for_market(cls, market: str, top_n: int, max_per_industry: int = 0) -> "SelectionRules":
+        lo, hi = SELECT_PRICE_BAND.get(market, (0.0, math.inf))
+        return cls(
+            top_n=top_n, max_per_industry=max_per_industry,
+            min_turnover=SELECT_MIN_TURNOVER.get(market, 0.0), min_price=lo, max_price=hi,
+            exclude_st=SELECT_EXCLUDE_ST and market == "CN", min_listed_bars=SELECT_MIN_LISTED_BARS,
+        )
+
+
+def eligible(close: np.ndarray, volume: np.ndarray, st: np.ndarray,
+             rules: SelectionRules) -> Tuple[np.ndarray, Dict[str, int]]:
+    """close/volume: T × N；st: 长度 N 的布尔向量。返回 (可入选掩码, {过滤原因: 支数})"""
+    (c, v), _ = right_align(close, np.nan_to_num(volume))
+    # 上市时长按首根有效 K 线算：bar_quality 会把停牌日置空，用有效根数会把长期停牌股误判为次新股
+    valid = np.isfinite(close)
+    listed = np.where(valid.any(axis=0), len(close) - np.argmax(valid, axis=0), 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        amount = c[-TURNOVER_DAYS:] * v[-TURNOVER_DAYS:]
+        turnover = np.nansum(amount, axis=0) / np.maximum(np.isfinite(amount).sum(axis=0), 1)
+        last = c[-1]
+        masks = {
+            LOW_TURNOVER: ~(turnover >= rules.min_turnover),
+            OUT_OF_BAND: ~((last >= rules.min_price) & (last <= rules.max_price)),
+            ST: np.asarray(st, dtype=bool) & rules.exclude_st,
+            NEW_LISTING: listed < rules.min_listed_bars,
+        }
+    ok = np.ones(c.shape[1], dtype=bool)
+    for m in masks.values():
+        ok &= ~m
+    return ok, {k: int(m.sum()) for k, m in masks.items()}
+
+
+class TopK:
+    """有界堆：保留最大的 k 个候选；max_per_industry > 0 时每个行业最多保留该数
+
+    一个容量 k 的全局最小堆 + 每行业一个已入选项的最小堆（合计恰为入选集合，不超过 k 项）：
+      · 行业未满：与全局堆顶比较，更大则挤掉全局最小项（它必然也是所在行业的最小项）
+      · 行业已满：只与本行业最小项比较，更大则替换之，全局堆里的旧项惰性删除
+    惰性删除的残留超过 k 项时重建全局堆，总内存 O(k)
+    """
+
+    def __init__(self, k: int, max_per_industry: int = 0):
+        self.k = k
+        self.cap = min(max_per_industry, k) if max_per_industry > 0 else 0
+        self._heap: List[Candidate] = []
+        self._by_industry: Dict[int, List[Candidate]] = {}
+        self._dead: Set[int] = set()         # 已被行业内替换、尚在全局堆里的候选下标
+
+    def _top(self) -> Candidate:
+        while self._heap[0][2] in self._dead:
+            self._dead.discard(heapq.heappop(self._heap)[2])
+        return self._heap[0]
+
+    def push(self, item: Candidate):
+        if self.k <= 0:
+            return
+        if not self.cap:
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+            return
+        group = self._by_industry.setdefault(item[3], [])
+        if len(group) >= self.cap:
+            if item > group[0]:
+                self._dead.add(heapq.heapreplace(group, item)[2])
+                heapq.heappush(self._heap, item)
+                if len(self._dead) > self.k:
+                    self._compact()
+            return
+        if len(self._heap) - len(self._dead) < self.k:
+            heapq.heappush(self._heap, item)
+            heapq.heappush(group, item)
+        elif item > self._top():
+            out = heapq.heapreplace(self._heap, item)
+            heapq.heappop(self._by_industry[out[3]])
+            heapq.heappush(group, item)
+
+    def _compact(self):
+        self._heap = [i for i in self._heap if i[2] not in self._dead]
+        heapq.heapify(self._heap)
+        self._dead.clear()
+
+    def extend(self, items: Iterable[Candidate]):
+        for item in items:
+            self.push(item)
+
+    def result(self) -> List[Candidate]:
+        """按排名从高到低"""
+        return sorted((i for i in self._heap if i[2] not in self._dead), reverse=True)
+
+
+def candidates(total: np.ndarray, mask: np.ndarray, code_rank: np.ndarray, industry: np.ndarray,
+               offset: int = 0) -> Iterable[Candidate]:
+    for i in np.flatnonzero(mask):
+        yield float(total[i]), -int(code_rank[i]), offset + int(i), int(industry[i])
+
+
+def select_top(total: np.ndarray, mask: np.ndarray, code_rank: np.ndarray, industry: np.ndarray,
+               rules: Optional[SelectionRules], offset: int = 0) -> List[Candidate]:
+    """rules 为 None 时不限数量，返回全部可入选股票的排名"""
+    k, cap = (rules.top_n, rules.max_per_industry) if rules else (int(mask.sum()), 0)
+    top = TopK(k, cap)
+    top.extend(candidates(total, mask, code_rank, industry, offset))
+    return top.result()
+
+
+def code_ranks(codes: List[str]) -> np.ndarray:
+    """代码的字典序名次（同分时名次小者优先）"""
+    return np.argsort(np.argsort(np.asarray(codes, dtype=str), kind="stable"), kind="stable")
+
+
+def is_st(names: Iterable[str]) -> np.ndarray:
+    return np.array(["ST" in str(n).upper() for n in names], dtype=bool)
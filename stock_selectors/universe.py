@@ -0,0 +1,91 @@
+"""
+stock_selectors/universe.py
+股票池 / 代码格式工具（A 股 / 港股 / 美股）
+
+  · 市场由 Yahoo 代码后缀判断：.SS/.SZ/.BJ = A 股，.HK = 港股，无后缀的字母代码 = 美股
+  · 涨跌幅限制只对 A 股生效，港美股不设限
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from config import STOCK_POOL, STOCK_POOL_HK, STOCK_POOL_US
+from stock_selectors.industry import STOCK_INDUSTRY
+
+
+@dataclass(frozen=True)
+class Market:
+    key: str
+    name: str
+    flag: str
+    currency: str
+    suffixes: Tuple[str, ...]
+    price_limited: bool
+    tz: str                    # 交易所所在时区，交易日按当地日期判断
+
+
+MARKETS: Dict[str, Market] = {
+    "CN": Market("CN", "A股", "🇨🇳", "¥", (".SS", ".SZ", ".BJ"), True, "Asia/Shanghai"),
+    "HK": Market("HK", "港股", "🇭🇰", "HK$", (".HK",), False, "Asia/Hong_Kong"),
+    "US": Market("US", "美股", "🇺🇸", "$", (), False, "America/New_York"),
+}
+
+
+def market_of(code: str) -> str:
+    """代码 → 市场键：600519 / 600519.SS → CN；700 / 0700.HK → HK；AAPL → US"""
+    code = code.strip().upper()
+    if code.endswith(".HK"):
+        return "HK"
+    if code.endswith(MARKETS["CN"].suffixes):
+        return "CN"
+    if code.isdigit():
+        return "CN" if len(code) == 6 else "HK"
+    return "US"
+
+
+def to_yf_code(code: str) -> str:
+    """
+    转 Yahoo 格式：600519 → 600519.SS；002594 → 002594.SZ；700 / 00700.HK → 0700.HK；
+    美股代码转大写原样返回（BRK.B → BRK-B）
+    """
+    code = code.strip().upper()
+    market = market_of(code)
+    if market == "HK":
+        return f"{int(code.split('.')[0]):04d}.HK"
+    if market == "US":
+        return code.replace(".", "-")
+    if "." in code:
+        return code
+    return f"{code}.SS" if code.startswith("6") or code.startswith("9") else f"{code}.SZ"
+
+
+def clean_code(code: str) -> str:
+    return code.split(".")[0]
+
+
+def price_limit(code: str, name: str = "") -> float:
+    """单日涨跌幅限制（小数）；港美股无限制返回 inf"""
+    if not MARKETS[market_of(code)].price_limited:
+        return math.inf
+    if "ST" in name.upper():
+        return 0.05
+    c = clean_code(code)
+    if c.startswith(("300", "301", "688", "689")):
+        return 0.20
+    if c.startswith(("4", "8")):
+        return 0.30
+    return 0.10
+
+
+def default_universe() -> List[str]:
+    """行业映射覆盖的全部股票 + 监控池，Yahoo 格式，去重保序"""
+    seen = {}
+    for c in list(STOCK_INDUSTRY) + list(STOCK_POOL):
+        seen.setdefault(to_yf_code(c), None)
+    return list(seen)
+
+
+def market_pool(market: str) -> List[Tuple[str, str, str]]:
+    """港股 / 美股候选池 [(Yahoo 代码, 名称, 行业)]；A 股候选池见 multi_factor.CANDIDATE_STOCKS"""
+    pool = {"HK": STOCK_POOL_HK, "US": STOCK_POOL_US}.get(market, {})
+    return [(to_yf_code(c), name, industry) for c, (name, industry) in pool.items()]
@@ -1,14 +1,22 @@
 """
 templates/email_builder.py
 生成精美 HTML 日报邮件 - 简化版
+v2.0：布局预编译 + 片段缓存（按内容哈希），多收件人只重渲个性化区块
 """
 
+import hashlib
+import pickle
+import re
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
-from news.aggregator import NewsItem
-from news.market_hot import SectorInfo, StockHotInfo, IndexSnapshot
+from news.models import IndexSnapshot, NewsItem, SectorInfo, StockHotInfo
+from stock_selectors.attribution import FACTOR_COLORS, contrib_label, drivers_text, rank_text
 from stock_selectors.multi_factor import StockScore
+from stock_selectors.universe import MARKETS
+from utils.edition_diff import EditionDiff
+from utils.trading_calendar import MarketStatus, closed_notes
 
 
 def _color(val: float) -> str:
@@ -27,15 +35,37 @@ def _score_bar(score: float) -> str:
     return f'<span style="color:{color};font-weight:bold;">{pct}分</span>'
 
 
+CONTRIB_BAR_PX = 120     # 贡献条总宽对应 100 分
+
+
+def _contrib_bar(s: StockScore) -> str:
+    """评分 + 全市场分位 + 按因子分段的贡献条 + 前三大贡献因子；没有归因数据（演示数据 / 旧快照）时只显示评分"""
+    out = _score_bar(s.total_score)
+    rt = rank_text(s.score_pct)
+    if rt:
+        out += f'<span style="font-size:12px;color:#888888;"> {rt}</span>'
+    contrib = s.contributions
+    if not contrib:
+        return out
+    segs = "".join(
+        f'<span title="{contrib_label(k)} +{v * 100:.1f}" style="display:inline-block;width:{round(v * CONTRIB_BAR_PX)}px;height:8px;background:{FACTOR_COLORS.get(k, "#cccccc")};"></span>'
+        for k, v in sorted(contrib.items(), key=lambda kv: -kv[1]) if round(v * CONTRIB_BAR_PX) > 0)
+    bar = f'<div style="width:{CONTRIB_BAR_PX}px;background:#f0f0f0;line-height:0;margin:4px 0;">{segs}</div>'
+    return out + bar + f'<div style="font-size:11px;color:#888888;">{drivers_text(contrib, s.percentiles)}</div>'
+
+
+INDEX_ORDER = ["上证指数", "深证成指", "创业板指", "沪深300", "科创50", "恒生指数", "道琼斯", "纳斯达克", "标普500"]
+
+
 def _section_market_overview(indices: Dict[str, IndexSnapshot]) -> str:
     if not indices: return ""
-    rows = ""
-    for name in ["上证指数", "深证成指", "创业板指", "沪深300", "科创50", "恒生指数", "道琼斯", "纳斯达克", "标普500"]:
+    rows = []
+    for name in INDEX_ORDER:
         info = indices.get(name)
         if not info: continue
         c = _color(info.change_pct)
-        rows += f'<tr><td>{name}</td><td>{info.price:,.2f}</td><td style="color:{c};">{_sign(info.change_pct)}</td></tr>'
-    return f'<div class="section"><h2>📊 全球主要指数</h2><table><thead><tr><th>指数</th><th>最新价</th><th>涨跌幅</th></tr></thead><tbody>{rows}</tbody></table></div>'
+        rows.append(f'<tr><td>{name}</td><td>{info.price:,.2f}</td><td style="color:{c};">{_sign(info.change_pct)}</td></tr>')
+    return f'<div class="section"><h2>📊 全球主要指数</h2><table><thead><tr><th>指数</th><th>最新价</th><th>涨跌幅</th></tr></thead><tbody>{"".join(rows)}</tbody></table></div>'
 
 
 def _section_news(category: str, items: List[NewsItem], icon: str) -> str:
@@ -46,45 +76,245 @@ def _section_news(category: str, items: List[NewsItem], icon: str) -> str:
 
 def _section_hot_sectors(sectors: List[SectorInfo]) -> str:
     if not sectors: return ""
-    cards = "".join([f'<div class="sector-card"><div>{s.name}</div><div style="color:{_color(s.change_pct)};">{_sign(s.change_pct)}</div></div>' for s in sectors])
+    cards = []
+    for s in sectors:
+        extra = ""
+        if s.advancers or s.decliners:
+            extra += f'<div style="font-size:12px;color:#888888;">涨{s.advancers} / 跌{s.decliners}</div>'
+        if s.leading_stock:
+            extra += f'<div style="font-size:12px;">领涨 {s.leading_stock}</div>'
+        cards.append(f'<div class="sector-card"><div>{s.name}</div><div style="color:{_color(s.change_pct)};">{_sign(s.change_pct)}</div>{extra}</div>')
+    cards = "".join(cards)
     return f'<div class="section"><h2>🔥 热门板块</h2><div class="sector-grid">{cards}</div></div>'
 
 
+def _limit_badge(status: str) -> str:
+    if not status: return ""
+    return f' <span style="background:#e84040;color:#fff;border-radius:3px;padding:0 4px;font-size:12px;">{status}</span>'
+
+
 def _section_hot_stocks(stocks: List[StockHotInfo]) -> str:
     if not stocks: return ""
-    rows = "".join([f'<tr><td>{s.code}</td><td>{s.name}</td><td>{s.price:.2f}</td><td style="color:{_color(s.change_pct)};">{_sign(s.change_pct)}</td></tr>' for s in stocks])
-    return f'<div class="section"><h2>💥 热门股票</h2><table><thead><tr><th>代码</th><th>名称</th><th>价格</th><th>涨跌幅</th></tr></thead><tbody>{rows}</tbody></table></div>'
+    rows = "".join([f'<tr><td>{s.code}</td><td>{s.name}</td><td>{s.price:.2f}</td><td style="color:{_color(s.change_pct)};">{_sign(s.change_pct)}{_limit_badge(s.limit_status)}</td><td>{s.volume_ratio:.2f}</td></tr>' for s in stocks])
+    return f'<div class="section"><h2>💥 热门股票</h2><table><thead><tr><th>代码</th><th>名称</th><th>价格</th><th>涨跌幅</th><th>量比</th></tr></thead><tbody>{rows}</tbody></table></div>'
 
 
 def _section_top_picks(picks: List[StockScore]) -> str:
     if not picks: return ""
-    rows = ""
+    rows = []
     for i, s in enumerate(picks, 1):
         medal = ["🥇", "🥈", "🥉"][i - 1] if i <= 3 else f"#{i}"
-        rows += f'<tr><td>{medal}</td><td>{s.name}<br>{s.code}</td><td>¥{s.price:.2f}<br>{_sign(s.change_pct)}</td><td>{_score_bar(s.total_score)}</td><td>{s.buy_reason}</td><td>{s.risk_tip}</td></tr>'
-    return f'<div class="section"><h2>🎯 AI量化选股 Top {len(picks)}</h2><table><thead><tr><th>排名</th><th>股票</th><th>价格</th><th>评分</th><th>信号</th><th>风险</th></tr></thead><tbody>{rows}</tbody></table></div>'
+        rows.append(f'<tr><td>{medal}</td><td>{s.name}<br>{s.code}</td><td>¥{s.price:.2f}<br>{_sign(s.change_pct)}</td><td>{_contrib_bar(s)}</td><td>{s.buy_reason}</td><td>{s.risk_tip}</td></tr>')
+    return f'<div class="section"><h2>🎯 AI量化选股 Top {len(picks)}</h2><table><thead><tr><th>排名</th><th>股票</th><th>价格</th><th>评分</th><th>信号</th><th>风险</th></tr></thead><tbody>{"".join(rows)}</tbody></table></div>'
+
+
+def _section_market_status(status: Optional[Dict[str, MarketStatus]]) -> str:
+    notes = closed_notes(status or {})
+    if not notes: return ""
+    lines = "".join(f'<p style="margin:4px 0;">{n}</p>' for n in notes)
+    return f'<div class="section" style="background:#fff8e6;color:#8a6d3b;">{lines}</div>'
+
+
+def _section_market_picks(market_picks: Optional[Dict[str, List[StockScore]]]) -> str:
+    """港股 / 美股选股，每个市场一张精简表，价格带该市场币种"""
+    blocks = []
+    for key, picks in (market_picks or {}).items():
+        if not picks or key not in MARKETS: continue
+        m = MARKETS[key]
+        rows = "".join(f'<tr><td>#{i}</td><td>{s.name}<br>{s.code}</td><td>{m.currency}{s.price:.2f}</td><td style="color:{_color(s.change_pct)};">{_sign(s.change_pct)}</td><td>{_contrib_bar(s)}</td><td>{s.buy_reason}</td></tr>'
+                       for i, s in enumerate(picks, 1))
+        blocks.append(f'<h3>{m.flag} {m.name} Top {len(picks)}</h3><table><thead><tr><th>排名</th><th>股票</th><th>价格</th><th>涨跌幅</th><th>评分</th><th>信号</th></tr></thead><tbody>{rows}</tbody></table>')
+    if not blocks: return ""
+    return f'<div class="section"><h2>🌏 港股 / 美股量化选股</h2>{"".join(blocks)}</div>'
+
+
+def _rank_move(prev_rank: int, rank: int) -> str:
+    if not prev_rank: return '<span style="color:#e84040;">新进</span>'
+    if prev_rank == rank: return '<span style="color:#888888;">持平</span>'
+    up = prev_rank > rank
+    return f'<span style="color:{"#e84040" if up else "#00b050"};">{"↑" if up else "↓"}{abs(prev_rank - rank)}</span>'
+
+
+def _section_changes(changes: Optional[EditionDiff]) -> str:
+    if changes is None or changes.empty: return ""
+    parts = []
+    moved = [p for p in changes.picks if p.rank != p.prev_rank]
+    if moved or changes.dropped_picks:
+        items = [f'{p.name} #{p.rank} {_rank_move(p.prev_rank, p.rank)}' for p in moved]
+        items += [f'{name} <span style="color:#888888;">移出</span>' for _, name in changes.dropped_picks]
+        parts.append(f'<p><b>选股排名：</b>{"；".join(items)}</p>')
+    if changes.new_sectors or changes.dropped_sectors:
+        parts.append(f'<p><b>热门板块：</b>新上榜 {"、".join(changes.new_sectors) or "无"}；掉出 {"、".join(changes.dropped_sectors) or "无"}</p>')
+    if changes.new_hot_stocks or changes.dropped_hot_stocks:
+        parts.append(f'<p><b>热门股票：</b>新上榜 {"、".join(n for _, n in changes.new_hot_stocks) or "无"}；掉出 {"、".join(n for _, n in changes.dropped_hot_stocks) or "无"}</p>')
+    if changes.index_deltas:
+        items = [f'{d.name} <span style="color:{_color(d.delta_pct)};">{_sign(d.delta_pct)}</span>' for d in changes.index_deltas]
+        parts.append(f'<p><b>指数变动：</b>{"；".join(items)}</p>')
+    fresh = [i for items in changes.new_news.values() for i in items]
+    if fresh:
+        links = "".join(f'<div class="news-item"><a href="{i.link}">{i.title}</a><span>{i.source}</span></div>' for i in fresh[:5])
+        parts.append(f'<p><b>新增资讯 {len(fresh)} 条：</b></p>{links}')
+    return f'<div class="section"><h2>🔄 自上期（{changes.prev_edition}）以来</h2>{"".join(parts)}</div>'
 
 
 CSS = '<style>body{font-family:sans-serif;background:#f0f2f5;margin:0;padding:0}.container{max-width:780px;margin:0 auto;background:#fff}.header{background:#1a1a2e;color:#fff;padding:32px 24px;text-align:center}.section{padding:20px 24px;border-bottom:1px solid #f0f0f0}.news-item{padding:10px 0}table{width:100%;border-collapse:collapse}th,td{text-align:left;padding:7px 10px;border-bottom:1px solid #f0f0f0}.sector-grid{display:flex;flex-wrap:wrap;gap:12px}.sector-card{background:#f9f9f9;border-radius:8px;padding:12px;min-width:120px}.footer{background:#1a1a2e;color:#666;text-align:center;padding:16px}</style>'
 
 
-def build_html_email(date_str: str, indices: Dict[str, IndexSnapshot], news_by_category: Dict[str, List[NewsItem]], hot_sectors: List[SectorInfo], hot_stocks: List[StockHotInfo], top_picks: List[StockScore], north_flow: Dict[str, Any]) -> str:
-    now = datetime.now().strftime("%Y年%m月%d日 %H:%M")
-    return f'''<!DOCTYPE html>
+# ──────────────────────────────────────────────────────────────
+# 布局 & 区块注册表
+# ──────────────────────────────────────────────────────────────
+# {{slot}} 为区块占位符，布局只在首次使用时编译一次
+LAYOUT = '''<!DOCTYPE html>
 <html lang="zh-CN">
-<head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">{CSS}</head>
+<head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">''' + CSS + '''</head>
 <body>
 <div class="container">
-  <div class="header"><h1>📈 全球财经 &amp; AI资讯日报</h1><p>{now}</p></div>
-  {_section_market_overview(indices)}
-  {_section_top_picks(top_picks)}
-  {_section_hot_sectors(hot_sectors)}
-  {_section_hot_stocks(hot_stocks)}
-  {_section_news("A股财经要闻", news_by_category.get("A股财经", []), "🇨🇳")}
-  {_section_news("美股要闻", news_by_category.get("美股要闻", []), "🇺🇸")}
-  {_section_news("港股要闻", news_by_category.get("港股要闻", []), "🇭🇰")}
-  {_section_news("AI大模型动态", news_by_category.get("AI大模型", []), "🤖")}
-  <div class="footer"><p>本邮件由 USTCB 财经日报机器人自动生成 · {now}</p></div>
+  {{header}}
+  {{market_status}}
+  {{changes}}
+  {{market_overview}}
+  {{top_picks}}
+  {{market_picks}}
+  {{hot_sectors}}
+  {{hot_stocks}}
+  {{news_cn}}
+  {{news_us}}
+  {{news_hk}}
+  {{news_ai}}
+  {{footer}}
 </div>
 </body>
 </html>'''
+
+# 区块名 → (构建函数, 从上下文取参数的函数)
+SECTIONS: Dict[str, Tuple[Callable[..., str], Callable[[Dict[str, Any]], tuple]]] = {
+    "header":          (lambda now: f'<div class="header"><h1>📈 全球财经 &amp; AI资讯日报</h1><p>{now}</p></div>',
+                        lambda ctx: (ctx["generated_at"],)),
+    "market_status":   (_section_market_status,   lambda ctx: (ctx["market_status"],)),
+    "changes":         (_section_changes,         lambda ctx: (ctx["changes"],)),
+    "market_overview": (_section_market_overview, lambda ctx: (ctx["indices"],)),
+    "top_picks":       (_section_top_picks,       lambda ctx: (ctx["top_picks"],)),
+    "market_picks":    (_section_market_picks,    lambda ctx: (ctx["market_picks"],)),
+    "hot_sectors":     (_section_hot_sectors,     lambda ctx: (ctx["hot_sectors"],)),
+    "hot_stocks":      (_section_hot_stocks,      lambda ctx: (ctx["hot_stocks"],)),
+    "news_cn":         (_section_news, lambda ctx: ("A股财经要闻", ctx["news_by_category"].get("A股财经", []), "🇨🇳")),
+    "news_us":         (_section_news, lambda ctx: ("美股要闻", ctx["news_by_category"].get("美股要闻", []), "🇺🇸")),
+    "news_hk":         (_section_news, lambda ctx: ("港股要闻", ctx["news_by_category"].get("港股要闻", []), "🇭🇰")),
+    "news_ai":         (_section_news, lambda ctx: ("AI大模型动态", ctx["news_by_category"].get("AI大模型", []), "🤖")),
+    "footer":          (lambda now: f'<div class="footer"><p>本邮件由 USTCB 财经日报机器人自动生成 · {now}</p></div>',
+                        lambda ctx: (ctx["generated_at"],)),
+}
+
+# 因收件人而异的区块，不进片段缓存
+PERSONAL_SECTIONS = {"top_picks"}
+
+_SLOT_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _compile_layout(layout: str) -> List[Any]:
+    """把布局拆成 [静态文本, 区块名, 静态文本, ...]，奇数位为区块名"""
+    return _SLOT_RE.split(layout)
+
+
+def _content_key(name: str, args: tuple) -> str:
+    # 以区块输入的 pickle 字节作内容指纹：numpy 矩阵（ScoreTable）按原始字节写出，
+    # 比逐元素 repr 便宜得多；个别对象不能 pickle 时退回 repr
+    try:
+        raw = pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        raw = repr(args).encode("utf-8")
+    return name + ":" + hashlib.sha1(raw).hexdigest()
+
+
+class EmailRenderer:
+    """
+    预编译布局的 HTML 渲染器
+    共享区块（指数表、新闻……）按内容哈希缓存，同一期日报只渲染一次；
+    PERSONAL_SECTIONS 中的区块每个收件人单独渲染
+    """
+
+    def __init__(self, layout: str = LAYOUT, max_fragments: int = 256):
+        self._parts = _compile_layout(layout)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._max = max_fragments
+        self.hits = 0
+        self.misses = 0
+
+    def _fragment(self, name: str, ctx: Dict[str, Any]) -> str:
+        builder, args_of = SECTIONS[name]
+        args = args_of(ctx)
+        if name in PERSONAL_SECTIONS:
+            return builder(*args)
+        key = _content_key(name, args)
+        html = self._cache.get(key)
+        if html is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = builder(*args)
+        self._cache[key] = html
+        if len(self._cache) > self._max:
+            self._cache.popitem(last=False)
+        return html
+
+    def render(self, ctx: Dict[str, Any]) -> str:
+        parts = self._parts
+        out = []
+        for i, part in enumerate(parts):
+            out.append(self._fragment(part, ctx) if i % 2 else part)
+        return "".join(out)
+
+
+_renderer: Optional[EmailRenderer] = None
+
+
+def get_renderer() -> EmailRenderer:
+    global _renderer
+    if _renderer is None:
+        _renderer = EmailRenderer()
+    return _renderer
+
+
+def _context(indices, news_by_category, hot_sectors, hot_stocks, top_picks, north_flow, generated_at=None, changes=None, market_picks=None, market_status=None) -> Dict[str, Any]:
+    return {
+        "changes": changes,
+        "generated_at": generated_at or datetime.now().strftime("%Y年%m月%d日 %H:%M"),
+        "indices": indices,
+        "news_by_category": news_by_category,
+        "hot_sectors": hot_sectors,
+        "hot_stocks": hot_stocks,
+        "top_picks": top_picks,
+        "market_picks": market_picks or {},
+        "market_status": market_status or {},
+        "north_flow": north_flow,
+    }
+
+
+def build_html_email(date_str: str, indices: Dict[str, IndexSnapshot], news_by_category: Dict[str, List[NewsItem]], hot_sectors: List[SectorInfo], hot_stocks: List[StockHotInfo], top_picks: List[StockScore], north_flow: Dict[str, Any], generated_at: Optional[str] = None, changes: Optional[EditionDiff] = None, market_picks: Optional[Dict[str, List[StockScore]]] = None, market_status: Optional[Dict[str, MarketStatus]] = None) -> str:
+    ctx = _context(indices, news_by_category, hot_sectors, hot_stocks, top_picks, north_flow, generated_at, changes, market_picks, market_status)
+    return get_renderer().render(ctx)
+
+
+def build_personalized_emails(
+    date_str: str,
+    indices: Dict[str, IndexSnapshot],
+    news_by_category: Dict[str, List[NewsItem]],
+    hot_sectors: List[SectorInfo],
+    hot_stocks: List[StockHotInfo],
+    top_picks: List[StockScore],
+    north_flow: Dict[str, Any],
+    personal: Dict[str, Dict[str, Any]],
+    generated_at: Optional[str] = None,
+    changes: Optional[EditionDiff] = None,
+    market_picks: Optional[Dict[str, List[StockScore]]] = None,
+    market_status: Optional[Dict[str, MarketStatus]] = None,
+) -> Dict[str, str]:
+    """
+    批量生成个性化邮件
+    personal: {收件人: {上下文覆盖项，如 "top_picks": [...]}}
+    共享区块只渲染一次，其余收件人直接命中片段缓存
+    """
+    base = _context(indices, news_by_category, hot_sectors, hot_stocks, top_picks, north_flow, generated_at, changes, market_picks, market_status)
+    renderer = get_renderer()
+    return {rcpt: renderer.render({**base, **overrides}) for rcpt, overrides in personal.items()}
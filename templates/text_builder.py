@@ -0,0 +1,177 @@
+"""
+templates/text_builder.py
+Markdown / 纯文本日报 —— 与 HTML 共用同一份数据（可直接来自数据快照）
+"""
+
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from news.models import IndexSnapshot, NewsItem, SectorInfo, StockHotInfo
+from stock_selectors.attribution import drivers_text, rank_text
+from stock_selectors.multi_factor import StockScore
+from stock_selectors.universe import MARKETS
+from templates.email_builder import INDEX_ORDER, build_html_email
+from utils.edition_diff import EditionDiff
+from utils.trading_calendar import MarketStatus, closed_notes
+
+NEWS_SECTIONS = [
+    ("A股财经", "A股财经要闻"),
+    ("美股要闻", "美股要闻"),
+    ("港股要闻", "港股要闻"),
+    ("AI大模型", "AI大模型动态"),
+]
+
+
+def _sign(val: float) -> str:
+    return f"+{val:.2f}%" if val > 0 else f"{val:.2f}%"
+
+
+def _score(s: StockScore) -> str:
+    """评分（百分制）+ 全市场分位，如「81（前 3%）」"""
+    rt = rank_text(s.score_pct)
+    return f"{int(s.total_score * 100)}" + (f"（{rt}）" if rt else "")
+
+
+def _change_lines(changes: Optional[EditionDiff]) -> List[str]:
+    """「自上期以来」的变化，每类一行"""
+    if changes is None or changes.empty: return []
+    lines = []
+    moved = [p for p in changes.picks if p.rank != p.prev_rank]
+    if moved or changes.dropped_picks:
+        items = [f"{p.name} #{p.rank}" + ("(新进)" if not p.prev_rank else f"(原#{p.prev_rank})") for p in moved]
+        items += [f"{name}(移出)" for _, name in changes.dropped_picks]
+        lines.append("选股排名：" + "；".join(items))
+    if changes.new_sectors or changes.dropped_sectors:
+        lines.append(f"热门板块：新上榜 {'、'.join(changes.new_sectors) or '无'}；掉出 {'、'.join(changes.dropped_sectors) or '无'}")
+    if changes.new_hot_stocks or changes.dropped_hot_stocks:
+        lines.append(f"热门股票：新上榜 {'、'.join(n for _, n in changes.new_hot_stocks) or '无'}；掉出 {'、'.join(n for _, n in changes.dropped_hot_stocks) or '无'}")
+    if changes.index_deltas:
+        lines.append("指数变动：" + "；".join(f"{d.name} {_sign(d.delta_pct)}" for d in changes.index_deltas))
+    fresh = sum(len(v) for v in changes.new_news.values())
+    if fresh:
+        lines.append(f"新增资讯：{fresh} 条")
+    return lines
+
+
+def build_markdown(date_str: str, indices: Dict[str, IndexSnapshot], news_by_category: Dict[str, List[NewsItem]], hot_sectors: List[SectorInfo], hot_stocks: List[StockHotInfo], top_picks: List[StockScore], north_flow: Dict[str, Any], generated_at: Optional[str] = None, changes: Optional[EditionDiff] = None, market_picks: Optional[Dict[str, List[StockScore]]] = None, market_status: Optional[Dict[str, MarketStatus]] = None) -> str:
+    now = generated_at or datetime.now().strftime("%Y年%m月%d日 %H:%M")
+    out = ["# 📈 全球财经 & AI资讯日报", "", f"_{now}_", ""]
+    notes = closed_notes(market_status or {})
+    if notes:
+        out += [f"> {n}" for n in notes]
+        out.append("")
+
+    lines = _change_lines(changes)
+    if lines:
+        out += [f"## 🔄 自上期（{changes.prev_edition}）以来", ""]
+        out += [f"- {l}" for l in lines]
+        out.append("")
+
+    if indices:
+        out += ["## 📊 全球主要指数", "", "| 指数 | 最新价 | 涨跌幅 |", "|---|---:|---:|"]
+        out += [f"| {n} | {indices[n].price:,.2f} | {_sign(indices[n].change_pct)} |" for n in INDEX_ORDER if n in indices]
+        out.append("")
+
+    if top_picks:
+        out += [f"## 🎯 AI量化选股 Top {len(top_picks)}", "", "| # | 股票 | 价格 | 涨跌幅 | 评分 | 主要贡献 | 信号 | 风险 |", "|---|---|---:|---:|---:|---|---|---|"]
+        out += [f"| {i} | {s.name} {s.code} | {s.price:.2f} | {_sign(s.change_pct)} | {_score(s)} | {drivers_text(s.contributions, s.percentiles)} | {s.buy_reason} | {s.risk_tip} |"
+                for i, s in enumerate(top_picks, 1)]
+        out.append("")
+
+    for key, picks in (market_picks or {}).items():
+        if not picks or key not in MARKETS: continue
+        m = MARKETS[key]
+        out += [f"## {m.flag} {m.name}量化选股 Top {len(picks)}", "", "| # | 股票 | 价格 | 涨跌幅 | 评分 | 主要贡献 | 信号 |", "|---|---|---:|---:|---:|---|---|"]
+        out += [f"| {i} | {s.name} {s.code} | {m.currency}{s.price:.2f} | {_sign(s.change_pct)} | {_score(s)} | {drivers_text(s.contributions, s.percentiles)} | {s.buy_reason} |"
+                for i, s in enumerate(picks, 1)]
+        out.append("")
+
+    if hot_sectors:
+        out += ["## 🔥 热门板块", ""]
+        out += [f"- {s.name} {_sign(s.change_pct)}" + (f"（领涨 {s.leading_stock}，涨{s.advancers}/跌{s.decliners}）" if s.leading_stock else "")
+                for s in hot_sectors]
+        out.append("")
+
+    if hot_stocks:
+        out += ["## 💥 热门股票", "", "| 代码 | 名称 | 价格 | 涨跌幅 | 量比 |", "|---|---|---:|---:|---:|"]
+        out += [f"| {s.code} | {s.name} | {s.price:.2f} | {_sign(s.change_pct)}{' ' + s.limit_status if s.limit_status else ''} | {s.volume_ratio:.2f} |" for s in hot_stocks]
+        out.append("")
+
+    for cat, title in NEWS_SECTIONS:
+        items = news_by_category.get(cat, [])
+        if not items: continue
+        out += [f"## {title}", ""]
+        out += [f"- [{i.title}]({i.link}) — {i.source}" for i in items[:12]]
+        out.append("")
+
+    return "\n".join(out)
+
+
+def build_text(date_str: str, indices: Dict[str, IndexSnapshot], news_by_category: Dict[str, List[NewsItem]], hot_sectors: List[SectorInfo], hot_stocks: List[StockHotInfo], top_picks: List[StockScore], north_flow: Dict[str, Any], generated_at: Optional[str] = None, changes: Optional[EditionDiff] = None, market_picks: Optional[Dict[str, List[StockScore]]] = None, market_status: Optional[Dict[str, MarketStatus]] = None) -> str:
+    now = generated_at or datetime.now().strftime("%Y年%m月%d日 %H:%M")
+    out = [f"全球财经 & AI资讯日报  {now}", "=" * 40, ""]
+    notes = closed_notes(market_status or {})
+    if notes:
+        out += notes
+        out.append("")
+
+    lines = _change_lines(changes)
+    if lines:
+        out.append(f"【自上期（{changes.prev_edition}）以来】")
+        out += [f"  {l}" for l in lines]
+        out.append("")
+
+    if indices:
+        out.append("【全球主要指数】")
+        out += [f"  {n:<6}{indices[n].price:>12,.2f}  {_sign(indices[n].change_pct):>8}" for n in INDEX_ORDER if n in indices]
+        out.append("")
+
+    if top_picks:
+        out.append(f"【AI量化选股 Top {len(top_picks)}】")
+        for i, s in enumerate(top_picks, 1):
+            out.append(f"  {i:>2}. {s.name}({s.code}) {s.price:.2f} {_sign(s.change_pct)} 评分{_score(s)}")
+            if s.contributions:
+                out.append(f"      贡献: {drivers_text(s.contributions, s.percentiles)}")
+            out.append(f"      信号: {s.buy_reason} | 风险: {s.risk_tip}")
+        out.append("")
+
+    for key, picks in (market_picks or {}).items():
+        if not picks or key not in MARKETS: continue
+        m = MARKETS[key]
+        out.append(f"【{m.name}量化选股 Top {len(picks)}】")
+        out += [f"  {i:>2}. {s.name}({s.code}) {m.currency}{s.price:.2f} {_sign(s.change_pct)} 评分{_score(s)}"
+                for i, s in enumerate(picks, 1)]
+        out.append("")
+
+    if hot_sectors:
+        out.append("【热门板块】")
+        out.append("  " + "  ".join(f"{s.name} {_sign(s.change_pct)}" for s in hot_sectors))
+        out.append("")
+
+    if hot_stocks:
+        out.append("【热门股票】")
+        out += [f"  {s.code} {s.name} {s.price:.2f} {_sign(s.change_pct)} 量比{s.volume_ratio:.2f} {s.limit_status}".rstrip() for s in hot_stocks]
+        out.append("")
+
+    for cat, title in NEWS_SECTIONS:
+        items = news_by_category.get(cat, [])
+        if not items: continue
+        out.append(f"【{title}】")
+        out += [f"  · {i.title}（{i.source}）\n    {i.link}" for i in items[:12]]
+        out.append("")
+
+    return "\n".join(out)
+
+
+RENDERERS = {
+    "html": build_html_email,
+    "md":   build_markdown,
+    "txt":  build_text,
+}
+
+
+def render_report(report: Dict[str, Any], fmt: str = "html") -> str:
+    """report 为 utils.snapshot.load_report 的返回值；fmt ∈ html / md / txt"""
+    if fmt not in RENDERERS:
+        raise ValueError(f"不支持的格式: {fmt}（可选 {', '.join(RENDERERS)}）")
+    return RENDERERS[fmt](**report)
@@ -0,0 +1,57 @@
+"""
+tests/test_bar_quality.py
+news/bar_quality.py 复权回归：yfinance 的 Close 已按拆股调整，拆股记录不能再调整一次
+"""
+import numpy as np
+import pandas as pd
+
+from news.bar_quality import ABNORMAL_JUMP, ACTION_ADJUSTED, SPLIT_GAP, clean_bars
+
+
+def _panel(close, splits=None, dividends=None, symbol="AAPL"):
+    idx = pd.bdate_range("2026-01-05", periods=len(close))
+    frame = lambda v: pd.DataFrame({symbol: np.asarray(v, dtype=float)}, index=idx)
+    c = frame(close)
+    bars = {"Open": c, "High": c, "Low": c, "Close": c, "Volume": frame(np.full(len(close), 1e6))}
+    bars["Stock Splits"] = frame(splits if splits is not None else np.zeros(len(close)))
+    bars["Dividends"] = frame(dividends if dividends is not None else np.zeros(len(close)))
+    return bars
+
+
+def test_split_marker_does_not_readjust_split_adjusted_close():
+    splits = np.zeros(30)
+    splits[15] = 2.0
+    out, report = clean_bars(_panel(np.full(30, 50.0), splits=splits))
+    assert np.allclose(out["Close"]["AAPL"].to_numpy(), 50.0)
+    assert np.allclose(out["Volume"]["AAPL"].to_numpy(), 1e6)
+    assert report.flags.empty
+
+
+def test_unadjusted_gap_on_recorded_split_day_is_adjusted():
+    # 数据源偶尔给出未调整的价格：缺口与记录的比例一致时按记录比例补做复权，序列连续
+    close = np.r_[np.full(15, 100.0), np.full(15, 50.0)]
+    splits = np.zeros(30)
+    splits[15] = 2.0
+    out, report = clean_bars(_panel(close, splits=splits, symbol="600519.SS"))
+    assert np.allclose(out["Close"]["600519.SS"].to_numpy(), 50.0)
+    assert np.allclose(out["Volume"]["600519.SS"].to_numpy()[:15], 2e6)
+    assert SPLIT_GAP not in set(report.flags["reason"])
+    assert not report.excluded
+
+
+def test_suspension_at_panel_start_is_not_a_new_listing():
+    # 面板开头停牌（有收盘价、成交量为 0）复牌后超限涨跌不按新股豁免
+    close = np.r_[np.full(10, 50.0), np.full(20, 70.0)]
+    bars = _panel(close, symbol="000001.SZ")
+    bars["Volume"].iloc[:9] = 0.0
+    _, report = clean_bars(bars)
+    assert report.excluded == {"000001.SZ": ABNORMAL_JUMP}
+
+
+def test_dividend_still_adjusts_history():
+    div = np.zeros(30)
+    div[15] = 1.0
+    out, report = clean_bars(_panel(np.full(30, 50.0), dividends=div))
+    c = out["Close"]["AAPL"].to_numpy()
+    assert np.allclose(c[:15], 49.0) and np.allclose(c[15:], 50.0)
+    assert set(report.flags["reason"]) == {ACTION_ADJUSTED}
@@ -0,0 +1,90 @@
+"""
+utils/checkpoint.py
+分阶段断点续跑 —— 每个阶段的产出按期次（edition）持久化到 CACHE_DIR/checkpoints/
+
+重跑同一期日报时，已完成的阶段直接读取结果，从第一个未完成的阶段继续；
+force 中列出的阶段（或 "all"）强制重新执行，依赖它的后续阶段也随之重算；
+有外部副作用的阶段（发邮件）以 explicit=True 查询，只有在 force 中点名时才重跑
+行情类阶段可额外给出 session（休市时的最近交易日），同一 session 的结果存于
+CACHE_DIR/checkpoints/sessions/，跨期次复用 —— 长假期间不再重复下载、重复打分
+"""
+import logging
+import os
+import pickle
+from contextlib import nullcontext
+from typing import Any, Callable, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class StageCheckpoint:
+
+    def __init__(self, cache_dir: str, edition: str, force: Iterable[str] = (), profiler=None):
+        """profiler: utils.profiler.StageProfiler，真正执行（非复用）的阶段按其配置剖析"""
+        self.dir = os.path.join(cache_dir, "checkpoints", edition)
+        self.session_dir = os.path.join(cache_dir, "checkpoints", "sessions")
+        self.force: Set[str] = set(force)
+        self.recomputed: Set[str] = set()
+        self.profiler = profiler
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.dir, f"{stage}.pkl")
+
+    def _forced(self, stage: str, depends: Iterable[str]) -> bool:
+        return "all" in self.force or stage in self.force or any(d in self.recomputed for d in depends)
+
+    def done(self, stage: str, depends: Iterable[str] = (), explicit: bool = False) -> bool:
+        """explicit: 不随 "all" 或上游重算失效，只有 force 中点名该阶段才视为未完成"""
+        forced = stage in self.force if explicit else self._forced(stage, depends)
+        return not forced and os.path.exists(self._path(stage))
+
+    def _session_path(self, stage: str, session: str) -> str:
+        return os.path.join(self.session_dir, f"{stage}-{session}.pkl")
+
+    def run(self, stage: str, fn: Callable[[], Any], depends: Iterable[str] = (),
+            session: Optional[str] = None) -> Any:
+        """session: 相关市场休市时的复用键（见 utils/trading_calendar.closed_session），None = 不跨期次复用"""
+        path = self._path(stage)
+        if self.done(stage, depends):
+            try:
+                result = _load(path)
+                logger.info(f"  ↺ 复用断点 [{stage}]")
+                return result
+            except Exception as e:
+                logger.warning(f"断点 [{stage}] 读取失败，重新执行: {e}")
+
+        if session and not self._forced(stage, depends):
+            spath = self._session_path(stage, session)
+            if os.path.exists(spath):
+                try:
+                    result = _load(spath)
+                    _dump(result, path)         # 复用的是同一份行情，不触发下游阶段重算
+                    logger.info(f"  ↺ 休市复用 [{stage}] {session}")
+                    return result
+                except Exception as e:
+                    logger.warning(f"休市缓存 [{stage}] 读取失败，重新执行: {e}")
+
+        with self.profiler.stage(stage) if self.profiler else nullcontext():
+            result = fn()
+        self.save(stage, result)
+        if session:
+            os.makedirs(self.session_dir, exist_ok=True)
+            _dump(result, self._session_path(stage, session))
+        return result
+
+    def save(self, stage: str, result: Any):
+        _dump(result, self._path(stage))
+        self.recomputed.add(stage)
+
+
+def _load(path: str) -> Any:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _dump(result: Any, path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
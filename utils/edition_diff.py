@@ -0,0 +1,125 @@
+"""
+utils/edition_diff.py
+两期日报对比 —— 读取上一期数据快照，找出「自上期以来」的变化
+全部按代码 / 名称 / 链接建字典后单遍比较，复杂度与数据量线性相关
+"""
+import glob
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from news.models import NewsItem
+from utils.snapshot import load_report
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PickChange:
+    code: str
+    name: str
+    rank: int
+    prev_rank: int = 0          # 0 = 上期未入选（新进）
+
+
+@dataclass
+class IndexDelta:
+    name: str
+    price: float
+    prev_price: float
+    delta_pct: float
+
+
+@dataclass
+class EditionDiff:
+    prev_edition: str
+    picks: List[PickChange] = field(default_factory=list)
+    dropped_picks: List[Tuple[str, str]] = field(default_factory=list)      # (code, name)
+    new_sectors: List[str] = field(default_factory=list)
+    dropped_sectors: List[str] = field(default_factory=list)
+    new_hot_stocks: List[Tuple[str, str]] = field(default_factory=list)
+    dropped_hot_stocks: List[Tuple[str, str]] = field(default_factory=list)
+    index_deltas: List[IndexDelta] = field(default_factory=list)
+    new_news: Dict[str, List[NewsItem]] = field(default_factory=dict)
+
+    @property
+    def empty(self) -> bool:
+        return not (any(p.rank != p.prev_rank for p in self.picks) or self.dropped_picks
+                    or self.new_sectors or self.dropped_sectors
+                    or self.new_hot_stocks or self.dropped_hot_stocks
+                    or self.index_deltas or any(self.new_news.values()))
+
+
+def find_previous_snapshot(cache_dir: str, edition: str) -> Optional[str]:
+    """edition id 按字典序即时间序，取早于当前一期的最新快照"""
+    best = None
+    for path in glob.glob(os.path.join(cache_dir, "snapshots", "*.json")):
+        name = os.path.basename(path)[:-5]
+        if name < edition and (best is None or name > best[0]):
+            best = (name, path)
+    return best[1] if best else None
+
+
+def _news_key(item: NewsItem) -> str:
+    return item.link if item.link else item.title[:30]
+
+
+def diff_reports(prev: Dict[str, Any], cur: Dict[str, Any], prev_edition: str = "") -> EditionDiff:
+    """prev / cur 为 utils.snapshot.load_report 的返回值"""
+    d = EditionDiff(prev_edition=prev_edition)
+
+    # 选股排名变化
+    prev_rank = {s.code: i for i, s in enumerate(prev["top_picks"], 1)}
+    cur_codes = set()
+    for i, s in enumerate(cur["top_picks"], 1):
+        cur_codes.add(s.code)
+        d.picks.append(PickChange(code=s.code, name=s.name, rank=i, prev_rank=prev_rank.get(s.code, 0)))
+    d.dropped_picks = [(s.code, s.name) for s in prev["top_picks"] if s.code not in cur_codes]
+
+    # 热门板块 / 热门股票进出榜
+    prev_sec = {s.name for s in prev["hot_sectors"]}
+    cur_sec = {s.name for s in cur["hot_sectors"]}
+    d.new_sectors = [s.name for s in cur["hot_sectors"] if s.name not in prev_sec]
+    d.dropped_sectors = [s.name for s in prev["hot_sectors"] if s.name not in cur_sec]
+
+    prev_hot = {s.code for s in prev["hot_stocks"]}
+    cur_hot = {s.code for s in cur["hot_stocks"]}
+    d.new_hot_stocks = [(s.code, s.name) for s in cur["hot_stocks"] if s.code not in prev_hot]
+    d.dropped_hot_stocks = [(s.code, s.name) for s in prev["hot_stocks"] if s.code not in cur_hot]
+
+    # 指数变动（相对上期快照价格）
+    for name, info in cur["indices"].items():
+        old = prev["indices"].get(name)
+        if old and old.price and info.price != old.price:
+            d.index_deltas.append(IndexDelta(
+                name=name, price=info.price, prev_price=old.price,
+                delta_pct=round((info.price - old.price) / old.price * 100, 2),
+            ))
+
+    # 新出现的新闻
+    seen = {_news_key(i) for items in prev["news_by_category"].values() for i in items}
+    for cat, items in cur["news_by_category"].items():
+        fresh = [i for i in items if _news_key(i) not in seen]
+        if fresh:
+            d.new_news[cat] = fresh
+
+    return d
+
+
+def diff_with_previous(cache_dir: str, edition: str, cur: Dict[str, Any]) -> Optional[EditionDiff]:
+    """找到上一期快照并与当前数据对比；没有上一期时返回 None"""
+    path = find_previous_snapshot(cache_dir, edition)
+    if not path:
+        logger.info("未找到上一期快照，跳过变化对比")
+        return None
+    try:
+        prev = load_report(path)
+    except Exception as e:
+        logger.warning(f"上一期快照读取失败 [{path}]: {e}")
+        return None
+    prev_edition = os.path.basename(path)[:-5]
+    d = diff_reports(prev, cur, prev_edition)
+    logger.info(f"对比上一期 {prev_edition}: 新进选股 {sum(1 for p in d.picks if not p.prev_rank)} 支，"
+                f"新增新闻 {sum(len(v) for v in d.new_news.values())} 条")
+    return d
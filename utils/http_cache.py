@@ -0,0 +1,288 @@
+"""
+utils/http_cache.py
+出站 HTTP 统一缓存 —— TTL + LRU，可插拔后端，并发请求合并，命中统计
+
+  · 后端：MemoryBackend（进程内 LRU）/ SQLiteBackend（CACHE_DIR/http_cache.db，跨运行复用，按最近访问淘汰）
+  · TTL 按主机名后缀匹配 HTTP_CACHE_TTL（最长后缀优先），读取时按当前策略判断是否过期；TTL 为 0 的主机不缓存
+  · 同一请求正在进行中时，其余线程等待并共享这一次的结果（request coalescing）
+  · 只缓存成功响应（2xx，且通过调用方的 validate 校验），失败不会被缓存
+  · yfinance 自带会话（cookie / crumb），不便替换其 HTTP 层，改用 call() 在调用边界按参数缓存返回值
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from config import CACHE_DIR, HTTP_CACHE_BACKEND, HTTP_CACHE_MAX_ENTRIES, HTTP_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join(CACHE_DIR, "http_cache.db")
+YAHOO_HOST = "query1.finance.yahoo.com"      # call() 缓存 yfinance 结果时使用的 TTL 主机
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """可缓存的响应（只保留解析需要的部分，接口与 requests.Response 常用属性一致）"""
+    url: str
+    status_code: int
+    content: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoding: Optional[str] = None
+    from_cache: bool = False
+
+    @classmethod
+    def from_requests(cls, resp: requests.Response) -> "CachedResponse":
+        return cls(url=resp.url, status_code=resp.status_code, content=resp.content,
+                   headers=dict(resp.headers), encoding=resp.encoding or resp.apparent_encoding)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+
+# ──────────────────────────────────────────────────────────────
+# 后端：key → (写入时间, 序列化后的值)
+# ──────────────────────────────────────────────────────────────
+
+class MemoryBackend:
+
+    def __init__(self, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._max = max_entries
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key: str, ts: float, value: bytes):
+        with self._lock:
+            self._data[key] = (ts, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteBackend:
+
+    def __init__(self, path: str = DB_PATH, max_entries: int = HTTP_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._max = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key   TEXT PRIMARY KEY,
+                ts    REAL NOT NULL,
+                atime REAL NOT NULL,
+                value BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_http_cache_atime ON http_cache(atime);
+        """)
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            row = self._conn.execute("SELECT ts, value FROM http_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE http_cache SET atime = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            return row
+
+    def put(self, key: str, ts: float, value: bytes):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO http_cache(key, ts, atime, value) VALUES (?, ?, ?, ?)",
+                               (key, ts, ts, value))
+            self._conn.execute(
+                "DELETE FROM http_cache WHERE key IN "
+                "(SELECT key FROM http_cache ORDER BY atime DESC LIMIT -1 OFFSET ?)", (self._max,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+
+BACKENDS: Dict[str, Callable[[], Any]] = {
+    "memory": MemoryBackend,
+    "sqlite": SQLiteBackend,
+}
+
+
+# ──────────────────────────────────────────────────────────────
+# 缓存
+# ──────────────────────────────────────────────────────────────
+
+class HttpCache:
+
+    def __init__(self, backend=None, ttl: Optional[Dict[str, float]] = None):
+        """backend=None 时不落缓存（只做请求合并和统计）"""
+        self.backend = backend
+        self.ttl = dict(HTTP_CACHE_TTL if ttl is None else ttl)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.stores = 0
+
+    def ttl_for(self, host: str) -> float:
+        """主机名后缀最长匹配，未匹配用 default"""
+        host = host.lower()
+        best, ttl = -1, self.ttl.get("default", 0)
+        for suffix, t in self.ttl.items():
+            if suffix != "default" and (host == suffix or host.endswith("." + suffix)) and len(suffix) > best:
+                best, ttl = len(suffix), t
+        return ttl
+
+    def _lookup(self, key: str, ttl: float) -> Any:
+        if self.backend is None or ttl <= 0:
+            return None
+        try:
+            hit = self.backend.get(key)
+            if hit is not None and time.time() - hit[0] <= ttl:
+                value = pickle.loads(hit[1])
+                if isinstance(value, CachedResponse):
+                    value.from_cache = True
+                return value
+        except Exception as e:
+            logger.debug(f"HTTP 缓存读取失败: {e}")
+        return None
+
+    def _store(self, key: str, ttl: float, value: Any):
+        if self.backend is None or ttl <= 0:
+            return
+        try:
+            self.backend.put(key, time.time(), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            self.stores += 1
+        except Exception as e:
+            logger.debug(f"HTTP 缓存写入失败: {e}")
+
+    def _fetch(self, key: str, ttl: float, fetch: Callable[[], Any], cacheable: Callable[[Any], bool]) -> Any:
+        """缓存命中直接返回；否则同 key 的并发请求只有一个真正执行"""
+        value = self._lookup(key, ttl)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return fut.result()
+        try:
+            value = fetch()
+            if cacheable(value):
+                self._store(key, ttl, value)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def request(self, method: str, url: str, session: Optional[requests.Session] = None,
+                params: Optional[Dict[str, Any]] = None, json_body: Any = None,
+                key: Optional[str] = None, validate: Optional[Callable[[CachedResponse], bool]] = None,
+                **kwargs) -> CachedResponse:
+        """
+        key:      自定义缓存键（请求参数含随机盐 / 签名时由调用方给出稳定的键）
+        validate: 额外的可缓存判断（如接口以 200 返回业务错误）
+        其余参数（headers / timeout …）原样传给 requests，不参与缓存键
+        """
+        raw = key or json.dumps([method.upper(), url, sorted((params or {}).items()), json_body],
+                                ensure_ascii=False, default=str)
+        cache_key = "http:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        ttl = self.ttl_for(urlsplit(url).hostname or "")
+
+        def fetch() -> CachedResponse:
+            resp = (session or requests).request(method, url, params=params, json=json_body, **kwargs)
+            return CachedResponse.from_requests(resp)
+
+        def cacheable(r: CachedResponse) -> bool:
+            try:
+                return r.ok and (validate is None or validate(r))
+            except Exception:
+                return False
+
+        return self._fetch(cache_key, ttl, fetch, cacheable)
+
+    def get(self, url: str, **kwargs) -> CachedResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> CachedResponse:
+        return self.request("POST", url, **kwargs)
+
+    def call(self, key: str, fn: Callable[[], Any], host: str = YAHOO_HOST) -> Any:
+        """非 requests 客户端（yfinance）的调用级缓存：按 key 缓存 fn() 的返回值，None / 空结果不缓存"""
+        cache_key = "call:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self._fetch(cache_key, self.ttl_for(host), fn,
+                           lambda v: v is not None and not (hasattr(v, "__len__") and len(v) == 0))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "stores": self.stores,
+            "hit_rate": round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+            "entries": len(self.backend) if self.backend is not None else 0,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        if s["hits"] + s["misses"] + s["coalesced"]:
+            logger.info(f"HTTP 缓存：命中 {s['hits']}，未命中 {s['misses']}，合并 {s['coalesced']}，"
+                        f"命中率 {s['hit_rate']:.0%}，共 {s['entries']} 条")
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """按 HTTP_CACHE_BACKEND 创建的全局缓存（sqlite / memory / off）"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            factory = BACKENDS.get(HTTP_CACHE_BACKEND)
+            backend = None
+            if factory is not None:
+                try:
+                    backend = factory()
+                except Exception as e:
+                    logger.warning(f"HTTP 缓存后端 {HTTP_CACHE_BACKEND} 初始化失败，改用内存: {e}")
+                    backend = MemoryBackend()
+            _cache = HttpCache(backend)
+        return _cache
@@ -0,0 +1,165 @@
+"""
+utils/profiler.py
+分阶段性能剖析 —— 不改代码即可剖析一次生产运行（USTCB_PROFILE=picks_by_market,render 或 all）
+
+  · 每个被选中的阶段同时跑两种剖析：
+      cProfile   —— 调用阶段的线程内精确计时，写 {阶段}.pstats（python -m pstats / snakeviz 可读）
+      栈采样     —— 后台线程按 PROFILE_INTERVAL 采样全部线程的调用栈（抓取 / 选股的线程池也覆盖到），
+                    写 {阶段}.collapsed（每行「线程;外层;…;内层 次数」，可直接喂给 flamegraph.pl / speedscope）
+  · 阶段结束后在日志里打印 cProfile 自身耗时前 N 的函数，以及采样中最常位于栈顶的函数（已排除线程等待）
+  · 输出目录：CACHE_DIR/profiles/<运行时间>/
+  · 多进程打分（engine.py）的子进程不在剖析范围内，需要时设 USTCB_WORKERS=1 让打分在本进程内完成
+"""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple
+
+from config import CACHE_DIR, PROFILE_INTERVAL, PROFILE_TOP_N
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STDLIB = os.path.abspath(sysconfig.get_paths()["stdlib"])
+
+# 栈顶落在这些文件里的样本是线程在等待（线程池空闲 / 等 Future），不计入热点
+IDLE_FILES = ("threading.py", "queue.py", os.path.join("concurrent", "futures", "thread.py"),
+              os.path.join("concurrent", "futures", "_base.py"), "selectors.py")
+# 同理，cProfile 里主线程等锁的时间不算函数自身耗时
+IDLE_FUNCS = ("<method 'acquire' of '_thread.lock' objects>", "<method 'acquire' of '_thread.RLock' objects>")
+
+
+def _short(path: str) -> str:
+    """源文件路径缩写：仓库内用相对路径，第三方库 / 标准库从包名开始"""
+    if not path or path.startswith(("<", "~")):
+        return path
+    path = os.path.abspath(path)
+    marker = os.sep + "site-packages" + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    for base in (ROOT, STDLIB):
+        if path.startswith(base + os.sep):
+            return os.path.relpath(path, base)
+    return os.path.basename(path)
+
+
+def _label(filename: str, lineno: int, func: str) -> str:
+    return f"{func} ({_short(filename)}:{lineno})"
+
+
+class StackSampler:
+    """纯标准库的采样剖析器：定时读取 sys._current_frames()，按完整调用栈计数"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(tid, f"thread-{tid}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+    def hottest(self, n: int) -> List[Tuple[str, int]]:
+        """栈顶函数（自身耗时）按样本数排序，排除线程等待"""
+        leaves: Counter = Counter()
+        for stack, cnt in self.stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            if not any(f"({idle}:" in leaf for idle in IDLE_FILES):
+                leaves[leaf] += cnt
+        return leaves.most_common(n)
+
+
+def _top_functions(stats: pstats.Stats, n: int) -> List[Tuple[float, float, int, str]]:
+    """[(自身耗时, 累计耗时, 调用次数, 函数)]，按自身耗时降序"""
+    rows = [(tt, ct, nc, _label(*key)) for key, (cc, nc, tt, ct, callers) in stats.stats.items()
+            if key[2] not in IDLE_FUNCS]
+    return sorted(rows, reverse=True)[:n]
+
+
+class StageProfiler:
+
+    def __init__(self, stages: Iterable[str] = (), out_dir: str = "", top_n: int = PROFILE_TOP_N):
+        """stages: 需要剖析的阶段名（或 "all"）；为空时 stage() 不做任何事"""
+        self.stages = set(stages)
+        self.dir = out_dir or os.path.join(CACHE_DIR, "profiles", datetime.now().strftime("%Y%m%d-%H%M%S"))
+        self.top_n = top_n
+
+    def enabled(self, stage: str) -> bool:
+        return "all" in self.stages or stage in self.stages
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        if not self.enabled(stage):
+            yield
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        sampler = StackSampler()
+        prof = cProfile.Profile()
+        sampler.start()
+        t0 = time.perf_counter()
+        try:
+            prof.enable()
+        except ValueError as e:          # 已有其他剖析器挂在本线程上（如 python -m cProfile）
+            logger.warning(f"[{stage}] cProfile 未启用: {e}")
+            prof = None
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            elapsed = time.perf_counter() - t0
+            sampler.stop()
+            self._report(stage, prof, sampler, elapsed)
+
+    def _report(self, stage: str, prof, sampler: StackSampler, elapsed: float):
+        base = os.path.join(self.dir, stage)
+        try:
+            sampler.write_collapsed(base + ".collapsed")
+            lines = [f"⏱ 剖析 [{stage}] 耗时 {elapsed:.2f}s，{sampler.samples} 次采样 → {base}.collapsed"]
+            if prof is not None:
+                prof.dump_stats(base + ".pstats")
+                lines[0] += f" / {stage}.pstats"
+                stats = pstats.Stats(prof)
+                lines.append(f"  cProfile 自身耗时 Top {self.top_n}（自身 / 累计 / 调用次数）:")
+                lines += [f"    {tt:8.3f}s {ct:8.3f}s {nc:>8}  {fn}" for tt, ct, nc, fn in _top_functions(stats, self.top_n)]
+            hot = sampler.hottest(self.top_n)
+            if hot:
+                lines.append(f"  采样热点 Top {len(hot)}（全部线程，占样本比例）:")
+                lines += [f"    {cnt / max(sampler.samples, 1):7.1%}  {leaf}" for leaf, cnt in hot]
+            logger.info("\n".join(lines))
+        except Exception as e:
+            logger.warning(f"[{stage}] 剖析结果写入失败: {e}")
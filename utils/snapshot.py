@@ -0,0 +1,139 @@
+"""
+utils/snapshot.py
+日报数据快照 —— 把一期日报用到的全部数据序列化为紧凑 JSON
+重新渲染 / 重发历史日报时直接读快照，不再联网抓取
+"""
+import json
+import logging
+import os
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from news.models import IndexSnapshot, NewsItem, SectorInfo, StockHotInfo
+from stock_selectors.multi_factor import StockScore
+from stock_selectors.score_table import ScoreTable
+from utils.trading_calendar import MarketStatus
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def edition_id(now: Optional[datetime] = None) -> str:
+    """一期日报的唯一标识：日期 + 早/晚报，如 2026-01-05-am"""
+    now = now or datetime.now()
+    return f"{now:%Y-%m-%d}-{'am' if now.hour < 12 else 'pm'}"
+
+
+def snapshot_path(cache_dir: str, edition: str) -> str:
+    return os.path.join(cache_dir, "snapshots", f"{edition}.json")
+
+
+# ──────────────────────────────────────────────────────────────
+# dataclass 列表 ⇄ 表格（字段名只写一次，比逐条 dict 紧凑得多）
+# ──────────────────────────────────────────────────────────────
+
+def _to_table(objs: List[Any], cls) -> Dict[str, Any]:
+    cols = [f.name for f in fields(cls)]
+    return {"cols": cols, "rows": [[getattr(o, c) for c in cols] for o in objs]}
+
+
+def _from_table(table: Optional[Dict[str, Any]], cls) -> List[Any]:
+    if not table:
+        return []
+    known = {f.name for f in fields(cls)}
+    cols = table["cols"]
+    out = []
+    for row in table["rows"]:
+        # 旧版本快照缺的字段走默认值，新版本多出的字段忽略
+        out.append(cls(**{c: v for c, v in zip(cols, row) if c in known}))
+    return out
+
+
+# 报告各部分 → (快照字段, 转换函数)；CLI 分阶段运行时各阶段只更新自己那部分
+PARTS = {
+    "indices":          ("indices", lambda v: _to_table(list((v or {}).values()), IndexSnapshot)),
+    "news_by_category": ("news", lambda v: {cat: _to_table(items, NewsItem) for cat, items in (v or {}).items()}),
+    "hot_sectors":      ("hot_sectors", lambda v: _to_table(v or [], SectorInfo)),
+    "hot_stocks":       ("hot_stocks", lambda v: _to_table(v or [], StockHotInfo)),
+    "top_picks":        ("top_picks", lambda v: _to_table(v or [], StockScore)),
+    "market_picks":     ("market_picks", lambda v: {m: _to_table(picks, StockScore) for m, picks in (v or {}).items()}),
+    "north_flow":       ("north_flow", lambda v: v or {}),
+    "market_status":    ("market_status", lambda v: _to_table(list((v or {}).values()), MarketStatus)),
+}
+
+
+def snapshot_parts(**parts: Any) -> Dict[str, Any]:
+    """只转换给出的部分，如 snapshot_parts(top_picks=..., market_picks=...)"""
+    return {PARTS[name][0]: PARTS[name][1](value) for name, value in parts.items()}
+
+
+def empty_snapshot(edition: Optional[str] = None, date_str: Optional[str] = None) -> Dict[str, Any]:
+    """各部分都为空的快照，供 CLI 单独运行某个阶段时作为起点"""
+    now = datetime.now()
+    return build_snapshot(edition or edition_id(now), date_str or now.strftime("%Y-%m-%d"),
+                          {}, {}, [], [], [], {})
+
+
+def build_snapshot(
+    edition: str,
+    date_str: str,
+    indices: Dict[str, IndexSnapshot],
+    news_by_category: Dict[str, List[NewsItem]],
+    hot_sectors: List[SectorInfo],
+    hot_stocks: List[StockHotInfo],
+    top_picks: List[StockScore],
+    north_flow: Dict[str, Any],
+    generated_at: Optional[str] = None,
+    market_picks: Optional[Dict[str, List[StockScore]]] = None,
+    market_status: Optional[Dict[str, MarketStatus]] = None,
+) -> Dict[str, Any]:
+    return {
+        "version": SNAPSHOT_VERSION,
+        "edition": edition,
+        "date_str": date_str,
+        "generated_at": generated_at or datetime.now().strftime("%Y年%m月%d日 %H:%M"),
+        **snapshot_parts(indices=indices, news_by_category=news_by_category, hot_sectors=hot_sectors,
+                         hot_stocks=hot_stocks, top_picks=top_picks, market_picks=market_picks,
+                         north_flow=north_flow, market_status=market_status),
+    }
+
+
+def save_snapshot(snapshot: Dict[str, Any], path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    logger.info(f"数据快照已保存: {path}")
+    return path
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    """读取原始快照（表格形式），并校验版本"""
+    with open(path, "r", encoding="utf-8") as f:
+        snap = json.load(f)
+    version = snap.get("version", 0)
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"快照版本 {version} 高于当前支持的 {SNAPSHOT_VERSION}: {path}")
+    return snap
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """
+    读取快照并还原为 build_html_email 等渲染函数可直接使用的关键字参数
+    """
+    snap = load_snapshot(path)
+    return {
+        "date_str": snap["date_str"],
+        "indices": {i.name: i for i in _from_table(snap.get("indices"), IndexSnapshot)},
+        "news_by_category": {cat: _from_table(t, NewsItem) for cat, t in snap.get("news", {}).items()},
+        "hot_sectors": _from_table(snap.get("hot_sectors"), SectorInfo),
+        "hot_stocks": _from_table(snap.get("hot_stocks"), StockHotInfo),
+        "top_picks": ScoreTable.from_rows(_from_table(snap.get("top_picks"), StockScore)),
+        "market_picks": {m: ScoreTable.from_rows(_from_table(t, StockScore)) for m, t in snap.get("market_picks", {}).items()},
+        "north_flow": snap.get("north_flow", {}),
+        "market_status": {s.market: s for s in _from_table(snap.get("market_status"), MarketStatus)},
+        "generated_at": snap.get("generated_at"),
+    }
@@ -0,0 +1,120 @@
+"""
+utils/trading_calendar.py
+交易日历 —— 沪深 / 港交所 / 纽交所，节假日来自仓库内置的 trading_holidays.json（不联网）
+
+  · 交易日 = 工作日且不在该市场节假日表中；日期按交易所当地时区计算
+  · 超出节假日表覆盖年份时退化为「只排除周末」，并提示更新节假日文件
+  · 日报据此判断哪些行情阶段需要重新抓取：相关市场今日全部休市时，
+    行情停留在最近一个交易日收盘，可直接复用该交易日的缓存结果
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from stock_selectors.universe import MARKETS
+
+logger = logging.getLogger(__name__)
+
+HOLIDAYS_PATH = os.path.join(os.path.dirname(__file__), "..", "trading_holidays.json")
+MAX_LOOKBACK_DAYS = 30
+
+
+@dataclass(slots=True)
+class MarketStatus:
+    market: str
+    date: str              # 交易所当地日期
+    is_open: bool          # 今日是否交易日
+    last_session: str      # 最近一个交易日（今日开市即今日）
+    reason: str = ""       # 休市原因：节日名 / 周末
+
+
+class TradingCalendar:
+
+    def __init__(self, path: str = HOLIDAYS_PATH):
+        self.holidays: Dict[str, Dict[date, str]] = {}
+        self.years: Dict[str, set] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            logger.warning(f"交易日历文件读取失败，只按周末判断休市: {e}")
+            raw = {}
+        for market, spec in raw.items():
+            self.holidays[market] = {date.fromisoformat(d): name for d, name in spec.get("holidays", {}).items()}
+            self.years[market] = set(spec.get("years", []))
+        self._warned: set = set()
+
+    def closed_reason(self, market: str, d: date) -> str:
+        """休市原因；交易日返回空串"""
+        if d.weekday() >= 5:
+            return "周末"
+        if d.year not in self.years.get(market, ()) and (market, d.year) not in self._warned:
+            self._warned.add((market, d.year))
+            logger.warning(f"交易日历未覆盖 {market} {d.year} 年，只按周末判断（请更新 trading_holidays.json）")
+        return self.holidays.get(market, {}).get(d, "")
+
+    def is_trading_day(self, market: str, d: date) -> bool:
+        return not self.closed_reason(market, d)
+
+    def last_trading_day(self, market: str, d: date) -> date:
+        """不晚于 d 的最近交易日"""
+        for i in range(MAX_LOOKBACK_DAYS):
+            day = d - timedelta(days=i)
+            if self.is_trading_day(market, day):
+                return day
+        return d
+
+    def local_today(self, market: str, now: Optional[datetime] = None) -> date:
+        tz = ZoneInfo(MARKETS[market].tz)
+        return (now.astimezone(tz) if now else datetime.now(tz)).date()
+
+    def status(self, market: str, now: Optional[datetime] = None) -> MarketStatus:
+        today = self.local_today(market, now)
+        reason = self.closed_reason(market, today)
+        return MarketStatus(
+            market=market,
+            date=today.isoformat(),
+            is_open=not reason,
+            last_session=self.last_trading_day(market, today).isoformat(),
+            reason=reason,
+        )
+
+
+_calendar: Optional[TradingCalendar] = None
+
+
+def get_calendar() -> TradingCalendar:
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar()
+    return _calendar
+
+
+def market_status(markets: Iterable[str] = MARKETS, now: Optional[datetime] = None) -> Dict[str, MarketStatus]:
+    cal = get_calendar()
+    return {m: cal.status(m, now) for m in markets}
+
+
+def closed_notes(status: Dict[str, MarketStatus]) -> List[str]:
+    """报告中的休市说明，每个休市市场一行"""
+    notes = []
+    for m, st in status.items():
+        if st.is_open or m not in MARKETS:
+            continue
+        mk = MARKETS[m]
+        notes.append(f"{mk.flag} {mk.name}今日（{st.date}）休市：{st.reason}，行情为 {st.last_session} 收盘数据")
+    return notes
+
+
+def closed_session(status: Dict[str, MarketStatus], *markets: str) -> Optional[str]:
+    """
+    给定市场今日全部休市时返回复用键（各市场最近交易日），行情阶段可复用该交易日的结果；
+    任一市场开市则返回 None，照常按期次抓取
+    """
+    if not markets or any(status[m].is_open for m in markets):
+        return None
+    return "_".join(f"{m}{status[m].last_session}" for m in markets)
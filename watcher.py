@@ -0,0 +1,252 @@
+"""
+watcher.py
+盘中盯盘模式 —— 常驻进程，K 线 / 因子 / 名称常驻内存
+
+  · 每 WATCH_INTERVAL_SEC 秒拉一次全池最新价
+  · 与价格相关的因子（5/20 日动量、MACD、布林带位置）按「昨日状态 + 当前价」增量更新，
+    全部是长度为 N 的向量运算，5000 支股票单次更新在毫秒级
+  · 新进 Top-N、MACD 盘中金叉时发出提醒（日志 + CACHE_DIR/alerts_{date}.jsonl）
+  · 跨日（北京时间）时由最新日线重建昨日状态，常驻多日也不会拿旧的参考价打分
+  · 同一进程内按 SCHEDULE_HOUR:SCHEDULE_MINUTE 定时跑完整日报（DailyRunner）
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from config import (
+    CACHE_DIR, FACTOR_WEIGHTS, STOCK_POOL,
+    SCHEDULE_HOUR, SCHEDULE_MINUTE,
+    WATCH_INTERVAL_SEC, WATCH_TOP_N, WATCH_SESSIONS,
+)
+from news.bars import load_bars
+from news.north_flow import north_flow_scores
+from news.sentiment import news_sentiment_scores
+from runner import DailyRunner
+from stock_selectors.fundamentals import FundamentalStore
+from stock_selectors.multi_factor import CANDIDATE_STOCKS, _score_one, get_stock_name
+from stock_selectors.universe import clean_code, to_yf_code
+from utils.trading_calendar import get_calendar
+
+logger = logging.getLogger(__name__)
+
+try:
+    import yfinance as yf
+    YF_OK = True
+except ImportError:
+    YF_OK = False
+
+try:
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    APS_OK = True
+except ImportError:
+    APS_OK = False
+
+# WATCH_SESSIONS 与跨日判断均按北京时间
+CN_TZ = ZoneInfo("Asia/Shanghai")
+
+# 盘中增量更新的因子；其余因子沿用昨日收盘时的值
+PRICE_FACTORS = ("momentum_5d", "momentum_20d", "macd_signal", "boll_position")
+
+
+def _ema_k(n: int) -> float:
+    return 2 / (n + 1)
+
+
+class WatchRunner:
+
+    def __init__(self, symbols: Optional[List[str]] = None, top_n: int = WATCH_TOP_N):
+        self.universe = symbols or ([to_yf_code(c) for c in STOCK_POOL] if STOCK_POOL else [s for s, *_ in CANDIDATE_STOCKS])
+        self.symbols: List[str] = []
+        self.top_n = top_n
+        self.factor_names = list(FACTOR_WEIGHTS)
+        self.weights = np.array([FACTOR_WEIGHTS[f] for f in self.factor_names])
+        self.weights = self.weights / (self.weights.sum() or 1)
+        self.top_set: set = set()
+        self.crossed_today: set = set()
+        self.day = datetime.now(CN_TZ).strftime("%Y-%m-%d")
+        self._load_state()
+
+    # ── 启动 / 跨日时：由日线历史建立状态 ─────────────────────
+    def _reset(self):
+        """没有可用日线时清空状态，update / tick 不做任何事"""
+        n = len(self.factor_names)
+        self.symbols, self.names = [], []
+        self.F = np.empty((0, n))
+        self.col = {f: j for j, f in enumerate(self.factor_names)}
+        self.c5 = self.c20 = self.boll_sum = self.boll_sq = np.empty(0)
+        self.ema12 = self.ema26 = self.dea = self.last_close = np.empty(0)
+        self.dif_above = np.empty(0, dtype=bool)
+        self.top_set = set()
+
+    def _load_state(self):
+        self.crossed_today.clear()
+        bars = load_bars(self.universe)
+        if "Close" not in bars or bars["Close"].dropna(how="all").empty:
+            logger.warning("盯盘初始化：K线数据为空，跨日后重试")
+            self._reset()
+            return
+        close = bars["Close"]
+        # 盘中启动时去掉当天未完成的 K 线，状态只基于已收盘的日线
+        if len(close) and close.index[-1].date() == datetime.now(CN_TZ).date():
+            bars = {f: df.iloc[:-1] for f, df in bars.items()}
+            close = bars["Close"]
+
+        store = FundamentalStore()
+        north = north_flow_scores(self.universe)
+        senti = news_sentiment_scores(self.universe)
+        keep, rows = [], []
+        n = len(self.universe)
+        ema12, ema26, dea = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+        for i, sym in enumerate(self.universe):
+            if sym not in close:
+                continue
+            c = close[sym].dropna()
+            if len(c) < 30:
+                continue
+            idx = c.index
+            fs = _score_one(c.tolist(), bars["High"][sym].reindex(idx).tolist(),
+                            bars["Low"][sym].reindex(idx).tolist(), bars["Volume"][sym].reindex(idx).fillna(0).tolist(),
+                            store.get(sym, "pe"), FACTOR_WEIGHTS, north.get(clean_code(sym), 0.5),
+                            senti.get(clean_code(sym), 0.5))
+            if fs is None:
+                continue
+            keep.append(i)
+            rows.append([fs.get(f, 0.5) for f in self.factor_names])
+            e12 = e26 = float(c.iloc[0]); d = 0.0
+            for v in c.iloc[1:]:
+                e12 += (v - e12) * _ema_k(12)
+                e26 += (v - e26) * _ema_k(26)
+                d += ((e12 - e26) - d) * _ema_k(9)
+            ema12[i], ema26[i], dea[i] = e12, e26, d
+
+        self.symbols = [self.universe[i] for i in keep]
+        self.names = [get_stock_name(clean_code(s)) for s in self.symbols]
+        self.F = np.array(rows, dtype=float).reshape(len(keep), len(self.factor_names))
+        self.col = {f: j for j, f in enumerate(self.factor_names)}
+
+        hist = close[self.symbols].ffill().to_numpy()
+        self.c5, self.c20 = hist[-5], hist[-20]
+        win = hist[-19:]
+        self.boll_sum, self.boll_sq = win.sum(axis=0), (win ** 2).sum(axis=0)
+        self.ema12, self.ema26, self.dea = ema12[keep], ema26[keep], dea[keep]
+        self.dif_above = (self.ema12 - self.ema26) > self.dea
+        self.last_close = hist[-1]
+        self.top_set = set(self._top_idx(self.F @ self.weights))
+        logger.info(f"盯盘初始化完成：{len(self.symbols)} 支，因子矩阵 {self.F.shape}")
+
+    # ── 盘中：增量更新 ────────────────────────────────────
+    def update(self, price: np.ndarray) -> List[Dict]:
+        """price: 与 self.symbols 对齐的最新价向量（缺失为 NaN），返回本次产生的提醒"""
+        p = np.where(np.isfinite(price), price, self.last_close)
+        F = self.F.copy()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            e12 = self.ema12 + (p - self.ema12) * _ema_k(12)
+            e26 = self.ema26 + (p - self.ema26) * _ema_k(26)
+            dif = e12 - e26
+            dea = self.dea + (dif - self.dea) * _ema_k(9)
+            above = dif > dea
+            cross = above & ~self.dif_above     # 金叉提醒不依赖 macd_signal 是否有权重
+
+            mid = (self.boll_sum + p) / 20
+            std = np.sqrt(np.maximum((self.boll_sq + p * p) / 20 - mid * mid, 0))
+            live = {
+                "momentum_5d": np.clip(((p - self.c5) / self.c5 + 0.08) / 0.16, 0, 1),
+                "momentum_20d": np.clip(((p - self.c20) / self.c20 + 0.12) / 0.24, 0, 1),
+                "macd_signal": np.where(cross, 1.0, np.where(above, 0.5, 0.0)),
+                "boll_position": np.clip((p - (mid - 2 * std)) / (4 * std + 1e-9), 0, 1),
+            }
+        # 权重里没有的价格因子（配置或覆盖权重去掉了它）不参与打分，直接跳过
+        for name in PRICE_FACTORS:
+            if name in self.col:
+                F[:, self.col[name]] = live[name]
+
+        total = F @ self.weights
+        top = self._top_idx(total)
+        alerts = []
+        for i in top:
+            if i not in self.top_set:
+                alerts.append(self._alert("进入Top", i, p[i], total[i]))
+        for i in np.flatnonzero(cross):
+            if i not in self.crossed_today:
+                self.crossed_today.add(i)
+                alerts.append(self._alert("MACD金叉", i, p[i], total[i]))
+        self.top_set = set(top)
+        return alerts
+
+    def _top_idx(self, total: np.ndarray) -> List[int]:
+        k = min(self.top_n, len(total))
+        if k == 0:
+            return []
+        part = np.argpartition(-total, k - 1)[:k]
+        return [int(i) for i in part[np.argsort(-total[part])]]
+
+    def _alert(self, kind: str, i: int, price: float, score: float) -> Dict:
+        return {
+            "time": datetime.now(CN_TZ).strftime("%H:%M:%S"), "type": kind,
+            "code": clean_code(self.symbols[i]), "name": self.names[i],
+            "price": round(float(price), 2), "score": round(float(score), 4),
+        }
+
+    # ── 轮询 & 调度 ──────────────────────────────────────
+    def _fetch_quotes(self) -> Optional[np.ndarray]:
+        if not YF_OK:
+            return None
+        try:
+            raw = yf.download(self.symbols, period="1d", interval="1m", progress=False, threads=True)
+            last = raw["Close"].ffill().iloc[-1]
+            return last.reindex(self.symbols).to_numpy(dtype=float)
+        except Exception as e:
+            logger.warning(f"盘中行情拉取失败: {e}")
+            return None
+
+    def _in_session(self, now: datetime) -> bool:
+        """now 为北京时间"""
+        hm = now.strftime("%H:%M")
+        return get_calendar().is_trading_day("CN", now.date()) and any(a <= hm <= b for a, b in WATCH_SESSIONS)
+
+    def tick(self):
+        now = datetime.now(CN_TZ)
+        if now.strftime("%Y-%m-%d") != self.day:
+            # 跨日：昨日收盘已成为新的参考价，动量 / MACD / 布林带状态与其余因子全部重建
+            self.day = now.strftime("%Y-%m-%d")
+            self._load_state()
+        if not self._in_session(now) or not self.symbols:
+            return
+        price = self._fetch_quotes()
+        if price is None:
+            return
+        t0 = time.perf_counter()
+        alerts = self.update(price)
+        cost = (time.perf_counter() - t0) * 1000
+        logger.info(f"盯盘更新 {len(self.symbols)} 支，耗时 {cost:.1f} ms，提醒 {len(alerts)} 条")
+        if alerts:
+            self._emit(alerts)
+
+    def _emit(self, alerts: List[Dict]):
+        for a in alerts:
+            logger.warning(f"🔔 [{a['type']}] {a['name']}({a['code']}) ¥{a['price']} 评分 {a['score']:.2f}")
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CACHE_DIR, f"alerts_{self.day}.jsonl"), "a", encoding="utf-8") as f:
+            for a in alerts:
+                f.write(json.dumps(a, ensure_ascii=False) + "\n")
+
+    def run(self):
+        logger.info(f"盯盘模式启动：每 {WATCH_INTERVAL_SEC}s 轮询，日报定时 {SCHEDULE_HOUR:02d}:{SCHEDULE_MINUTE:02d}")
+        if APS_OK:
+            sched = BlockingScheduler()
+            sched.add_job(self.tick, "interval", seconds=WATCH_INTERVAL_SEC, max_instances=1, coalesce=True)
+            sched.add_job(DailyRunner().run, "cron", hour=SCHEDULE_HOUR, minute=SCHEDULE_MINUTE)
+            sched.start()
+            return
+        logger.warning("apscheduler 未安装，仅轮询行情，不定时生成日报")
+        while True:
+            t0 = time.time()
+            self.tick()
+            time.sleep(max(0.0, WATCH_INTERVAL_SEC - (time.time() - t0)))